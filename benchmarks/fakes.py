@@ -0,0 +1,323 @@
+"""
+This module provides the in-process stand-ins used by the benchmarks.
+
+FakeBigQueryClient implements the parts of google.cloud.bigquery.Client used
+by src/database (queries with result pages and Arrow conversion, streaming
+inserts, load jobs from files and GCS URIs, table metadata) on top of a
+temporary SQLite database. FakeAsyncOpenAI answers chat completions with
+deterministic sentiment scores. Both sleep for a configurable latency
+before every call and record how long each call took per stage.
+"""
+
+# file: benchmarks/fakes.py
+
+import asyncio
+import csv
+import io
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pyarrow as pa
+from google.api_core import exceptions
+
+
+class Latency:
+    """
+    Latency distribution of one kind of call.
+
+    Args:
+        base (float, optional): Fixed seconds per call. Defaults to 0.
+        per_item (float, optional): Additional seconds per row or review. Defaults to 0.
+        jitter (float, optional): Sigma of a log-normal factor applied to the
+            latency, 0 for none. Defaults to 0.
+        seed (int, optional): Seed of the jitter. Defaults to 0.
+    """
+
+    def __init__(self, base=0.0, per_item=0.0, jitter=0.0, seed=0):
+        self.base = base
+        self.per_item = per_item
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, items=1):
+        latency = self.base + self.per_item * items
+        if self.jitter and latency:
+            with self._lock:
+                latency *= self._random.lognormvariate(0.0, self.jitter)
+        return latency
+
+    def scaled(self, factor):
+        return Latency(self.base * factor, self.per_item * factor, self.jitter)
+
+
+class StageRecorder:
+    """Thread-safe collection of per-stage call durations."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def timed(self, stage):
+        return _Timer(self, stage)
+
+
+class _Timer:
+    def __init__(self, recorder, stage):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.stage, time.perf_counter() - self.start)
+
+
+def _sql_literal(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _bind_parameters(query, job_config):
+    """Inline the named query parameters of a job config as SQL literals."""
+    parameters = getattr(job_config, 'query_parameters', None) or []
+    for parameter in sorted(parameters, key=lambda p: len(p.name), reverse=True):
+        query = query.replace(f"@{parameter.name}", _sql_literal(parameter.value))
+    return query
+
+
+MERGE_TARGET = re.compile(r"MERGE\s+`([^`]+)`", re.IGNORECASE)
+
+
+class FakeRowIterator:
+    """Result of a fake query job: iterable rows, pages and Arrow conversion."""
+
+    def __init__(self, client, query, page_size):
+        self.client = client
+        self.query = query
+        self.page_size = page_size or 10000
+
+    def _batches(self):
+        # A dedicated connection per iterator, like a result download stream
+        conn = self.client.connect()
+        try:
+            cursor = conn.execute(self.query)
+            if cursor.description is None:
+                return
+            columns = [description[0] for description in cursor.description]
+            while True:
+                with self.client.recorder.timed("bigquery.page"):
+                    time.sleep(self.client.latency['page'].sample())
+                    batch = cursor.fetchmany(self.page_size)
+                if not batch:
+                    return
+                yield [dict(zip(columns, row)) for row in batch]
+        finally:
+            conn.close()
+
+    @property
+    def pages(self):
+        return self._batches()
+
+    def __iter__(self):
+        return (row for batch in self._batches() for row in batch)
+
+    def to_arrow(self, bqstorage_client=None):
+        return pa.Table.from_pylist(list(self))
+
+    def to_arrow_iterable(self, bqstorage_client=None):
+        return (pa.RecordBatch.from_pylist(batch) for batch in self._batches())
+
+    def to_dataframe(self, bqstorage_client=None):
+        return self.to_arrow().to_pandas()
+
+
+class FakeQueryJob:
+    def __init__(self, client, query, job_config):
+        self.client = client
+        self.query = _bind_parameters(query, job_config)
+
+    def result(self, page_size=None):
+        if self.query.lstrip().upper().startswith("MERGE"):
+            self.client.merge_state(self.query)
+            return FakeRowIterator(self.client, "SELECT 1 WHERE 0", page_size)
+        return FakeRowIterator(self.client, self.query, page_size)
+
+
+class FakeLoadJob:
+    def __init__(self, num_rows):
+        self.output_rows = num_rows
+
+    def result(self):
+        return self
+
+
+class FakeBigQueryClient:
+    """
+    In-process stand-in for google.cloud.bigquery.Client backed by SQLite.
+
+    Args:
+        path (str): SQLite database file.
+        latency (dict, optional): Latency per call kind: 'query', 'page',
+            'insert' (per insertAll request, per_item per row) and 'load'
+            (per load job, per_item per row).
+        recorder (StageRecorder, optional): Collects the call durations.
+        objects (dict, optional): Mapping of gs:// URI to CSV text served to
+            load_table_from_uri.
+    """
+
+    def __init__(self, path, latency=None, recorder=None, objects=None):
+        self.path = str(path)
+        self.latency = {kind: Latency() for kind in ('query', 'page', 'insert', 'load')}
+        self.latency.update(latency or {})
+        self.recorder = recorder or StageRecorder()
+        self.objects = objects if objects is not None else {}
+        self.project = "benchmark"
+        self._lock = threading.Lock()
+        self._conn = self.connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _write(self, statement, parameters=()):
+        with self._lock:
+            if parameters and isinstance(parameters[0], (list, tuple)):
+                self._conn.executemany(statement, parameters)
+            else:
+                self._conn.execute(statement, parameters)
+            self._conn.commit()
+
+    def _columns(self, table_id):
+        with self._lock:
+            return [row[1] for row in self._conn.execute(f"PRAGMA table_info(`{table_id}`)")]
+
+    @staticmethod
+    def _table_id(table):
+        if hasattr(table, 'table_id'):
+            return f"{table.project}.{table.dataset_id}.{table.table_id}"
+        return str(table)
+
+    def get_table(self, table):
+        table_id = self._table_id(table)
+        columns = self._columns(table_id)
+        if not columns:
+            raise exceptions.NotFound(f"Table {table_id} not found")
+        with self._lock:
+            (num_rows,) = self._conn.execute(f"SELECT COUNT(*) FROM `{table_id}`").fetchone()
+        return SimpleNamespace(table_id=table_id, num_rows=num_rows, schema=columns, modified=None)
+
+    def create_table(self, table):
+        table_id = self._table_id(table)
+        columns = ", ".join(f"`{field.name}`" for field in table.schema)
+        self._write(f"CREATE TABLE IF NOT EXISTS `{table_id}` ({columns})")
+        return table
+
+    def query(self, query, job_config=None):
+        with self.recorder.timed("bigquery.query"):
+            time.sleep(self.latency['query'].sample())
+        return FakeQueryJob(self, query, job_config)
+
+    def merge_state(self, query):
+        """Apply the processing state MERGE of operations.set_watermark."""
+        table_id = MERGE_TARGET.search(query).group(1)
+        pipeline, watermark = re.search(r"SELECT\s+(.+?)\s+AS Pipeline,\s+(.+?)\s+AS Watermark", query).groups()
+        self._write(f"DELETE FROM `{table_id}` WHERE Pipeline = {pipeline}")
+        self._write(f"INSERT INTO `{table_id}` (Pipeline, Watermark, UpdatedAt) "
+                    f"VALUES ({pipeline}, {watermark}, datetime('now'))")
+
+    def _insert(self, table_id, rows):
+        if not rows:
+            return
+        columns = self._columns(table_id)
+        placeholders = ", ".join("?" * len(columns))
+        names = ", ".join(f"`{column}`" for column in columns)
+        self._write(f"INSERT INTO `{table_id}` ({names}) VALUES ({placeholders})",
+                    [tuple(row.get(column) for column in columns) for row in rows])
+
+    def insert_rows_json(self, table_id, rows, row_ids=None, **kwargs):
+        with self.recorder.timed("bigquery.insert"):
+            time.sleep(self.latency['insert'].sample(len(rows)))
+            self._insert(str(table_id), rows)
+        return []
+
+    def load_table_from_file(self, file_obj, table_id, job_config=None):
+        rows = [json.loads(line) for line in io.TextIOWrapper(file_obj, encoding="utf-8") if line.strip()]
+        with self.recorder.timed("bigquery.load"):
+            time.sleep(self.latency['load'].sample(len(rows)))
+            self._insert(str(table_id), rows)
+        return FakeLoadJob(len(rows))
+
+    def load_table_from_uri(self, uri, table_id, job_config=None):
+        reader = csv.reader(io.StringIO(self.objects[uri]))
+        header = next(reader)
+        rows = list(reader)
+        with self.recorder.timed("bigquery.load"):
+            time.sleep(self.latency['load'].sample(len(rows)))
+            columns = ", ".join(f"`{name}`" for name in header)
+            self._write(f"CREATE TABLE IF NOT EXISTS `{table_id}` ({columns})")
+            if job_config is None or job_config.write_disposition == "WRITE_TRUNCATE":
+                self._write(f"DELETE FROM `{table_id}`")
+            self._write(f"INSERT INTO `{table_id}` ({columns}) VALUES ({', '.join('?' * len(header))})", rows)
+        return FakeLoadJob(len(rows))
+
+    def close(self):
+        self._conn.close()
+
+
+def fake_sentiment(review_id):
+    """Deterministic sentiment of a review, derived from its Id."""
+    value = zlib.crc32(str(review_id).encode("utf-8"))
+    return {"score": round((value % 2001) / 1000 - 1, 3), "magnitude": round((value >> 11) % 1000 / 250, 3)}
+
+
+class FakeAsyncOpenAI:
+    """
+    Stand-in for openai.AsyncOpenAI answering sentiment prompts.
+
+    Batched prompts (see src/sentiment/batching.py) are answered with one
+    result per review Id in the payload; single-review prompts with one result.
+
+    Args:
+        latency (Latency, optional): Latency per request, per_item per review.
+        recorder (StageRecorder, optional): Collects the request durations.
+    """
+
+    def __init__(self, latency=None, recorder=None):
+        self.latency = latency or Latency()
+        self.recorder = recorder or StageRecorder()
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, **kwargs):
+        self.requests += 1
+        content = messages[-1]['content']
+        payload_start = content.find("\n\n[")
+        if payload_start >= 0:
+            reviews = json.loads(content[payload_start + 2:])
+            answer = {"results": [{"Id": review["Id"], **fake_sentiment(review["Id"])} for review in reviews]}
+        else:
+            reviews = [content]
+            answer = fake_sentiment(content)
+
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency.sample(len(reviews)))
+        self.recorder.record("llm.request", time.perf_counter() - start)
+        message = SimpleNamespace(content=json.dumps(answer))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
@@ -0,0 +1,144 @@
+"""
+Import-time benchmark of the package entry points and DAG files.
+
+Every target is imported in a fresh interpreter, which reports the wall
+time of the import, the heavy SDKs it loaded and the slowest modules
+according to `python -X importtime`. Package modules must not load any of
+HEAVY_MODULES at import time, and DAG files must not import the project at
+all while Airflow parses them; with --check, a violation or an import
+slower than --max-seconds makes the command exit with status 1.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --check --max-seconds 0.5 src.database
+"""
+
+# file: benchmarks/import_time.py
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# SDKs and libraries that take tens of milliseconds to seconds to import
+HEAVY_MODULES = ("google.cloud", "google.api_core", "openai", "ollama", "httpx", "pyarrow", "numpy", "scipy", "pandas")
+
+MODULE_TARGETS = [
+    "src.database",
+    "src.sentiment.pipeline",
+    "src.sentiment.sentiment_analysis",
+    "src.sentiment.ollama_sentiment_analysis",
+    "src.sentiment.router",
+    "src.sentiment.planner",
+    "src.sentiment.run",
+]
+
+DAG_TARGETS = ["dags/feedback_dag.py", "dags/load_data_dag.py"]
+
+MEASURE = """
+import json, sys, time
+before = sorted(sys.modules)
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "before": before, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _slowest_imports(importtime_output, modules, count):
+    """Return the modules with the largest cumulative import time in -X importtime output."""
+    slowest = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if cumulative.strip().isdigit() and name in modules:
+            slowest.append((int(cumulative) / 1e6, name))
+    return [{'module': name, 'seconds': round(seconds, 4)} for seconds, name in sorted(slowest, reverse=True)[:count]]
+
+
+def _packages(target):
+    """Return a module and its parent packages, e.g. {"src", "src.database"}."""
+    parts = target.split(".")
+    return {".".join(parts[:index]) for index in range(1, len(parts) + 1)}
+
+
+def measure_import(target, top=5):
+    """
+    Import a module or DAG file in a fresh interpreter.
+
+    Args:
+        target (str): Module name, or path of a .py file relative to the project root.
+        top (int, optional): Number of slowest imports to report. Defaults to 5.
+
+    Returns:
+        dict: The import time in seconds, the forbidden modules that were
+            loaded ('violations') and the slowest imports.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    if target.endswith(".py"):
+        statement = f"import runpy; runpy.run_path({str(PROJECT_ROOT / target)!r})"
+        forbidden = ("src",)
+    else:
+        statement = f"import {target}"
+        forbidden = HEAVY_MODULES
+
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", MEASURE.format(statement=statement)],
+                             cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{process.stderr[-2000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    violations = sorted({prefix for prefix in forbidden for module in result['modules']
+                         if module == prefix or module.startswith(prefix + ".")})
+    return {
+        'seconds': round(result['seconds'], 4),
+        'violations': violations,
+        # Skip interpreter startup and the target's own packages, which include everything below them
+        'slowest': _slowest_imports(
+            process.stderr, set(result['modules']) - set(result['before']) - _packages(target), top),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the package entry points and DAG files.")
+    parser.add_argument("targets", nargs="*",
+                        help="Modules or DAG files. Defaults to every entry point, and the DAGs if Airflow is installed.")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if a target loads forbidden modules or is too slow.")
+    parser.add_argument("--max-seconds", type=float, help="Maximum import time of each target.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    targets = args.targets or list(MODULE_TARGETS)
+    if not args.targets:
+        if importlib.util.find_spec("airflow"):
+            targets += DAG_TARGETS
+        else:
+            print("Airflow is not installed; skipping the DAG files")
+    results = {target: measure_import(target) for target in targets}
+    failures = []
+    for target, result in results.items():
+        print(f"{target:<45} {result['seconds']:>8.3f}s")
+        for slow in result['slowest']:
+            print(f"{'':>4}{slow['module']:<41} {slow['seconds']:>8.3f}s")
+        if result['violations']:
+            failures.append(f"{target} imports {', '.join(result['violations'])} at import time")
+        if args.max_seconds is not None and result['seconds'] > args.max_seconds:
+            failures.append(f"{target} takes {result['seconds']:.3f}s to import (limit {args.max_seconds}s)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if args.check and failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+"""
+Local HTTP emulator of the OpenAI and Ollama chat APIs for load testing.
+
+The emulator answers the requests made by evaluate_sentiment* (OpenAI
+POST /v1/chat/completions) and evaluate_sentiment_ollama* (Ollama
+POST /api/chat) with deterministic sentiment scores, for single-review and
+batched prompts alike, so the scoring path can be load-tested without a
+GPU or network access. It can inject:
+
+- latency drawn from a constant, uniform, log-normal or exponential
+  distribution, plus a time per generated token
+- request and token rate limits (RPM/TPM) enforced over a sliding minute,
+  reported in x-ratelimit-* headers and answered with 429 + Retry-After
+- bursts of 429s that start at random and reject every request for a while
+- malformed output (prose, truncated JSON, missing keys, out-of-range values)
+
+Point the pipeline at it with OPENAI_BASE_URL=http://127.0.0.1:8080/v1 and
+OLLAMA_HOST=http://127.0.0.1:8080. GET /stats returns the request counters.
+
+Usage:
+    python -m benchmarks.llm_emulator --port 8080 --latency lognormal:0.5:0.4 \\
+        --tpm 90000 --burst-rate 0.01 --malformed-rate 0.02
+"""
+
+# file: benchmarks/llm_emulator.py
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fakes import fake_sentiment
+
+DISTRIBUTIONS = ("constant", "uniform", "lognormal", "exponential")
+
+MALFORMED_KINDS = ("prose", "truncated", "missing_keys", "out_of_range")
+
+BYTES_PER_TOKEN = 4
+
+
+class LatencyDistribution:
+    """
+    Distribution of the time to first token.
+
+    Args:
+        kind (str, optional): One of DISTRIBUTIONS. Defaults to "constant".
+        mean (float, optional): Mean latency in seconds. Defaults to 0.
+        spread (float, optional): Half-width for "uniform", sigma of the
+            underlying normal for "lognormal"; unused otherwise. Defaults to 0.
+        per_token (float, optional): Seconds per generated token. Defaults to 0.
+
+    Raises:
+        ValueError: If kind is not supported.
+    """
+
+    def __init__(self, kind="constant", mean=0.0, spread=0.0, per_token=0.0):
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(f"Unsupported latency distribution: {kind}")
+        self.kind = kind
+        self.mean = mean
+        self.spread = spread
+        self.per_token = per_token
+
+    @classmethod
+    def parse(cls, spec, per_token=0.0):
+        """
+        Parse a "kind:mean[:spread]" specification, e.g. "lognormal:0.5:0.4".
+
+        Args:
+            spec (str): The specification.
+            per_token (float, optional): Seconds per generated token. Defaults to 0.
+
+        Returns:
+            LatencyDistribution: The distribution.
+        """
+        kind, *values = spec.split(":")
+        values = [float(value) for value in values]
+        return cls(kind, *values, per_token=per_token)
+
+    def sample(self, rng, output_tokens=0):
+        if self.kind == "constant" or self.mean <= 0:
+            latency = self.mean
+        elif self.kind == "uniform":
+            latency = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.kind == "lognormal":
+            # Parameterized so that the mean of the distribution is self.mean
+            latency = rng.lognormvariate(math.log(self.mean) - self.spread ** 2 / 2, self.spread)
+        else:
+            latency = rng.expovariate(1.0 / self.mean)
+        return max(0.0, latency) + self.per_token * output_tokens
+
+
+class EmulatorSettings:
+    """
+    Behaviour of the emulator.
+
+    Args:
+        latency (LatencyDistribution, optional): Response latency. Defaults to none.
+        requests_per_minute (int, optional): RPM limit, 0 for none. Defaults to 0.
+        tokens_per_minute (int, optional): TPM limit, 0 for none. Defaults to 0.
+        burst_rate (float, optional): Probability that a request starts a
+            burst of 429s. Defaults to 0.
+        burst_duration (float, optional): Seconds a burst lasts. Defaults to 5.
+        malformed_rate (float, optional): Probability that an answer is
+            malformed. Defaults to 0.
+        seed (int, optional): Random seed. Defaults to 0.
+    """
+
+    def __init__(self, latency=None, requests_per_minute=0, tokens_per_minute=0, burst_rate=0.0,
+                 burst_duration=5.0, malformed_rate=0.0, seed=0):
+        self.latency = latency or LatencyDistribution()
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_rate = burst_rate
+        self.burst_duration = burst_duration
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+
+
+class EmulatorState:
+    """Rate-limit windows, bursts and counters shared by the request handlers."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.window = deque()  # (time, tokens) of accepted requests
+        self.burst_until = 0.0
+        self.counters = {'requests': 0, 'accepted': 0, 'rate_limited': 0, 'burst_rejected': 0, 'malformed': 0}
+        self.lock = threading.Lock()
+
+    def admit(self, tokens):
+        """
+        Decide whether a request is accepted.
+
+        Args:
+            tokens (int): Prompt plus maximum completion tokens of the request.
+
+        Returns:
+            tuple: (status, headers). status is None for accepted requests,
+                otherwise "rate_limited" or "burst_rejected".
+        """
+        settings = self.settings
+        now = time.monotonic()
+        with self.lock:
+            self.counters['requests'] += 1
+            while self.window and self.window[0][0] <= now - 60:
+                self.window.popleft()
+            used_requests = len(self.window)
+            used_tokens = sum(used for _, used in self.window)
+            reset = (self.window[0][0] + 60 - now) if self.window else 0.0
+
+            status, retry_after = None, 0.0
+            if now < self.burst_until:
+                status, retry_after = "burst_rejected", self.burst_until - now
+            elif settings.burst_rate and self.rng.random() < settings.burst_rate:
+                self.burst_until = now + settings.burst_duration
+                status, retry_after = "burst_rejected", settings.burst_duration
+            elif settings.requests_per_minute and used_requests + 1 > settings.requests_per_minute:
+                status, retry_after = "rate_limited", reset
+            elif settings.tokens_per_minute and used_tokens + tokens > settings.tokens_per_minute:
+                status, retry_after = "rate_limited", reset
+
+            if status is None:
+                self.window.append((now, tokens))
+                used_requests += 1
+                used_tokens += tokens
+            else:
+                self.counters[status] += 1
+
+        headers = {}
+        if settings.requests_per_minute:
+            headers['x-ratelimit-limit-requests'] = str(settings.requests_per_minute)
+            headers['x-ratelimit-remaining-requests'] = str(max(0, settings.requests_per_minute - used_requests))
+            headers['x-ratelimit-reset-requests'] = f"{reset:.3f}s"
+        if settings.tokens_per_minute:
+            headers['x-ratelimit-limit-tokens'] = str(settings.tokens_per_minute)
+            headers['x-ratelimit-remaining-tokens'] = str(max(0, settings.tokens_per_minute - used_tokens))
+            headers['x-ratelimit-reset-tokens'] = f"{reset:.3f}s"
+        if status is not None:
+            headers['retry-after'] = f"{max(retry_after, 0.001):.3f}"
+        return status, headers
+
+    def draw(self, output_tokens):
+        """Draw the latency and whether the answer is malformed."""
+        with self.lock:
+            latency = self.settings.latency.sample(self.rng, output_tokens)
+            malformed = None
+            if self.settings.malformed_rate and self.rng.random() < self.settings.malformed_rate:
+                malformed = self.rng.choice(MALFORMED_KINDS)
+                self.counters['malformed'] += 1
+            self.counters['accepted'] += 1
+        return latency, malformed
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+def answer_prompt(content):
+    """
+    Build the sentiment answer to a single-review or batched prompt.
+
+    Args:
+        content (str): Content of the last chat message.
+
+    Returns:
+        tuple: The answer object and the number of reviews it covers.
+    """
+    payload_start = content.find("\n\n[")
+    if payload_start >= 0:
+        try:
+            reviews = json.loads(content[payload_start + 2:])
+            return {"results": [{"Id": review["Id"], **fake_sentiment(review["Id"])} for review in reviews]}, len(reviews)
+        except (ValueError, KeyError, TypeError):
+            pass
+    review = content.rsplit("\n\n", 1)[-1]
+    return fake_sentiment(review), 1
+
+
+def malform(answer, kind):
+    """
+    Corrupt an answer the way models occasionally do.
+
+    Args:
+        answer (dict): The well-formed answer.
+        kind (str): One of MALFORMED_KINDS.
+
+    Returns:
+        str: The corrupted answer text.
+    """
+    text = json.dumps(answer)
+    if kind == "prose":
+        return "I think the overall sentiment of this review is fairly positive."
+    if kind == "truncated":
+        return text[:max(1, len(text) // 2)]
+    items = answer["results"] if "results" in answer else [answer]
+    for item in items:
+        if kind == "missing_keys":
+            item.pop("magnitude", None)
+        else:
+            item["score"] = 7.5
+    return json.dumps(answer)
+
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LLMEmulator/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.server.state.stats())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            self._chat(request, openai=True)
+        elif self.path.rstrip("/") == "/api/chat":
+            self._chat(request, openai=False)
+        else:
+            self._send_json(404, {"error": f"unknown endpoint {self.path}"})
+
+    def _chat(self, request, openai):
+        state = self.server.state
+        messages = request.get("messages") or [{"role": "user", "content": ""}]
+        answer, num_reviews = answer_prompt(messages[-1].get("content", ""))
+        prompt_tokens = sum(len(str(m.get("content", "")).encode("utf-8")) for m in messages) // BYTES_PER_TOKEN
+        max_tokens = request.get("max_tokens") or 40 * num_reviews + 20
+
+        status, headers = state.admit(prompt_tokens + max_tokens if openai else prompt_tokens)
+        if status is not None:
+            message = "Rate limit reached" if status == "rate_limited" else "Server is overloaded"
+            body = ({"error": {"message": message, "type": "requests", "code": "rate_limit_exceeded"}}
+                    if openai else {"error": message})
+            self._send_json(429, body, headers)
+            return
+
+        content = json.dumps(answer)
+        completion_tokens = len(content) // BYTES_PER_TOKEN
+        latency, malformed = state.draw(completion_tokens)
+        if malformed:
+            content = malform(answer, malformed)
+        time.sleep(latency)
+
+        model = request.get("model", "emulator")
+        if openai:
+            body = {
+                "id": f"chatcmpl-emulator-{state.counters['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }
+        else:
+            body = {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": int(latency * 1e9),
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": completion_tokens,
+            }
+        self._send_json(200, body, headers)
+
+
+class LLMEmulator(ThreadingHTTPServer):
+    """
+    Threaded HTTP server emulating the OpenAI and Ollama chat APIs.
+
+    Args:
+        settings (EmulatorSettings, optional): Behaviour of the emulator.
+        host (str, optional): Interface to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port to bind, 0 for any free port. Defaults to 0.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, settings=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), EmulatorHandler)
+        self.state = EmulatorState(settings or EmulatorSettings())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread and return the server."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emulate the OpenAI and Ollama chat APIs for load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", default="constant:0", help="kind:mean[:spread], kind one of " + ", ".join(DISTRIBUTIONS))
+    parser.add_argument("--per-token", type=float, default=0.0, help="Seconds per generated token.")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute limit.")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute limit.")
+    parser.add_argument("--burst-rate", type=float, default=0.0, help="Probability that a request starts a 429 burst.")
+    parser.add_argument("--burst-duration", type=float, default=5.0, help="Seconds a 429 burst lasts.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of malformed answers.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    settings = EmulatorSettings(
+        latency=LatencyDistribution.parse(args.latency, args.per_token),
+        requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+        burst_rate=args.burst_rate, burst_duration=args.burst_duration,
+        malformed_rate=args.malformed_rate, seed=args.seed)
+    server = LLMEmulator(settings, args.host, args.port)
+    print(f"LLM emulator listening on {server.url} "
+          f"(OpenAI: {server.url}/v1/chat/completions, Ollama: {server.url}/api/chat)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.state.stats()))
+
+
+if __name__ == "__main__":
+    main()
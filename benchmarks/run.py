@@ -0,0 +1,297 @@
+"""
+End-to-end throughput benchmarks of the ingest, query and scoring paths.
+
+Each scenario generates a synthetic feedback CSV of the requested size and
+runs the real code of src/database/operations.py and
+perform_sentiment_analysis against in-process stand-ins for BigQuery and
+the OpenAI API (see benchmarks/fakes.py) that inject configurable latency.
+Three stages are measured:
+
+- load: load_csv_to_bigquery of the CSV from a fake GCS object
+- scan: get_data_pages over the whole feedback table
+- sentiment: perform_sentiment_analysis over the whole backlog
+
+For every stage the report has the throughput (rows or reviews per second),
+the p50/p99 latency of the BigQuery and LLM calls made during the stage and
+the peak traced memory allocated during the stage. Results can be compared
+with a stored baseline, in which case throughput drops and memory growth
+beyond a tolerance are reported as regressions and the command exits with
+status 1.
+
+Usage:
+    python -m benchmarks.run --sizes 1000,100000 --check
+    python -m benchmarks.run --sizes 1000 --update-baseline
+"""
+
+# file: benchmarks/run.py
+
+import argparse
+import contextlib
+import json
+import logging
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+from benchmarks.fakes import FakeAsyncOpenAI, FakeBigQueryClient, Latency, StageRecorder
+from src.utils.config import config
+from src.utils.logging import logger
+from src.database import operations
+from src.sentiment.sentiment_analysis import perform_sentiment_analysis
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+DEFAULT_SIZES = [1000]
+
+# Latency profile of the stand-ins, in seconds, before scaling
+LATENCY_PROFILE = {
+    'query': Latency(base=0.05, jitter=0.2),
+    'page': Latency(base=0.002, jitter=0.2),
+    'insert': Latency(base=0.02, per_item=0.00001, jitter=0.2),
+    'load': Latency(base=0.2, per_item=0.000001, jitter=0.2),
+    'llm': Latency(base=0.3, per_item=0.01, jitter=0.3),
+}
+
+WORDS = {
+    '1': "terrible broken refund waste awful disappointed".split(),
+    '3': "okay average decent fine expected acceptable".split(),
+    '5': "great excellent love amazing perfect recommend".split(),
+}
+FILLER = "the product arrived box it this was and my after week battery screen price delivery".split()
+
+
+def generate_csv(num_rows, seed=0):
+    """
+    Generate a synthetic feedback CSV.
+
+    Args:
+        num_rows (int): Number of reviews.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        str: CSV text with an Id, Review and Label column.
+    """
+    rng = random.Random(seed)
+    lines = ["Id,Review,Label"]
+    for index in range(num_rows):
+        label = rng.choice(list(WORDS))
+        words = [rng.choice(FILLER + WORDS[label]) for _ in range(rng.randint(8, 40))]
+        lines.append(f"{index:09d},{' '.join(words)},{label}")
+    return "\n".join(lines) + "\n"
+
+
+def percentile(samples, fraction):
+    """
+    Return a percentile of a list of samples (nearest rank).
+
+    Args:
+        samples (list): The samples.
+        fraction (float): Percentile between 0 and 1.
+
+    Returns:
+        float: The percentile, or None if there are no samples.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+@contextlib.contextmanager
+def override_config(**values):
+    """Temporarily set config attributes."""
+    previous = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+
+def _measure(recorder, stage, items, run):
+    """Run a stage and collect its throughput, call latencies and peak memory."""
+    recorder.samples.clear()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    peak -= before
+
+    calls = {}
+    for name, samples in sorted(recorder.samples.items()):
+        calls[name] = {
+            'count': len(samples),
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 3),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        }
+    return {
+        'items': items,
+        'seconds': round(elapsed, 3),
+        'items_per_second': round(items / elapsed, 1) if elapsed > 0 else None,
+        'peak_mb': round(peak / 2 ** 20, 2),
+        'calls': calls,
+    }
+
+
+def run_scenario(num_rows, latency_scale=1.0, batch_size=20, concurrency=16, page_size=1000):
+    """
+    Run the load, scan and sentiment stages over a synthetic dataset.
+
+    Args:
+        num_rows (int): Number of reviews in the dataset.
+        latency_scale (float, optional): Factor applied to every injected
+            latency; 0 measures the pure CPU overhead. Defaults to 1.0.
+        batch_size (int, optional): Reviews per prompt. Defaults to 20.
+        concurrency (int, optional): LLM requests in flight. Defaults to 16.
+        page_size (int, optional): Rows per pipeline page. Defaults to 1000.
+
+    Returns:
+        dict: Results per stage, see _measure().
+    """
+    recorder = StageRecorder()
+    latency = {kind: profile.scaled(latency_scale) for kind, profile in LATENCY_PROFILE.items()}
+    objects = {"gs://benchmark/feedback.csv": generate_csv(num_rows)}
+
+    with tempfile.TemporaryDirectory() as directory, override_config(
+            STORAGE_BACKEND='bigquery', PROJECT_ID='benchmark', DATASET_NAME='feedback',
+            FEEDBACK_TABLE_NAME='reviews', SENTIMENT_TABLE_NAME='sentiment', STATE_TABLE_NAME='processing_state',
+            OPENAI_API_KEY='benchmark', SENTIMENT_CACHE_ENABLED=False, QUERY_CACHE_ENABLED=False,
+            SENTIMENT_CASCADE_ENABLED=False, DEDUP_ENABLED=False, OPENAI_TPM_LIMIT=0,
+            LLM_RATE_INITIAL_CONCURRENCY=concurrency, SENTIMENT_BATCH_SIZE=page_size):
+        bigquery = FakeBigQueryClient(Path(directory) / "bigquery.sqlite3",
+                                      {kind: latency[kind] for kind in ('query', 'page', 'insert', 'load')},
+                                      recorder, objects)
+        llm = FakeAsyncOpenAI(latency['llm'], recorder)
+
+        with patch('src.database.operations.get_bigquery_client', return_value=bigquery), \
+             patch('src.database.operations.get_bigquery_storage_client', return_value=None), \
+             patch('src.sentiment.sentiment_analysis.get_async_openai_client', return_value=llm):
+            operations.setup_tables()
+            results = {
+                'load': _measure(recorder, 'load', num_rows, lambda: operations.load_csv_to_bigquery(
+                    "benchmark", "feedback.csv", config.FEEDBACK_TABLE_NAME)),
+                'scan': _measure(recorder, 'scan', num_rows, lambda: sum(
+                    len(page) for page in operations.get_data_pages(config.FEEDBACK_TABLE_NAME, page_size=page_size))),
+                'sentiment': _measure(recorder, 'sentiment', num_rows, lambda: perform_sentiment_analysis(
+                    batch_size=batch_size, concurrency=concurrency)),
+            }
+        scored = bigquery.get_table(f"benchmark.feedback.{config.SENTIMENT_TABLE_NAME}").num_rows
+        bigquery.close()
+
+    if scored != num_rows:
+        raise RuntimeError(f"Expected {num_rows} scored reviews, found {scored}")
+    results['sentiment']['llm_requests'] = llm.requests
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.2):
+    """
+    Compare benchmark results with a baseline.
+
+    Args:
+        results (dict): Mapping of dataset size (str) to run_scenario() results.
+        baseline (dict): Results in the same format.
+        tolerance (float, optional): Allowed relative throughput drop and
+            memory growth. Defaults to 0.2.
+
+    Returns:
+        list: One message per regression; empty if there is none.
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if not reference:
+                continue
+            if (reference.get('items_per_second') and result['items_per_second'] is not None
+                    and result['items_per_second'] < reference['items_per_second'] * (1 - tolerance)):
+                regressions.append(f"{size} rows, {stage}: {result['items_per_second']} items/s "
+                                   f"vs baseline {reference['items_per_second']}")
+            if reference.get('peak_mb') and result['peak_mb'] > reference['peak_mb'] * (1 + tolerance):
+                regressions.append(f"{size} rows, {stage}: peak {result['peak_mb']} MB "
+                                   f"vs baseline {reference['peak_mb']} MB")
+    return regressions
+
+
+def format_results(results):
+    """
+    Format benchmark results as a table.
+
+    Args:
+        results (dict): Mapping of dataset size to run_scenario() results.
+
+    Returns:
+        str: One line per stage and one indented line per call kind.
+    """
+    lines = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            lines.append(f"{size:>9} rows  {stage:<10} {result['items_per_second']:>10} items/s  "
+                         f"{result['seconds']:>8}s  peak {result['peak_mb']:>8} MB")
+            for name, call in result['calls'].items():
+                lines.append(f"{'':>27}{name:<16} n={call['count']:<7} "
+                             f"p50={call['p50_ms']}ms  p99={call['p99_ms']}ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingest, query and scoring paths with fake backends.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated dataset sizes, e.g. 1000,100000,1000000.")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Factor applied to the injected latencies.")
+    parser.add_argument("--batch-size", type=int, default=20, help="Reviews per prompt.")
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM requests in flight.")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per pipeline page.")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline results file.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on regressions against the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's info logs.")
+    args = parser.parse_args(argv)
+
+    level = logger.level
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    tracemalloc.start()
+    try:
+        results = {str(size): run_scenario(int(size), args.latency_scale, args.batch_size, args.concurrency,
+                                           args.page_size)
+                   for size in args.sizes.split(",")}
+    finally:
+        tracemalloc.stop()
+        logger.setLevel(level)
+    print(format_results(results))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+    elif args.check:
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path}")
+            return 1
+        regressions = compare_with_baseline(results, json.loads(baseline_path.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
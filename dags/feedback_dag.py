@@ -1,50 +1,98 @@
-from airflow import DAG
-from airflow.operators.python_operator import PythonOperator
-from datetime import datetime, timedelta
-import sys
-import os
-
-# Add the path to your project directory
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-# Import your functions from data_collection.py
-
-from src.data.collection import create_table_if_not_exists, perform_sentiment_analysis
-
-default_args = {
-    'owner': 'airflow',
-    'depends_on_past': False,
-    'start_date': datetime(2024, 7, 21),
-    'email_on_failure': False,
-    'email_on_retry': False,
-    'retries': 1,
-    'retry_delay': timedelta(minutes=5),
-}
-
-dag = DAG(
-    'user_feedback_analysis',
-    default_args=default_args,
-    description='A DAG to analyze user feedback daily',
-    schedule_interval='@daily',  # Run daily
-)
-
-def run_sentiment_analysis(**kwargs):
-    """
-    Ensures the BigQuery table exists and performs sentiment analysis on a fixed number of rows.
-
-    Args:
-        **kwargs: Additional keyword arguments passed by Airflow.
-    """
-    # Ensure the table exists
-    create_table_if_not_exists()
-    
-    # Perform sentiment analysis on a fixed number of rows (e.g., 100)
-    perform_sentiment_analysis(limit=100)
-
-analyze_feedback = PythonOperator(
-    task_id='analyze_feedback',
-    python_callable=run_sentiment_analysis,
-    dag=dag,
-)
-
-analyze_feedback
\ No newline at end of file
+from airflow.decorators import dag, task
+from airflow.models.param import Param
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add the path to your project directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Project modules are imported inside the task callables: Airflow re-parses this
+# file every few seconds, and the SDKs behind them are only needed when a task runs.
+
+default_args = {
+    'owner': 'airflow',
+    'depends_on_past': False,
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=5),
+}
+
+
+@dag(
+    dag_id='user_feedback_analysis',
+    default_args=default_args,
+    description='A DAG to analyze user feedback daily',
+    schedule='@daily',  # Run daily
+    start_date=datetime(2024, 7, 21),
+    catchup=False,
+    max_active_runs=1,
+    params={
+        # Number of shards the backlog is split into; one mapped task scores each shard
+        'num_shards': Param(int(os.getenv('SENTIMENT_SHARDS', 4)), type='integer', minimum=1),
+    },
+)
+def user_feedback_analysis():
+    """
+    Scores the unscored feedback in parallel shards.
+
+    The backlog is split into shards by a fingerprint of the review Id and
+    every non-empty shard is scored by its own mapped task, so throughput
+    grows with the number of Airflow workers. A final task adds up the shard
+    summaries and checks the sentiment table.
+    """
+
+    @task
+    def count_backlog(params=None):
+        """
+        Ensures the tables exist and lists the shards that have unscored reviews.
+
+        Returns:
+            list: Keyword arguments of the score_shard task for each non-empty shard.
+        """
+        from src.database import setup_tables
+        from src.sentiment.pipeline import count_unprocessed_by_shard
+        from src.utils.logging import logger
+
+        setup_tables()
+        num_shards = params['num_shards']
+        backlog = count_unprocessed_by_shard(num_shards)
+        logger.info("Unscored reviews per shard: %s (%d in total)", backlog, sum(backlog.values()))
+        return [{'shard': shard, 'num_shards': num_shards} for shard in sorted(backlog)]
+
+    @task
+    def score_shard(shard, num_shards):
+        """
+        Scores the unscored reviews of one shard.
+
+        A retry resumes from the shard's checkpoint journal when it runs on the
+        same worker, so results paid for by the failed attempt are kept.
+
+        Returns:
+            dict: Counts of fetched, scored and inserted rows.
+        """
+        from src.sentiment.sentiment_analysis import perform_sentiment_analysis
+
+        return perform_sentiment_analysis(shard=shard, num_shards=num_shards, resume=True)
+
+    @task(trigger_rule='none_failed')
+    def merge_and_verify(summaries):
+        """
+        Adds up the shard summaries and checks the sentiment table.
+
+        Raises:
+            ValueError: If a review was scored more than once.
+        """
+        from src.sentiment.pipeline import merge_shard_summaries
+        from src.utils.logging import logger
+
+        summaries = list(summaries or [])
+        report = merge_shard_summaries(summaries)
+        logger.info("Scored %d reviews in %d shards: %s", report['scored'], len(summaries), report)
+        return report
+
+    merge_and_verify(score_shard.expand_kwargs(count_backlog()))
+
+
+user_feedback_analysis()
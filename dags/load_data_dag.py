@@ -1,55 +1,56 @@
-from airflow import DAG
-from airflow.providers.google.cloud.transfers.gcs_to_bigquery import GCSToBigQueryOperator
-from airflow.providers.google.cloud.operators.bigquery import BigQueryInsertJobOperator
+from airflow.decorators import dag, task
 from datetime import datetime, timedelta
+import sys
+import os
+
+# Add the path to your project directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Project modules are imported inside the task callables (see feedback_dag.py).
 
 default_args = {
     'owner': 'airflow',
     'depends_on_past': False,
-    'start_date': datetime(2023, 1, 1),
     'email_on_failure': False,
     'email_on_retry': False,
     'retries': 1,
     'retry_delay': timedelta(minutes=5),
 }
 
-dag = DAG(
-    'gcs_to_bigquery_append',
+
+@dag(
+    dag_id='gcs_to_bigquery_append',
     default_args=default_args,
-    description='A DAG to load data from GCS to BigQuery and append',
-    schedule_interval=timedelta(days=1),
+    description='A DAG to load new feedback files from GCS into BigQuery',
+    schedule=timedelta(days=1),
+    start_date=datetime(2023, 1, 1),
+    catchup=False,
+    max_active_runs=1,  # Runs share the staging table
 )
+def gcs_to_bigquery_append():
+    """
+    Loads the CSV files under BLOB_PREFIX that have not been loaded yet.
 
-# Task to load data from GCS to BigQuery
-load_gcs_to_bq = GCSToBigQueryOperator(
-    task_id='load_gcs_to_bq',
-    bucket='your_gcs_bucket',
-    source_objects=['path/to/your/file*.csv'],
-    destination_project_dataset_table='your_project.your_dataset.your_temp_table',
-    schema_fields=[
-        {'name': 'column1', 'type': 'STRING', 'mode': 'NULLABLE'},
-        {'name': 'column2', 'type': 'INTEGER', 'mode': 'NULLABLE'},
-        # Add more fields as per your schema
-    ],
-    write_disposition='WRITE_TRUNCATE',
-    source_format='CSV',
-    skip_leading_rows=1,
-    dag=dag,
-)
+    New objects (or new generations of overwritten ones) are loaded into the
+    staging table and merged into the feedback table on Id; the manifest table
+    records what was loaded, so every run only reads the files that arrived
+    since the last one.
+    """
+
+    @task
+    def load_new_files():
+        """
+        Loads the new CSV objects and merges them into the feedback table.
+
+        Returns:
+            dict: Number of new objects, staged rows and inserted rows.
+        """
+        from src.utils.config import config
+        from src.database import load_csv_incremental
+
+        return load_csv_incremental(config.BUCKET_NAME, config.BLOB_PREFIX, config.FEEDBACK_TABLE_NAME)
+
+    load_new_files()
 
-# Task to append data from temporary table to main table
-append_data = BigQueryInsertJobOperator(
-    task_id='append_data_to_main_table',
-    configuration={
-        'query': {
-            'query': """
-            INSERT INTO `your_project.your_dataset.your_main_table`
-            SELECT * FROM `your_project.your_dataset.your_temp_table`
-            """,
-            'useLegacySql': False,
-        }
-    },
-    dag=dag,
-)
 
-load_gcs_to_bq >> append_data
+gcs_to_bigquery_append()
@@ -1,10 +1,13 @@
 """
 This module handles the collection and processing of user feedback data.
 
-It includes functions for loading CSV data into BigQuery.
+It includes functions for loading CSV data into BigQuery. With
+config.INGEST_MODE set to "incremental", only the CSV objects under
+config.BLOB_PREFIX that have not been loaded before are merged into the
+feedback table; otherwise config.BLOB_NAME replaces its contents.
 """
 
-from src.database import load_csv_to_bigquery
+from src.database import load_csv_incremental, load_csv_to_bigquery
 from src.utils import config, Logger
 
 logger = Logger().logger
@@ -18,6 +21,13 @@ def main():
         # Assuming you have this in your config
         table_name = config.FEEDBACK_TABLE_NAME
 
+        if config.INGEST_MODE == "incremental":
+            summary = load_csv_incremental(bucket_name, config.BLOB_PREFIX, table_name)
+            logger.info(
+                f"Merged {summary['inserted']} new rows from {summary['objects']} objects under "
+                f"gs://{bucket_name}/{config.BLOB_PREFIX} into BigQuery table {table_name}.")
+            return summary
+
         # Load CSV to BigQuery
         load_csv_to_bigquery(bucket_name, blob_name, table_name)
         logger.info(
@@ -1,43 +1,53 @@
 # file: src/database/__init__.py
 
-from .connection import get_bigquery_client, get_storage_client, test_connections
-from .operations import (
-    # Data Loading Operations
-    load_csv_to_bigquery,
-    
-    # Table Operations
-    setup_tables,
-    setup_feedback_table,
-    setup_sentiment_table,
-    insert_rows,
-    
-    # Query Operations
-    get_data,
-    get_feedback_data,
-    get_sentiment_data,
-    get_joined_feedback_sentiment_data,
-    run_query
-)
-
-__all__ = [
+# The submodules are imported on first access of one of their names (PEP 562),
+# so importing the package, e.g. while Airflow parses a DAG file, stays cheap.
+
+import importlib
+
+_EXPORTS = {
     # Connection functions
-    'get_bigquery_client',
-    'get_storage_client',
-    'test_connections',
-    
+    'get_bigquery_client': 'connection',
+    'get_bigquery_storage_client': 'connection',
+    'get_storage_client': 'connection',
+    'test_connections': 'connection',
+
     # Data Loading Operations
-    'load_csv_to_bigquery',
-    
+    'load_csv_to_bigquery': 'operations',
+    'load_csv_incremental': 'operations',
+
     # Table Operations
-    'setup_tables',
-    'setup_feedback_table',
-    'setup_sentiment_table',
-    'insert_rows',
-    
+    'setup_tables': 'operations',
+    'setup_feedback_table': 'operations',
+    'setup_sentiment_table': 'operations',
+    'setup_state_table': 'operations',
+    'setup_manifest_table': 'operations',
+    'insert_rows': 'operations',
+
+    # Processing State
+    'get_watermark': 'operations',
+    'set_watermark': 'operations',
+
     # Query Operations
-    'get_data',
-    'get_feedback_data',
-    'get_sentiment_data',
-    'get_joined_feedback_sentiment_data',
-    'run_query'
-]
\ No newline at end of file
+    'get_data': 'operations',
+    'get_data_pages': 'operations',
+    'get_feedback_data': 'operations',
+    'get_sentiment_data': 'operations',
+    'get_joined_feedback_sentiment_data': 'operations',
+    'run_query': 'operations',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
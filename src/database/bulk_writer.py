@@ -0,0 +1,180 @@
+"""
+This module implements the bulk writer behind operations.insert_rows.
+
+Small and medium batches are sent as streaming inserts: rows are split into
+requests that stay under the API's row-count and byte-size limits, the
+requests are sent in parallel, and only the rows BigQuery rejected with a
+transient reason are retried. Every row gets a stable insert id so retries
+are de-duplicated by BigQuery. Large batches are written with a single load
+job from an in-memory newline-delimited JSON buffer, which is cheaper and
+faster than streaming inserts.
+"""
+
+# file: src/database/bulk_writer.py
+
+import io
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import Logger
+
+logger = Logger().logger
+
+bigquery = lazy_import("google.cloud.bigquery")
+
+# Error reasons for rows that were valid but not written, e.g. because another
+# row in the same request was invalid
+RETRYABLE_REASONS = {"stopped", "backendError", "internalError", "timeout", "rateLimitExceeded", "requestError"}
+
+# Per-row overhead of the insertAll request envelope (insertId and JSON framing)
+ROW_OVERHEAD_BYTES = 64
+
+
+def _row_size(row):
+    """Approximate serialized size of a row in an insertAll request."""
+    return len(json.dumps(row, default=str).encode("utf-8")) + ROW_OVERHEAD_BYTES
+
+
+def split_into_requests(indices, rows, max_rows, max_bytes):
+    """
+    Group row indices into requests bounded by row count and byte size.
+
+    Args:
+        indices (list): Indices of the rows to send.
+        rows (list): All rows, indexed by indices.
+        max_rows (int): Maximum number of rows per request.
+        max_bytes (int): Maximum serialized size of a request.
+
+    Returns:
+        list: A list of index lists, one per request.
+    """
+    requests = []
+    current, current_bytes = [], 0
+    for index in indices:
+        size = _row_size(rows[index])
+        if current and (len(current) >= max_rows or current_bytes + size > max_bytes):
+            requests.append(current)
+            current, current_bytes = [], 0
+        current.append(index)
+        current_bytes += size
+    if current:
+        requests.append(current)
+    return requests
+
+
+def _send_request(client, table_id, rows, row_ids, indices):
+    """
+    Send one insertAll request and map its errors back to row indices.
+
+    Returns:
+        list: (row index, errors) tuples for the rejected rows.
+    """
+    try:
+        errors = client.insert_rows_json(
+            table_id, [rows[i] for i in indices], row_ids=[row_ids[i] for i in indices])
+    except Exception as e:
+        # The whole request failed (e.g. timeout); every row may be retried
+        return [(i, [{"reason": "requestError", "message": str(e)}]) for i in indices]
+    return [(indices[error["index"]], error.get("errors", [])) for error in errors]
+
+
+def stream_rows(client, table_id, rows, max_rows=None, max_bytes=None, workers=None, max_retries=None):
+    """
+    Write rows with parallel streaming inserts, retrying only rejected rows.
+
+    Args:
+        client (google.cloud.bigquery.Client): BigQuery client.
+        table_id (str): Full ID of the destination table.
+        rows (list): List of dictionaries representing the rows to insert.
+        max_rows (int, optional): Rows per request. Defaults to config.BULK_INSERT_MAX_ROWS.
+        max_bytes (int, optional): Bytes per request. Defaults to config.BULK_INSERT_MAX_BYTES.
+        workers (int, optional): Requests sent in parallel. Defaults to config.BULK_INSERT_WORKERS.
+        max_retries (int, optional): Retries for transiently rejected rows.
+            Defaults to config.BULK_INSERT_MAX_RETRIES.
+
+    Returns:
+        list: (row index, errors) tuples for the rows that could not be written.
+    """
+    max_rows = max_rows or config.BULK_INSERT_MAX_ROWS
+    max_bytes = max_bytes or config.BULK_INSERT_MAX_BYTES
+    workers = workers or config.BULK_INSERT_WORKERS
+    max_retries = config.BULK_INSERT_MAX_RETRIES if max_retries is None else max_retries
+
+    row_ids = [str(uuid.uuid4()) for _ in rows]
+    pending = list(range(len(rows)))
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for attempt in range(max_retries + 1):
+            requests = split_into_requests(pending, rows, max_rows, max_bytes)
+            rejected = []
+            for errors in pool.map(lambda indices: _send_request(client, table_id, rows, row_ids, indices), requests):
+                rejected.extend(errors)
+
+            retryable = [(i, errors) for i, errors in rejected
+                         if errors and all(e.get("reason") in RETRYABLE_REASONS for e in errors)]
+            pending = sorted(i for i, _ in retryable)
+            retry_indices = set(pending)
+            failed.extend((i, errors) for i, errors in rejected if i not in retry_indices)
+            if not pending:
+                break
+            if attempt < max_retries:
+                logger.warning("Retrying %d rejected rows for %s (attempt %d)", len(pending), table_id, attempt + 1)
+                time.sleep(min(2 ** attempt, 30))
+        else:
+            failed.extend(retryable)
+
+    return failed
+
+
+def load_rows(client, table_id, rows):
+    """
+    Append rows to a table with a load job from an in-memory NDJSON buffer.
+
+    Args:
+        client (google.cloud.bigquery.Client): BigQuery client.
+        table_id (str): Full ID of the destination table.
+        rows (list): List of dictionaries representing the rows to insert.
+
+    Raises:
+        Exception: If the load job fails.
+    """
+    buffer = io.BytesIO()
+    for row in rows:
+        buffer.write(json.dumps(row, default=str).encode("utf-8"))
+        buffer.write(b"\n")
+    buffer.seek(0)
+
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+    load_job = client.load_table_from_file(buffer, table_id, job_config=job_config)
+    load_job.result()
+
+
+def write_rows(client, table_id, rows):
+    """
+    Write rows with a load job or streaming inserts depending on batch size.
+
+    Args:
+        client (google.cloud.bigquery.Client): BigQuery client.
+        table_id (str): Full ID of the destination table.
+        rows (list): List of dictionaries representing the rows to insert.
+
+    Returns:
+        list: (row index, errors) tuples for the rows that could not be written.
+            A failed load job reports every row.
+    """
+    if len(rows) >= config.BULK_LOAD_THRESHOLD:
+        try:
+            load_rows(client, table_id, rows)
+            return []
+        except Exception as e:
+            logger.error(f"Error loading rows into {table_id}: {str(e)}")
+            return [(i, [{"reason": "loadJobFailed", "message": str(e)}]) for i in range(len(rows))]
+    return stream_rows(client, table_id, rows)
@@ -1,12 +1,17 @@
 # file: src/database/connection.py
 
-from google.cloud import bigquery, storage
-from google.oauth2 import service_account
 from src.utils.config import config
+from src.utils.lazy import lazy_import
 from src.utils.logging import Logger
 
 logger = Logger().logger
 
+# The Google Cloud SDKs are only imported when the first client is created
+bigquery = lazy_import("google.cloud.bigquery")
+bigquery_storage = lazy_import("google.cloud.bigquery_storage")
+storage = lazy_import("google.cloud.storage")
+service_account = lazy_import("google.oauth2.service_account")
+
 class BigQueryConnection:
     _instance = None
 
@@ -43,12 +48,33 @@ class StorageConnection:
             logger.error(f"Error creating Storage client: {str(e)}")
             raise
 
+class BigQueryStorageConnection:
+    _instance = None
+
+    @classmethod
+    def get_client(cls):
+        if cls._instance is None:
+            cls._instance = cls._create_client()
+        return cls._instance
+
+    @staticmethod
+    def _create_client():
+        try:
+            credentials = service_account.Credentials.from_service_account_file(config.SERVICE_ACCOUNT_FILE)
+            return bigquery_storage.BigQueryReadClient(credentials=credentials)
+        except Exception as e:
+            logger.error(f"Error creating BigQuery Storage client: {str(e)}")
+            raise
+
 def get_bigquery_client():
     return BigQueryConnection.get_client()
 
 def get_storage_client():
     return StorageConnection.get_client()
 
+def get_bigquery_storage_client():
+    return BigQueryStorageConnection.get_client()
+
 def test_connections():
     try:
         bigquery_client = get_bigquery_client()
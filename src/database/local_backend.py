@@ -0,0 +1,351 @@
+"""
+This module implements an embedded SQLite storage backend.
+
+It mirrors the load, setup, insert, query and processing state operations of
+operations.py against a local database file, so the ingest, score and query
+pipeline can run at local-disk speed without BigQuery (for development, CI
+and offline profiling). It is selected with STORAGE_BACKEND=sqlite.
+
+Tables keep their fully qualified BigQuery names (e.g. `project.dataset.table`);
+SQLite accepts the backtick-quoted identifiers used throughout operations.py,
+so the same SELECT queries run unchanged on both backends. The BigQuery
+functions used to shard the backlog (FARM_FINGERPRINT and an integer MOD)
+are registered on every connection.
+"""
+
+# file: src/database/local_backend.py
+
+import csv
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import Logger
+
+logger = Logger().logger
+
+pa = lazy_import("pyarrow")
+
+SQLITE_TYPES = {
+    "STRING": "TEXT",
+    "FLOAT": "REAL",
+    "FLOAT64": "REAL",
+    "INTEGER": "INTEGER",
+    "INT64": "INTEGER",
+    "BOOLEAN": "INTEGER",
+    "BOOL": "INTEGER",
+    "TIMESTAMP": "TEXT",
+}
+
+
+def _farm_fingerprint(value):
+    """Stable signed 64-bit hash standing in for BigQuery's FARM_FINGERPRINT."""
+    if value is None:
+        return None
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _mod(dividend, divisor):
+    """Integer MOD with BigQuery semantics: the result has the sign of the dividend."""
+    if dividend is None or divisor is None:
+        return None
+    remainder = abs(dividend) % abs(divisor)
+    return remainder if dividend >= 0 else -remainder
+
+
+def _connect(path):
+    """Open a connection to the local database with the BigQuery functions registered."""
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.create_function("FARM_FINGERPRINT", 1, _farm_fingerprint, deterministic=True)
+    # SQLite's built-in MOD works on doubles, which lose the low bits of 64-bit hashes
+    conn.create_function("MOD", 2, _mod, deterministic=True)
+    return conn
+
+
+class LocalDatabaseConnection:
+    _instance = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_connection(cls):
+        if cls._instance is None:
+            cls._instance = cls._create_connection()
+        return cls._instance
+
+    @staticmethod
+    def _create_connection():
+        try:
+            path = Path(config.LOCAL_DB_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = _connect(path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            return conn
+        except Exception as e:
+            logger.error(f"Error opening local database: {str(e)}")
+            raise
+
+
+def get_local_connection():
+    return LocalDatabaseConnection.get_connection()
+
+
+def _quote(identifier):
+    return "`" + identifier.replace("`", "``") + "`"
+
+
+def _field(field):
+    """Return (name, type, mode) for a bigquery.SchemaField or schema dictionary."""
+    if isinstance(field, dict):
+        return field["name"], field["type"], field.get("mode", "NULLABLE")
+    return field.name, field.field_type, field.mode
+
+
+def table_exists(table_id):
+    """
+    Check whether a table exists in the local database.
+
+    Args:
+        table_id (str): Full ID of the table.
+
+    Returns:
+        bool: True if the table exists.
+    """
+    row = get_local_connection().execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_id,)).fetchone()
+    return row is not None
+
+
+def create_table_if_not_exists(table_id, schema):
+    """
+    Create a local table if it doesn't already exist.
+
+    Args:
+        table_id (str): Full ID of the table.
+        schema (list): SchemaField objects or schema dictionaries.
+    """
+    columns = []
+    for field in schema:
+        name, field_type, mode = _field(field)
+        column = f"{_quote(name)} {SQLITE_TYPES.get(field_type.upper(), 'TEXT')}"
+        if mode == "REQUIRED":
+            column += " NOT NULL"
+        columns.append(column)
+
+    conn = get_local_connection()
+    with LocalDatabaseConnection._lock:
+        if table_exists(table_id):
+            logger.info(f"Table {table_id} already exists.")
+            return
+        conn.execute(f"CREATE TABLE {_quote(table_id)} ({', '.join(columns)})")
+        conn.commit()
+    logger.info(f"Created table {table_id}")
+
+
+def load_csv(path, table_id, write_disposition="WRITE_TRUNCATE"):
+    """
+    Load a local CSV file into a table.
+
+    Columns are taken from the header row. The table is created if needed.
+
+    Args:
+        path (str or Path): Location of the CSV file.
+        table_id (str): Full ID of the destination table.
+        write_disposition (str, optional): WRITE_TRUNCATE replaces the table
+            contents, WRITE_APPEND adds to them. Defaults to "WRITE_TRUNCATE".
+
+    Returns:
+        int: Number of rows in the table after loading.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        create_table_if_not_exists(table_id, [{"name": name, "type": "STRING"} for name in header])
+
+        conn = get_local_connection()
+        with LocalDatabaseConnection._lock:
+            if write_disposition == "WRITE_TRUNCATE":
+                conn.execute(f"DELETE FROM {_quote(table_id)}")
+            placeholders = ", ".join("?" * len(header))
+            columns = ", ".join(_quote(name) for name in header)
+            conn.executemany(f"INSERT INTO {_quote(table_id)} ({columns}) VALUES ({placeholders})", reader)
+            conn.commit()
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {_quote(table_id)}").fetchone()
+    return count
+
+
+def list_csv_files(prefix):
+    """
+    List the CSV files under config.LOCAL_DATA_DIR whose relative path starts with a prefix.
+
+    The modification time stands in for the GCS object generation, so a
+    rewritten file counts as a new object.
+
+    Args:
+        prefix (str): Prefix of the relative paths, e.g. "exports/feedback_".
+
+    Returns:
+        list: (relative path, generation) tuples, sorted by path.
+    """
+    data_dir = Path(config.LOCAL_DATA_DIR)
+    files = []
+    for path in data_dir.rglob("*.csv"):
+        name = path.relative_to(data_dir).as_posix()
+        if name.startswith(prefix or ""):
+            files.append((name, path.stat().st_mtime_ns))
+    return sorted(files)
+
+
+def merge_new_rows(target_id, source_id, key, columns):
+    """
+    Insert the rows of a staging table whose key is not in the target table yet.
+
+    Mirrors the BigQuery MERGE of operations.merge_staging_table(); when the
+    staging table holds the same key more than once, only one row is inserted.
+
+    Args:
+        target_id (str): Full ID of the target table.
+        source_id (str): Full ID of the staging table.
+        key (str): Name of the key column.
+        columns (list): Names of the columns to copy.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    column_list = ", ".join(_quote(column) for column in columns)
+    conn = get_local_connection()
+    with LocalDatabaseConnection._lock:
+        cursor = conn.execute(f"""
+            INSERT INTO {_quote(target_id)} ({column_list})
+            SELECT {column_list} FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY {_quote(key)}) AS _row FROM {_quote(source_id)}
+            )
+            WHERE _row = 1 AND {_quote(key)} NOT IN (SELECT {_quote(key)} FROM {_quote(target_id)})
+        """)
+        conn.commit()
+    return cursor.rowcount
+
+
+def insert_rows(table_id, rows):
+    """
+    Insert rows into a local table.
+
+    Args:
+        table_id (str): Full ID of the table.
+        rows (list): List of dictionaries representing the rows to insert.
+
+    Returns:
+        list: Errors in the format returned by BigQuery's insert_rows_json;
+            empty on success.
+    """
+    if not rows:
+        return []
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    placeholders = ", ".join("?" * len(columns))
+    statement = (f"INSERT INTO {_quote(table_id)} ({', '.join(_quote(c) for c in columns)}) "
+                 f"VALUES ({placeholders})")
+
+    conn = get_local_connection()
+    with LocalDatabaseConnection._lock:
+        try:
+            conn.executemany(statement, [[row.get(c) for c in columns] for row in rows])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            return [{"index": i, "errors": [{"reason": "invalid", "message": str(e)}]} for i in range(len(rows))]
+    return []
+
+
+def _fetch_all(query):
+    """Run a query on the shared connection and return a list of dictionaries."""
+    with LocalDatabaseConnection._lock:
+        cursor = get_local_connection().execute(query)
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _iter_batches(query, batch_size):
+    """
+    Yield the results of a query as lists of dictionaries, batch_size rows at a time.
+
+    A dedicated connection is used so the reader sees a consistent snapshot
+    while other threads write through the shared connection. The generator
+    may be advanced from different threads (the pipeline prefetches pages in
+    worker threads), but never from two at once.
+    """
+    conn = _connect(config.LOCAL_DB_PATH)
+    try:
+        cursor = conn.execute(query)
+        columns = [description[0] for description in cursor.description]
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            yield [dict(zip(columns, row)) for row in batch]
+    finally:
+        conn.close()
+
+
+def execute_query(query, result_mode="dicts", page_size=None):
+    """
+    Execute a SQL query against the local database.
+
+    Args:
+        query (str): The SQL query to execute.
+        result_mode (str, optional): One of operations.RESULT_MODES. Defaults to "dicts".
+        page_size (int, optional): Number of rows per page for the "pages" mode.
+
+    Returns:
+        list, iterator, pyarrow.Table or pandas.DataFrame: The query results
+            in the requested form.
+    """
+    if result_mode == "pages":
+        return _iter_batches(query, page_size or config.SENTIMENT_BATCH_SIZE)
+    if result_mode == "rows":
+        return (row for batch in _iter_batches(query, 1000) for row in batch)
+
+    rows = _fetch_all(query)
+    if result_mode in ("arrow", "dataframe"):
+        table = pa.Table.from_pylist(rows)
+        return table if result_mode == "arrow" else table.to_pandas()
+    return rows
+
+
+def get_watermark(table_id, pipeline):
+    """
+    Get the stored watermark of a pipeline.
+
+    Args:
+        table_id (str): Full ID of the processing state table.
+        pipeline (str): Name of the pipeline.
+
+    Returns:
+        str: The last processed value, or None if there is none.
+    """
+    if not table_exists(table_id):
+        return None
+    with LocalDatabaseConnection._lock:
+        row = get_local_connection().execute(
+            f"SELECT Watermark FROM {_quote(table_id)} WHERE Pipeline = ?", (pipeline,)).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(table_id, pipeline, watermark):
+    """
+    Store the watermark of a pipeline.
+
+    Args:
+        table_id (str): Full ID of the processing state table.
+        pipeline (str): Name of the pipeline.
+        watermark (str): The last processed value.
+    """
+    conn = get_local_connection()
+    with LocalDatabaseConnection._lock:
+        conn.execute(f"DELETE FROM {_quote(table_id)} WHERE Pipeline = ?", (pipeline,))
+        conn.execute(
+            f"INSERT INTO {_quote(table_id)} (Pipeline, Watermark, UpdatedAt) VALUES (?, ?, datetime('now'))",
+            (pipeline, watermark))
+        conn.commit()
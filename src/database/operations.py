@@ -5,19 +5,37 @@ It provides functions for loading data, setting up tables, inserting rows,
 and querying data from BigQuery tables. The module is designed to work with
 feedback and sentiment analysis data.
 
+With config.STORAGE_BACKEND set to "sqlite" the same functions run against the
+embedded local database in src/database/local_backend.py instead of BigQuery.
+
 Functions:
+    - Backend Selection:
+        - use_local_backend
     - Data Loading:
         - get_job_config
         - load_csv_to_bigquery
+        - list_new_csv_objects
+        - merge_staging_table
+        - load_csv_incremental
     - Table Operations:
         - create_table_if_not_exists
         - setup_feedback_table
         - setup_sentiment_table
+        - setup_state_table
+        - setup_manifest_table
         - setup_tables
         - insert_rows
+    - Processing State:
+        - get_watermark
+        - set_watermark
     - Query Operations:
         - execute_query
+        - execute_query_rows
+        - execute_query_pages
+        - sql_string_literal
+        - build_select_query
         - get_data
+        - get_data_pages
         - get_feedback_data
         - get_sentiment_data
         - get_joined_feedback_sentiment_data
@@ -26,22 +44,56 @@ Functions:
 
 # file: src/database/operations.py
 
-from google.cloud import bigquery
-from google.api_core import exceptions
+from datetime import datetime, timezone
+
 from src.utils.config import config
+from src.utils.lazy import lazy_import
 from src.utils.logging import Logger
-from src.database.connection import get_bigquery_client, get_storage_client
+from src.utils import metrics
+from src.database.connection import get_bigquery_client, get_bigquery_storage_client, get_storage_client
+from src.database.bulk_writer import write_rows
+from src.database.query_cache import get_query_cache
+from src.database import local_backend
 
 logger = Logger().logger
 
+bigquery = lazy_import("google.cloud.bigquery")
+exceptions = lazy_import("google.api_core.exceptions")
+
+# Result modes supported by execute_query:
+#   dicts     - list of dictionaries (default)
+#   rows      - lazy iterator of dictionaries
+#   pages     - lazy iterator of lists of dictionaries
+#   arrow     - pyarrow.Table
+#   dataframe - pandas.DataFrame
+RESULT_MODES = ("dicts", "rows", "pages", "arrow", "dataframe")
+
+# Materialized result modes that can be served from the query result cache
+CACHEABLE_RESULT_MODES = ("dicts", "arrow", "dataframe")
+
+# Backend Selection
+
+def use_local_backend():
+    """
+    Check whether the embedded local backend is selected.
+
+    Returns:
+        bool: True if config.STORAGE_BACKEND is "sqlite".
+    """
+    return config.STORAGE_BACKEND == "sqlite"
+
 # Data Loading Operations
 
-def get_job_config(num_rows=None):
+def get_job_config(num_rows=None, write_disposition="WRITE_TRUNCATE", schema=None):
     """
     Create a job configuration for loading CSV data into BigQuery.
 
     Args:
         num_rows (int, optional): Maximum number of bad records allowed. Defaults to None.
+        write_disposition (str, optional): "WRITE_TRUNCATE" replaces the table
+            contents, "WRITE_APPEND" adds to them. Defaults to "WRITE_TRUNCATE".
+        schema (list, optional): Schema of the loaded columns. The schema is
+            autodetected if not given. Defaults to None.
 
     Returns:
         google.cloud.bigquery.job.LoadJobConfig: Job configuration for data loading.
@@ -50,9 +102,11 @@ def get_job_config(num_rows=None):
     job_config = bigquery.LoadJobConfig(
         source_format=bigquery.SourceFormat.CSV,
         skip_leading_rows=1,
-        autodetect=True,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        autodetect=schema is None,
+        write_disposition=write_disposition,
     )
+    if schema is not None:
+        job_config.schema = schema
     if num_rows:
         job_config.max_bad_records = num_rows
     return job_config
@@ -71,21 +125,172 @@ def load_csv_to_bigquery(bucket_name, blob_name, table_name, num_rows=None):
         Exception: If there's an error during the loading process.
     """
 
-    client = get_bigquery_client()
-    try:
-        table_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}"
-        uri = f"gs://{bucket_name}/{blob_name}"
-        job_config = get_job_config(num_rows)
+    with metrics.timed(metrics.LOAD_SECONDS, "bigquery.load_csv", table=table_name) as span:
+        if use_local_backend():
+            table_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}"
+            path = f"{config.LOCAL_DATA_DIR}/{blob_name}"
+            num_loaded = local_backend.load_csv(path, table_id)
+            metrics.ROWS_LOADED.labels(table=table_name).inc(num_loaded)
+            metrics.set_span_attribute(span, "rows", num_loaded)
+            logger.info(f"Loaded {num_loaded} rows from {path} into local table {table_id}")
+            return
+
+        client = get_bigquery_client()
+        try:
+            table_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}"
+            uri = f"gs://{bucket_name}/{blob_name}"
+            job_config = get_job_config(num_rows)
+
+            load_job = client.load_table_from_uri(uri, table_id, job_config=job_config)
+            load_job.result()
+
+            destination_table = client.get_table(table_id)
+            metrics.ROWS_LOADED.labels(table=table_name).inc(destination_table.num_rows or 0)
+            metrics.set_span_attribute(span, "rows", destination_table.num_rows or 0)
+            logger.info(f"Loaded {destination_table.num_rows} rows into {table_id}")
+        except Exception as e:
+            logger.error(f"Error in load_csv_to_bigquery: {str(e)}")
+            raise
+
+def list_new_csv_objects(bucket_name, prefix):
+    """
+    List the CSV objects under a prefix that are not in the load manifest yet.
+
+    An object counts as new if its name or its generation is not in the
+    manifest, so an overwritten object is loaded again.
+
+    Args:
+        bucket_name (str): Name of the GCS bucket. Ignored by the local backend,
+            which lists config.LOCAL_DATA_DIR instead.
+        prefix (str): Prefix of the object names.
+
+    Returns:
+        list: (object name, generation) tuples, sorted by name.
+    """
+    if use_local_backend():
+        objects = local_backend.list_csv_files(prefix)
+    else:
+        objects = sorted((blob.name, blob.generation)
+                         for blob in get_storage_client().list_blobs(bucket_name, prefix=prefix)
+                         if blob.name.endswith(".csv"))
+
+    manifest = execute_query(
+        f"SELECT Object, Generation FROM `{config.PROJECT_ID}.{config.DATASET_NAME}.{config.MANIFEST_TABLE_NAME}`",
+        use_cache=False)
+    loaded = {(row['Object'], int(row['Generation'])) for row in manifest}
+    return [(name, generation) for name, generation in objects if (name, int(generation)) not in loaded]
 
-        load_job = client.load_table_from_uri(uri, table_id, job_config=job_config)
-        load_job.result()
+def merge_staging_table(staging_table_name, table_name):
+    """
+    Insert the rows of a staging table whose Id is not in the target table yet.
+
+    Rows already in the target table are left untouched, and an Id that
+    appears more than once in the staging table is inserted only once, so
+    loading the same file twice does not duplicate reviews.
+
+    Args:
+        staging_table_name (str): Name of the staging table.
+        table_name (str): Name of the target table.
+
+    Returns:
+        int: Number of rows inserted into the target table.
 
-        destination_table = client.get_table(table_id)
-        logger.info(f"Loaded {destination_table.num_rows} rows into {table_id}")
+    Raises:
+        Exception: If there's an error while running the MERGE.
+    """
+    columns = [field['name'] for field in config.FEEDBACK_SCHEMA]
+    source_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{staging_table_name}"
+    target_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}"
+    if use_local_backend():
+        return local_backend.merge_new_rows(target_id, source_id, "Id", columns)
+
+    query = f"""
+    MERGE `{target_id}` T
+    USING (
+      SELECT * EXCEPT(_row) FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY Id) AS _row FROM `{source_id}`
+      )
+      WHERE _row = 1
+    ) S
+    ON T.Id = S.Id
+    WHEN NOT MATCHED THEN
+      INSERT ({", ".join(columns)}) VALUES ({", ".join("S." + column for column in columns)})
+    """
+    try:
+        job = get_bigquery_client().query(query)
+        job.result()
+        return job.num_dml_affected_rows or 0
     except Exception as e:
-        logger.error(f"Error in load_csv_to_bigquery: {str(e)}")
+        logger.error(f"Error in merge_staging_table: {str(e)}")
         raise
 
+def load_csv_incremental(bucket_name, prefix, table_name, num_rows=None):
+    """
+    Load the CSV objects under a prefix that have not been loaded yet.
+
+    New objects are loaded together into the staging table
+    (config.TEMP_TABLE_NAME), which is overwritten, and merged into the target
+    table on Id. The objects are then recorded with their generation in the
+    manifest table (config.MANIFEST_TABLE_NAME). If a run fails after the
+    merge, the next run loads the same objects again and the merge skips the
+    rows that are already there.
+
+    Args:
+        bucket_name (str): Name of the GCS bucket containing the CSV files.
+        prefix (str): Prefix of the CSV object names.
+        table_name (str): Name of the BigQuery table to load data into.
+        num_rows (int, optional): Maximum number of bad records allowed. Defaults to None.
+
+    Returns:
+        dict: Number of new objects ('objects'), of rows loaded into the
+            staging table ('staged') and of rows inserted into the target table ('inserted').
+
+    Raises:
+        ValueError: If config.TEMP_TABLE_NAME is not set.
+        Exception: If there's an error during the loading process.
+    """
+
+    if not config.TEMP_TABLE_NAME:
+        raise ValueError("TEMP_TABLE_NAME must be set to load CSV objects incrementally.")
+
+    with metrics.timed(metrics.LOAD_SECONDS, "bigquery.load_csv_incremental", table=table_name) as span:
+        try:
+            setup_manifest_table()
+            create_table_if_not_exists(f"{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}", config.FEEDBACK_SCHEMA)
+            objects = list_new_csv_objects(bucket_name, prefix)
+            if not objects:
+                logger.info(f"No new CSV objects under {prefix!r} to load into {table_name}")
+                return {'objects': 0, 'staged': 0, 'inserted': 0}
+
+            staging_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{config.TEMP_TABLE_NAME}"
+            if use_local_backend():
+                staged = 0
+                for index, (name, _) in enumerate(objects):
+                    staged = local_backend.load_csv(f"{config.LOCAL_DATA_DIR}/{name}", staging_id,
+                                                    "WRITE_TRUNCATE" if index == 0 else "WRITE_APPEND")
+            else:
+                client = get_bigquery_client()
+                uris = [f"gs://{bucket_name}/{name}" for name, _ in objects]
+                job_config = get_job_config(num_rows, "WRITE_TRUNCATE", schema=config.FEEDBACK_SCHEMA)
+                client.load_table_from_uri(uris, staging_id, job_config=job_config).result()
+                staged = client.get_table(staging_id).num_rows or 0
+
+            inserted = merge_staging_table(config.TEMP_TABLE_NAME, table_name)
+            loaded_at = datetime.now(timezone.utc).isoformat()
+            if not insert_rows(config.MANIFEST_TABLE_NAME, [
+                    {'Object': name, 'Generation': int(generation), 'LoadedAt': loaded_at}
+                    for name, generation in objects]):
+                raise RuntimeError("Failed to record the loaded objects in the manifest.")
+
+            metrics.ROWS_LOADED.labels(table=table_name).inc(inserted)
+            metrics.set_span_attribute(span, "rows", inserted)
+            logger.info(f"Loaded {len(objects)} new objects ({staged} rows) into {staging_id} "
+                        f"and merged {inserted} new rows into {table_name}")
+            return {'objects': len(objects), 'staged': staged, 'inserted': inserted}
+        except Exception as e:
+            logger.error(f"Error in load_csv_incremental: {str(e)}")
+            raise
+
 # Table Operations
 
 def create_table_if_not_exists(table_id, schema):
@@ -100,6 +305,9 @@ def create_table_if_not_exists(table_id, schema):
         Exception: If there's an error during table creation.
     """
 
+    if use_local_backend():
+        return local_backend.create_table_if_not_exists(table_id, schema)
+
     client = get_bigquery_client()
     try:
         table = bigquery.Table(table_id, schema=schema)
@@ -145,11 +353,42 @@ def setup_sentiment_table():
     ]
     create_table_if_not_exists(table_id, schema)
 
+def setup_state_table():
+    """
+    Set up the processing state table in BigQuery.
+
+    This function creates the table holding per-pipeline watermarks if it doesn't exist.
+    """
+
+    table_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{config.STATE_TABLE_NAME}"
+    schema = [
+        bigquery.SchemaField("Pipeline", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("Watermark", "STRING", mode="NULLABLE"),
+        bigquery.SchemaField("UpdatedAt", "TIMESTAMP", mode="REQUIRED"),
+    ]
+    create_table_if_not_exists(table_id, schema)
+
+def setup_manifest_table():
+    """
+    Set up the load manifest table in BigQuery.
+
+    This function creates the table recording the objects loaded by
+    load_csv_incremental if it doesn't exist.
+    """
+
+    table_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{config.MANIFEST_TABLE_NAME}"
+    schema = [
+        bigquery.SchemaField("Object", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("Generation", "INTEGER", mode="REQUIRED"),
+        bigquery.SchemaField("LoadedAt", "TIMESTAMP", mode="REQUIRED"),
+    ]
+    create_table_if_not_exists(table_id, schema)
+
 def setup_tables():
     """
     Set up all required tables in BigQuery.
 
-    This function sets up both the feedback and sentiment tables.
+    This function sets up the feedback, sentiment and processing state tables.
 
     Raises:
         Exception: If there's an error during table setup.
@@ -158,6 +397,7 @@ def setup_tables():
     try:
         setup_feedback_table()
         setup_sentiment_table()
+        setup_state_table()
         logger.info("All tables have been set up successfully.")
     except Exception as e:
         logger.error(f"Error in setup_tables: {str(e)}")
@@ -167,6 +407,11 @@ def insert_rows(table_name, rows):
     """
     Insert rows into a BigQuery table.
 
+    Rows are written by the bulk writer: batches of at least
+    config.BULK_LOAD_THRESHOLD rows use a load job, smaller batches are split
+    into size-bounded streaming inserts sent in parallel, and only rejected
+    rows are retried.
+
     Args:
         table_name (str): Name of the BigQuery table to insert rows into.
         rows (list): List of dictionaries representing the rows to insert.
@@ -175,101 +420,391 @@ def insert_rows(table_name, rows):
         bool: True if insertion was successful, False otherwise.
     """
 
-    
+    if not rows:
+        return True
 
-    client = get_bigquery_client()
     table_id = f"{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}"
-    errors = client.insert_rows_json(table_id, rows)
+    with metrics.timed(metrics.INSERT_SECONDS, "bigquery.insert_rows", table=table_name) as span:
+        if use_local_backend():
+            errors = local_backend.insert_rows(table_id, rows)
+        else:
+            errors = write_rows(get_bigquery_client(), table_id, rows)
+        metrics.set_span_attribute(span, "rows", len(rows))
+    metrics.ROWS_INSERTED.labels(table=table_name).inc(max(0, len(rows) - len(errors)))
     if errors:
-        logger.error(f"Errors inserting rows: {errors}")
+        metrics.INSERT_ERRORS.labels(table=table_name).inc(len(errors))
+        logger.error(f"Errors inserting {len(errors)} of {len(rows)} rows: {errors[:10]}")
         return False
     else:
         logger.info(f"Inserted {len(rows)} rows into {table_id}")
         return True
 
+# Processing State
+
+def get_watermark(pipeline):
+    """
+    Get the stored watermark of a pipeline.
+
+    Args:
+        pipeline (str): Name of the pipeline.
+
+    Returns:
+        str: The last processed value, or None if the pipeline has no watermark yet.
+    """
+    if use_local_backend():
+        return local_backend.get_watermark(
+            f"{config.PROJECT_ID}.{config.DATASET_NAME}.{config.STATE_TABLE_NAME}", pipeline)
+
+    client = get_bigquery_client()
+    table_id = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.STATE_TABLE_NAME}`"
+    query = f"SELECT Watermark FROM {table_id} WHERE Pipeline = @pipeline LIMIT 1"
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ScalarQueryParameter("pipeline", "STRING", pipeline)])
+    try:
+        rows = list(client.query(query, job_config=job_config).result())
+    except exceptions.NotFound:
+        return None
+    except Exception as e:
+        logger.error(f"Error in get_watermark: {str(e)}")
+        raise
+    return rows[0]["Watermark"] if rows else None
+
+def set_watermark(pipeline, watermark):
+    """
+    Store the watermark of a pipeline.
+
+    Args:
+        pipeline (str): Name of the pipeline.
+        watermark (str): The last processed value.
+
+    Raises:
+        Exception: If there's an error while updating the state table.
+    """
+    if use_local_backend():
+        return local_backend.set_watermark(
+            f"{config.PROJECT_ID}.{config.DATASET_NAME}.{config.STATE_TABLE_NAME}", pipeline, watermark)
+
+    client = get_bigquery_client()
+    table_id = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.STATE_TABLE_NAME}`"
+    query = f"""
+    MERGE {table_id} T
+    USING (SELECT @pipeline AS Pipeline, @watermark AS Watermark) S
+    ON T.Pipeline = S.Pipeline
+    WHEN MATCHED THEN
+      UPDATE SET Watermark = S.Watermark, UpdatedAt = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN
+      INSERT (Pipeline, Watermark, UpdatedAt) VALUES (S.Pipeline, S.Watermark, CURRENT_TIMESTAMP())
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("pipeline", "STRING", pipeline),
+        bigquery.ScalarQueryParameter("watermark", "STRING", watermark),
+    ])
+    try:
+        client.query(query, job_config=job_config).result()
+        logger.info(f"Watermark of {pipeline} set to {watermark}")
+    except Exception as e:
+        logger.error(f"Error in set_watermark: {str(e)}")
+        raise
+
 # Query Operations
 
-def execute_query(query):
+def execute_query(query, result_mode="dicts", page_size=None, use_cache=None):
     """
     Execute a BigQuery SQL query.
 
+    The 'arrow' and 'dataframe' modes, as well as the lazy 'rows' iterator,
+    download results through the BigQuery Storage Read API when the result
+    is large enough to benefit from it.
+
+    Materialized results ('dicts', 'arrow' and 'dataframe') can be served from
+    the local query result cache, which is keyed on the normalized SQL and the
+    last modification of every referenced table.
+
     Args:
         query (str): The SQL query to execute.
+        result_mode (str, optional): One of RESULT_MODES. Defaults to "dicts".
+        page_size (int, optional): Number of rows per page for the "pages" mode.
+        use_cache (bool, optional): Read and fill the query result cache.
+            Defaults to config.QUERY_CACHE_ENABLED.
 
     Returns:
-        list: A list of dictionaries representing the query results.
+        list, iterator, pyarrow.Table or pandas.DataFrame: The query results
+            in the requested form. "dicts" returns a list of dictionaries.
 
     Raises:
+        ValueError: If result_mode is not supported.
         Exception: If there's an error during query execution.
     """
+    if result_mode not in RESULT_MODES:
+        raise ValueError(f"Unsupported result mode: {result_mode}")
+    if result_mode == "rows":
+        return execute_query_rows(query)
+    if result_mode == "pages":
+        return execute_query_pages(query, page_size)
+
+    with metrics.timed(metrics.QUERY_SECONDS, "bigquery.query", mode=result_mode) as span:
+        results = _execute_query_materialized(query, result_mode, use_cache)
+        num_rows = len(results)
+        metrics.set_span_attribute(span, "rows", num_rows)
+    metrics.ROWS_FETCHED.labels(mode=result_mode).inc(num_rows)
+    return results
+
+def _execute_query_materialized(query, result_mode, use_cache):
+    """
+    Execute a query and materialize its results.
+
+    Args:
+        query (str): The SQL query to execute.
+        result_mode (str): One of CACHEABLE_RESULT_MODES.
+        use_cache (bool): Read and fill the query result cache, or None for
+            config.QUERY_CACHE_ENABLED.
+
+    Returns:
+        list, pyarrow.Table or pandas.DataFrame: The query results in the requested form.
+    """
+    if use_local_backend():
+        return local_backend.execute_query(query, result_mode)
+
+    use_cache = config.QUERY_CACHE_ENABLED if use_cache is None else use_cache
     client = get_bigquery_client()
     try:
+        if use_cache and result_mode in CACHEABLE_RESULT_MODES:
+            return _execute_query_cached(client, query, result_mode)
+
         query_job = client.query(query)
         results = query_job.result()
+        if result_mode == "arrow":
+            return results.to_arrow(bqstorage_client=get_bigquery_storage_client())
+        if result_mode == "dataframe":
+            return results.to_dataframe(bqstorage_client=get_bigquery_storage_client())
         return [dict(row) for row in results]
     except Exception as e:
         logger.error(f"Error executing query: {str(e)}")
         raise
 
-def get_data(table_name, limit=None, where_clause=None):
+def _execute_query_cached(client, query, result_mode):
     """
-    Retrieve data from a specified BigQuery table.
+    Execute a query through the query result cache.
+
+    Args:
+        client (google.cloud.bigquery.Client): BigQuery client.
+        query (str): The SQL query to execute.
+        result_mode (str): One of CACHEABLE_RESULT_MODES.
+
+    Returns:
+        list, pyarrow.Table or pandas.DataFrame: The query results in the requested form.
+    """
+    cache = get_query_cache()
+    key = cache.make_key(client, query)
+    table = cache.get(key) if key else None
+
+    if table is None:
+        results = client.query(query).result()
+        table = results.to_arrow(bqstorage_client=get_bigquery_storage_client())
+        if key:
+            cache.put(key, table)
+    else:
+        logger.info(f"Query result served from cache ({table.num_rows} rows)")
+
+    if result_mode == "arrow":
+        return table
+    if result_mode == "dataframe":
+        return table.to_pandas()
+    return table.to_pylist()
+
+def execute_query_rows(query):
+    """
+    Execute a BigQuery SQL query and yield the result rows lazily.
+
+    Rows are streamed as Arrow record batches, so only one batch is held in
+    memory at any time.
+
+    Args:
+        query (str): The SQL query to execute.
+
+    Yields:
+        dict: One dictionary per result row.
+
+    Raises:
+        Exception: If there's an error during query execution.
+    """
+    rows_fetched = metrics.ROWS_FETCHED.labels(mode="rows")
+    if use_local_backend():
+        for row in local_backend.execute_query(query, "rows"):
+            rows_fetched.inc()
+            yield row
+        return
+
+    client = get_bigquery_client()
+    try:
+        with metrics.timed(metrics.QUERY_SECONDS, "bigquery.query", mode="rows"):
+            query_job = client.query(query)
+            results = query_job.result()
+        for batch in results.to_arrow_iterable(bqstorage_client=get_bigquery_storage_client()):
+            rows = batch.to_pylist()
+            rows_fetched.inc(len(rows))
+            yield from rows
+    except Exception as e:
+        logger.error(f"Error executing query: {str(e)}")
+        raise
+
+def execute_query_pages(query, page_size=None):
+    """
+    Execute a BigQuery SQL query and yield the results one page at a time.
+
+    Only a single page of rows is held in memory at any time.
+
+    Args:
+        query (str): The SQL query to execute.
+        page_size (int, optional): Number of rows per page. Defaults to config.SENTIMENT_BATCH_SIZE.
+
+    Yields:
+        list: A list of dictionaries for each page of results.
+
+    Raises:
+        Exception: If there's an error during query execution.
+    """
+    rows_fetched = metrics.ROWS_FETCHED.labels(mode="pages")
+    if use_local_backend():
+        for page in local_backend.execute_query(query, "pages", page_size):
+            rows_fetched.inc(len(page))
+            yield page
+        return
+
+    client = get_bigquery_client()
+    try:
+        with metrics.timed(metrics.QUERY_SECONDS, "bigquery.query", mode="pages"):
+            query_job = client.query(query)
+            results = query_job.result(page_size=page_size or config.SENTIMENT_BATCH_SIZE)
+        for page in results.pages:
+            rows = [dict(row) for row in page]
+            rows_fetched.inc(len(rows))
+            yield rows
+    except Exception as e:
+        logger.error(f"Error executing query: {str(e)}")
+        raise
+
+def sql_string_literal(value):
+    """
+    Quote a value as a string literal for the selected backend.
+
+    Args:
+        value: The value to quote.
+
+    Returns:
+        str: The escaped, single-quoted literal.
+    """
+    if use_local_backend():
+        return "'" + str(value).replace("'", "''") + "'"
+    escaped = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+def build_select_query(table_name, limit=None, where_clause=None, order_by=None):
+    """
+    Build a SELECT * query for a table in the configured dataset.
 
     Args:
         table_name (str): Name of the table to query.
         limit (int, optional): Maximum number of rows to return. Defaults to None.
         where_clause (str, optional): WHERE clause for the query. Defaults to None.
+        order_by (str, optional): ORDER BY clause for the query. Defaults to None.
 
     Returns:
-        list: A list of dictionaries containing the query results.
+        str: The SQL query.
     """
     table_id = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{table_name}`"
     query = f"SELECT * FROM {table_id}"
     
     if where_clause:
         query += f" WHERE {where_clause}"
+
+    if order_by:
+        query += f" ORDER BY {order_by}"
     
     if limit:
         query += f" LIMIT {limit}"
 
-    return execute_query(query)
+    return query
+
+def get_data(table_name, limit=None, where_clause=None, result_mode="dicts", use_cache=None):
+    """
+    Retrieve data from a specified BigQuery table.
+
+    Args:
+        table_name (str): Name of the table to query.
+        limit (int, optional): Maximum number of rows to return. Defaults to None.
+        where_clause (str, optional): WHERE clause for the query. Defaults to None.
+        result_mode (str, optional): One of RESULT_MODES. Defaults to "dicts".
+        use_cache (bool, optional): Use the query result cache. Defaults to config.QUERY_CACHE_ENABLED.
+
+    Returns:
+        list: A list of dictionaries containing the query results, or the
+            form requested by result_mode.
+    """
+    return execute_query(build_select_query(table_name, limit, where_clause), result_mode, use_cache=use_cache)
+
+def get_data_pages(table_name, page_size=None, limit=None, where_clause=None, order_by=None):
+    """
+    Retrieve data from a specified BigQuery table one page at a time.
+
+    Args:
+        table_name (str): Name of the table to query.
+        page_size (int, optional): Number of rows per page. Defaults to config.SENTIMENT_BATCH_SIZE.
+        limit (int, optional): Maximum number of rows to return. Defaults to None.
+        where_clause (str, optional): WHERE clause for the query. Defaults to None.
+        order_by (str, optional): ORDER BY clause for the query. Defaults to None.
+
+    Yields:
+        list: A list of dictionaries for each page of results.
+    """
+    yield from execute_query_pages(build_select_query(table_name, limit, where_clause, order_by), page_size)
 
-def get_feedback_data(limit=None, where_clause=None):
+def get_feedback_data(limit=None, where_clause=None, result_mode="dicts", use_cache=None):
     """
     Retrieve data from the feedback table.
 
     Args:
         limit (int, optional): Maximum number of rows to return. Defaults to None.
         where_clause (str, optional): WHERE clause for the query. Defaults to None.
+        result_mode (str, optional): One of RESULT_MODES. Defaults to "dicts".
+        use_cache (bool, optional): Use the query result cache. Defaults to config.QUERY_CACHE_ENABLED.
 
     Returns:
-        list: A list of dictionaries containing the feedback data.
+        list: A list of dictionaries containing the feedback data, or the
+            form requested by result_mode.
     """
-    return get_data(config.FEEDBACK_TABLE_NAME, limit, where_clause)
+    return get_data(config.FEEDBACK_TABLE_NAME, limit, where_clause, result_mode, use_cache)
 
-def get_sentiment_data(limit=None, where_clause=None):
+def get_sentiment_data(limit=None, where_clause=None, result_mode="dicts", use_cache=None):
     """
     Retrieve data from the sentiment table.
 
     Args:
         limit (int, optional): Maximum number of rows to return. Defaults to None.
         where_clause (str, optional): WHERE clause for the query. Defaults to None.
+        result_mode (str, optional): One of RESULT_MODES. Defaults to "dicts".
+        use_cache (bool, optional): Use the query result cache. Defaults to config.QUERY_CACHE_ENABLED.
 
     Returns:
-        list: A list of dictionaries containing the sentiment data.
+        list: A list of dictionaries containing the sentiment data, or the
+            form requested by result_mode.
     """
-    return get_data(config.SENTIMENT_TABLE_NAME, limit, where_clause)
+    return get_data(config.SENTIMENT_TABLE_NAME, limit, where_clause, result_mode, use_cache)
 
-def get_joined_feedback_sentiment_data(limit=None, where_clause=None):
+def get_joined_feedback_sentiment_data(limit=None, where_clause=None, result_mode="dicts", use_cache=None):
     """
     Retrieve joined data from both feedback and sentiment tables.
 
     Args:
         limit (int, optional): Maximum number of rows to return. Defaults to None.
         where_clause (str, optional): WHERE clause for the query. Defaults to None.
+        result_mode (str, optional): One of RESULT_MODES. Defaults to "dicts".
+            Use "arrow" or "dataframe" for large exports.
+        use_cache (bool, optional): Use the query result cache. Defaults to config.QUERY_CACHE_ENABLED.
 
     Returns:
-        list: A list of dictionaries containing the joined data.
+        list: A list of dictionaries containing the joined data, or the
+            form requested by result_mode.
     """
     feedback_table = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.FEEDBACK_TABLE_NAME}`"
     sentiment_table = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.SENTIMENT_TABLE_NAME}`"
@@ -286,19 +821,22 @@ def get_joined_feedback_sentiment_data(limit=None, where_clause=None):
     if limit:
         query += f" LIMIT {limit}"
 
-    return execute_query(query)
+    return execute_query(query, result_mode, use_cache=use_cache)
 
-def run_query(query):
+def run_query(query, result_mode="dicts", use_cache=None):
     """
     Execute a full SQL query.
 
     Args:
         query (str): The full SQL query to execute.
+        result_mode (str, optional): One of RESULT_MODES. Defaults to "dicts".
+        use_cache (bool, optional): Use the query result cache. Defaults to config.QUERY_CACHE_ENABLED.
 
     Returns:
-        list: A list of dictionaries containing the query results.
+        list: A list of dictionaries containing the query results, or the
+            form requested by result_mode.
     """
-    return execute_query(query)
+    return execute_query(query, result_mode, use_cache=use_cache)
 
 # Main execution block for testing and demonstration
 if __name__ == "__main__":
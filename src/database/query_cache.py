@@ -0,0 +1,197 @@
+"""
+This module provides a local cache for BigQuery query results.
+
+Results are keyed on the normalized SQL text together with the version of
+every table the query references (last modified time, row count and
+streaming buffer size), so an entry is only reused while none of those
+tables has changed. Results are stored as zstd-compressed Arrow IPC files,
+and the cache directory is capped in size by evicting the least recently
+used files.
+"""
+
+# file: src/database/query_cache.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import Logger
+
+logger = Logger().logger
+
+pa = lazy_import("pyarrow")
+feather = lazy_import("pyarrow.feather")
+
+# Fully qualified table references as written throughout operations.py
+TABLE_REFERENCE = re.compile(r"`([\w-]+\.\w+\.[\w$-]+)`")
+
+
+def normalize_sql(query):
+    """
+    Normalize a SQL query for use in a cache key.
+
+    Args:
+        query (str): The SQL query.
+
+    Returns:
+        str: The query with whitespace collapsed and any trailing semicolon removed.
+    """
+    return " ".join(query.split()).rstrip(";").strip()
+
+
+def referenced_tables(query):
+    """
+    Find the fully qualified tables referenced by a query.
+
+    Args:
+        query (str): The SQL query.
+
+    Returns:
+        list: Sorted, de-duplicated table IDs.
+    """
+    return sorted(set(TABLE_REFERENCE.findall(query)))
+
+
+def table_version(client, table_id):
+    """
+    Describe the current version of a table.
+
+    Args:
+        client (google.cloud.bigquery.Client): BigQuery client.
+        table_id (str): Full ID of the table.
+
+    Returns:
+        list: Last modified time, row count and streaming buffer row estimate.
+    """
+    table = client.get_table(table_id)
+    buffered = table.streaming_buffer.estimated_rows if table.streaming_buffer else 0
+    modified = table.modified.isoformat() if table.modified else None
+    return [modified, table.num_rows, buffered]
+
+
+class QueryResultCache:
+    """
+    Directory of Arrow IPC files holding query results, capped in total size.
+
+    Args:
+        directory (str or Path): Directory holding the cached results.
+        max_bytes (int): Maximum total size of the cached files.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, client, query):
+        """
+        Build the cache key of a query.
+
+        Args:
+            client (google.cloud.bigquery.Client): BigQuery client used to look up table versions.
+            query (str): The SQL query.
+
+        Returns:
+            str: Hex SHA-256 digest, or None if the query references no tables
+                and therefore cannot be validated.
+        """
+        tables = referenced_tables(query)
+        if not tables:
+            return None
+        versions = {table_id: table_version(client, table_id) for table_id in tables}
+        payload = json.dumps([normalize_sql(query), versions], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.arrow"
+
+    def get(self, key):
+        """
+        Look up a cached result.
+
+        Args:
+            key (str): Cache key from make_key.
+
+        Returns:
+            pyarrow.Table: The cached result, or None on a miss.
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                table = feather.read_table(str(path), memory_map=False)
+                os.utime(path)
+            except (FileNotFoundError, pa.ArrowInvalid):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return table
+
+    def put(self, key, table):
+        """
+        Store a result and evict old entries above the size cap.
+
+        Args:
+            key (str): Cache key from make_key.
+            table (pyarrow.Table): The query result.
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock:
+            feather.write_feather(table, str(tmp_path), compression="zstd")
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used files above max_bytes. Caller holds the lock."""
+        files = sorted(self.directory.glob("*.arrow"), key=lambda f: f.stat().st_mtime)
+        total = sum(f.stat().st_size for f in files)
+        for f in files:
+            if total <= self.max_bytes:
+                break
+            total -= f.stat().st_size
+            f.unlink()
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        Returns:
+            dict: Entry count, total size in bytes, hits and misses.
+        """
+        files = list(self.directory.glob("*.arrow"))
+        return {
+            'entries': len(files),
+            'bytes': sum(f.stat().st_size for f in files),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class QueryCacheManager:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = QueryResultCache(config.QUERY_CACHE_DIR, config.QUERY_CACHE_MAX_BYTES)
+        return cls._instance
+
+
+def get_query_cache():
+    """
+    Return the shared query result cache.
+
+    Returns:
+        QueryResultCache: The process-wide cache.
+    """
+    return QueryCacheManager.get_cache()
@@ -0,0 +1,139 @@
+"""
+This module implements multi-review batched prompts for sentiment analysis.
+
+Several reviews, keyed by their Id, are packed into a single prompt so the
+fixed system prompt and instructions are paid for once per batch instead of
+once per review. The model answers with a JSON array of {Id, score, magnitude}
+objects wrapped in a {"results": [...]} object, which keeps the answer valid
+in the providers' JSON modes. The items that are missing or malformed in the
+answer are packed into a new, smaller batch prompt and re-submitted
+together, up to config.SENTIMENT_BATCH_MAX_RETRIES times; items still
+missing after that are left unscored.
+"""
+
+# file: src/sentiment/batching.py
+
+import json
+
+from src.utils.config import config
+from src.utils.logging import sampled_logger
+from src.utils import metrics
+from src.sentiment.parsing import extract_json, validate_sentiment
+
+SYSTEM_PROMPT = "You are a sentiment analysis expert. Analyze the sentiment of each given text and provide a score and magnitude."
+
+BATCH_INSTRUCTIONS = "Analyze the sentiment of each review in the following JSON array. Respond only with a JSON object whose 'results' key holds an array containing one object per review with the keys 'Id' (copied unchanged from the input), 'score' (a float between -1 and 1, where -1 is very negative and 1 is very positive) and 'magnitude' (a float representing the strength of the sentiment, where 0 is neutral and higher values indicate stronger sentiment):"
+
+
+def chunk(items, size):
+    """
+    Split a list into consecutive chunks.
+
+    Args:
+        items (list): Items to split.
+        size (int): Maximum number of items per chunk.
+
+    Returns:
+        list: A list of lists, each holding at most size items.
+    """
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_batch_messages(reviews):
+    """
+    Build the chat messages for a batch of reviews.
+
+    Args:
+        reviews (list): Dictionaries with 'Id' and 'Review' keys.
+
+    Returns:
+        list: The system and user messages for the chat request.
+    """
+    payload = json.dumps(
+        [{"Id": str(review['Id']), "Review": review['Review']} for review in reviews],
+        ensure_ascii=False)
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{BATCH_INSTRUCTIONS}\n\n{payload}"}
+    ]
+
+
+def _load_json_array(content):
+    """
+    Load a JSON array from model output, ignoring text and fences around it.
+
+    Args:
+        content (str): Raw model output.
+
+    Returns:
+        list: The decoded array, or an empty list if none could be decoded.
+    """
+    data = extract_json(content)
+
+    # The array is normally wrapped in an object, e.g. {"results": [...]}
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [])
+    return data if isinstance(data, list) else []
+
+
+def parse_batch_response(content, expected_ids):
+    """
+    Parse a batched sentiment response.
+
+    Entries with an unknown Id, missing keys or out-of-range values are
+    dropped so that only those reviews need to be re-submitted.
+
+    Args:
+        content (str): Raw model output.
+        expected_ids (set): Ids that were sent in the batch.
+
+    Returns:
+        dict: Mapping of Id to a dictionary containing 'score' and 'magnitude'.
+    """
+    results = {}
+    for item in _load_json_array(content):
+        if not isinstance(item, dict):
+            continue
+        review_id = str(item.get('Id', item.get('id')))
+        if review_id not in expected_ids:
+            continue
+        sentiment = validate_sentiment(item)
+        if sentiment is not None:
+            results[review_id] = sentiment
+    return results
+
+
+async def evaluate_batch_with_retries(reviews, complete, max_retries=None):
+    """
+    Score a batch of reviews, re-submitting only missing or malformed items.
+
+    Args:
+        reviews (list): Dictionaries with 'Id' and 'Review' keys.
+        complete (callable): Coroutine function that takes chat messages and
+            returns the model's text response.
+        max_retries (int, optional): Number of re-submissions for items that
+            were not returned correctly. Defaults to config.SENTIMENT_BATCH_MAX_RETRIES.
+
+    Returns:
+        dict: Mapping of Id to a dictionary containing 'score' and 'magnitude'.
+            Ids that could not be scored after all retries are left out.
+    """
+    max_retries = config.SENTIMENT_BATCH_MAX_RETRIES if max_retries is None else max_retries
+    results = {}
+    pending = list(reviews)
+
+    for attempt in range(max_retries + 1):
+        content = await complete(build_batch_messages(pending))
+        results.update(parse_batch_response(content, {str(review['Id']) for review in pending}))
+        pending = [review for review in pending if str(review['Id']) not in results]
+        if not pending:
+            break
+        metrics.PARSE_FAILURES.labels(mode="batch").inc(len(pending))
+        sampled_logger.warning("Batch attempt %d: %d reviews missing or malformed in response",
+                               attempt + 1, len(pending))
+
+    if pending:
+        sampled_logger.error("Giving up on %d reviews after %d retries", len(pending), max_retries)
+    return results
@@ -0,0 +1,295 @@
+"""
+This module provides a persistent, content-addressed cache for sentiment results.
+
+Results are stored in a local SQLite database keyed by a hash of the
+normalized review text, the model name and the prompt version, so repeated
+reviews and re-runs after failures are answered without calling the LLM.
+The cache is bounded by a maximum number of entries and evicts the least
+recently used ones first.
+"""
+
+# file: src/sentiment/cache.py
+
+import asyncio
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.utils.config import config
+from src.utils.logging import logger
+
+# Bump whenever the prompts change so stale results are not reused
+PROMPT_VERSION = "2"
+
+
+def normalize_text(text):
+    """
+    Normalize review text for cache lookups.
+
+    Args:
+        text (str): The review text.
+
+    Returns:
+        str: The text case-folded, stripped and with whitespace collapsed.
+    """
+    return " ".join(str(text).split()).casefold()
+
+
+def make_cache_key(text, model, prompt_version=PROMPT_VERSION):
+    """
+    Build the cache key for a review.
+
+    Args:
+        text (str): The review text.
+        model (str): Name of the model that scores the review.
+        prompt_version (str, optional): Version of the prompt. Defaults to PROMPT_VERSION.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the review, model and prompt.
+    """
+    payload = "\x1f".join([normalize_text(text), model, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    SQLite-backed LRU cache of sentiment results.
+
+    Args:
+        path (str or Path): Location of the SQLite database file.
+        max_entries (int): Maximum number of cached results.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+            "key TEXT PRIMARY KEY, score REAL NOT NULL, magnitude REAL NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sentiment_cache_last_used ON sentiment_cache (last_used)")
+        self._conn.commit()
+
+    def get_many(self, texts, model):
+        """
+        Look up cached results for several reviews.
+
+        Args:
+            texts (list): Review texts.
+            model (str): Name of the model that scores the reviews.
+
+        Returns:
+            list: For each text, a dictionary containing 'score' and 'magnitude',
+                or None on a miss.
+        """
+        keys = [make_cache_key(text, model) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, score, magnitude FROM sentiment_cache WHERE key IN ({placeholders})", part)
+                found.update({key: {'score': score, 'magnitude': magnitude} for key, score, magnitude in rows})
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE sentiment_cache SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found])
+                self._conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return [found.get(key) for key in keys]
+
+    def get(self, text, model):
+        """
+        Look up the cached result for a review.
+
+        Args:
+            text (str): The review text.
+            model (str): Name of the model that scores the review.
+
+        Returns:
+            dict: A dictionary containing 'score' and 'magnitude', or None on a miss.
+        """
+        return self.get_many([text], model)[0]
+
+    def put_many(self, items, model):
+        """
+        Store results for several reviews and evict old entries if needed.
+
+        Args:
+            items (list): (text, sentiment) tuples, where sentiment is a
+                dictionary containing 'score' and 'magnitude'.
+            model (str): Name of the model that scored the reviews.
+        """
+        now = time.time()
+        rows = [(make_cache_key(text, model), float(sentiment['score']), float(sentiment['magnitude']), now)
+                for text, sentiment in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (key, score, magnitude, last_used) VALUES (?, ?, ?, ?)",
+                rows)
+            self._evict()
+            self._conn.commit()
+
+    def put(self, text, model, sentiment):
+        """
+        Store the result for a review.
+
+        Args:
+            text (str): The review text.
+            model (str): Name of the model that scored the review.
+            sentiment (dict): A dictionary containing 'score' and 'magnitude'.
+        """
+        self.put_many([(text, sentiment)], model)
+
+    def _evict(self):
+        """Delete the least recently used entries above max_entries. Caller holds the lock."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM sentiment_cache WHERE key IN "
+                "(SELECT key FROM sentiment_cache ORDER BY last_used ASC, rowid ASC LIMIT ?)", (excess,))
+            self.evictions += excess
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        Returns:
+            dict: Entry count, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class SentimentCacheManager:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SentimentCache(config.SENTIMENT_CACHE_PATH, config.SENTIMENT_CACHE_MAX_ENTRIES)
+                logger.info(f"Using sentiment cache at {config.SENTIMENT_CACHE_PATH}")
+        return cls._instance
+
+
+def get_sentiment_cache():
+    """
+    Return the shared sentiment cache.
+
+    Returns:
+        SentimentCache: The process-wide cache, or None if caching is disabled.
+    """
+    if not config.SENTIMENT_CACHE_ENABLED:
+        return None
+    return SentimentCacheManager.get_cache()
+
+
+def cached_sentiment(model):
+    """
+    Decorator that puts the sentiment cache in front of a single-review evaluate function.
+
+    Works for both plain and coroutine functions whose first argument is the
+    review text and which return a dictionary containing 'score' and 'magnitude'.
+    For coroutine functions the SQLite lookups run in a worker thread, so
+    they do not block the event loop.
+
+    Args:
+        model (str): Name of the model used by the decorated function.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(review, *args, **kwargs):
+                cache = get_sentiment_cache()
+                cached = await asyncio.to_thread(cache.get, review, model) if cache else None
+                if cached is not None:
+                    return cached
+                sentiment = await func(review, *args, **kwargs)
+                if cache and sentiment is not None:
+                    await asyncio.to_thread(cache.put, review, model, sentiment)
+                return sentiment
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(review, *args, **kwargs):
+            cache = get_sentiment_cache()
+            cached = cache.get(review, model) if cache else None
+            if cached is not None:
+                return cached
+            sentiment = func(review, *args, **kwargs)
+            if cache and sentiment is not None:
+                cache.put(review, model, sentiment)
+            return sentiment
+        return wrapper
+    return decorator
+
+
+def cached_sentiment_batch(model):
+    """
+    Decorator that puts the sentiment cache in front of a batched evaluate coroutine.
+
+    The decorated function receives only the reviews that missed the cache.
+    The SQLite lookups run in a worker thread so they do not block the event loop.
+
+    Args:
+        model (str): Name of the model used by the decorated function.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(reviews, *args, **kwargs):
+            cache = get_sentiment_cache()
+            if cache is None:
+                return await func(reviews, *args, **kwargs)
+
+            results = {}
+            misses = []
+            texts = [review['Review'] for review in reviews]
+            for review, cached in zip(reviews, await asyncio.to_thread(cache.get_many, texts, model)):
+                if cached is None:
+                    misses.append(review)
+                else:
+                    results[str(review['Id'])] = cached
+
+            if misses:
+                scored = await func(misses, *args, **kwargs)
+                await asyncio.to_thread(
+                    cache.put_many,
+                    [(review['Review'], scored[str(review['Id'])]) for review in misses if str(review['Id']) in scored],
+                    model)
+                results.update(scored)
+            return results
+        return wrapper
+    return decorator
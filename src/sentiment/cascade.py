@@ -0,0 +1,201 @@
+"""
+This module implements the cascade stage of the sentiment pipeline.
+
+Every review is first scored by a fast local scorer running on the CPU. If
+the scorer is confident enough, its result is written directly; only the
+remaining, uncertain reviews are sent on to the LLM. The confidence
+threshold trades accuracy against LLM cost and is set with
+SENTIMENT_CASCADE_THRESHOLD.
+
+The default scorer is a small lexicon model with negation and intensifier
+handling; with SENTIMENT_CASCADE_SCORER=linear the model trained on the
+feedback labels (src/sentiment/linear_model.py) is used instead. Any object
+with a score(text) method returning a (sentiment, confidence) tuple works,
+and a score_many(texts) method is used to score whole pages at once.
+"""
+
+# file: src/sentiment/cascade.py
+
+import math
+import re
+
+from src.utils.config import config
+from src.utils.logging import logger
+
+POSITIVE_WORDS = {
+    "amazing": 3.0, "awesome": 3.0, "excellent": 3.2, "fantastic": 3.2, "perfect": 3.0, "outstanding": 3.2,
+    "love": 3.0, "loved": 3.0, "loves": 3.0, "wonderful": 3.0, "great": 2.8, "superb": 3.0, "brilliant": 3.0,
+    "best": 2.8, "happy": 2.6, "pleased": 2.4, "satisfied": 2.2, "recommend": 2.2, "recommended": 2.2,
+    "good": 2.0, "nice": 1.8, "reliable": 2.0, "comfortable": 1.8, "easy": 1.6, "works": 1.2, "worth": 1.8,
+    "fast": 1.4, "quick": 1.4, "helpful": 2.0, "beautiful": 2.6, "impressed": 2.6, "enjoy": 2.2,
+    "enjoyed": 2.2, "like": 1.4, "liked": 1.6, "solid": 1.6, "sturdy": 1.6, "friendly": 1.8, "fine": 0.8,
+    "glad": 2.0, "favorite": 2.4, "smooth": 1.4, "affordable": 1.4, "durable": 1.8, "flawless": 3.0,
+}
+
+NEGATIVE_WORDS = {
+    "terrible": -3.2, "awful": -3.2, "horrible": -3.2, "worst": -3.4, "hate": -3.0, "hated": -3.0,
+    "useless": -2.8, "garbage": -3.0, "junk": -2.8, "waste": -2.6, "broken": -2.4, "broke": -2.2,
+    "bad": -2.4, "poor": -2.2, "disappointed": -2.4, "disappointing": -2.4, "refund": -1.6, "return": -1.0,
+    "returned": -1.6, "defective": -2.6, "cheap": -1.4, "slow": -1.4, "annoying": -2.0, "angry": -2.4,
+    "rude": -2.4, "unhappy": -2.4, "problem": -1.6, "problems": -1.6, "issue": -1.2, "issues": -1.2,
+    "fail": -2.2, "failed": -2.2, "fails": -2.2, "stopped": -1.6, "difficult": -1.4, "worse": -2.4,
+    "scam": -3.2, "avoid": -2.4, "sucks": -2.8, "mediocre": -1.4, "overpriced": -1.8, "uncomfortable": -1.8,
+    "flimsy": -2.0, "leaks": -1.8, "crashes": -2.2, "unreliable": -2.2, "regret": -2.4,
+}
+
+LEXICON = {**POSITIVE_WORDS, **NEGATIVE_WORDS}
+
+NEGATIONS = {"not", "no", "never", "nothing", "hardly", "barely", "without", "dont", "don't", "doesn't",
+             "didn't", "isn't", "wasn't", "aren't", "won't", "can't", "cannot", "couldn't", "wouldn't"}
+
+INTENSIFIERS = {"very": 1.3, "really": 1.3, "extremely": 1.5, "so": 1.2, "totally": 1.3, "absolutely": 1.5,
+                "super": 1.3, "incredibly": 1.5, "quite": 1.1, "slightly": 0.6, "somewhat": 0.7}
+
+# Contrast markers usually mean mixed sentiment, which the lexicon handles poorly
+CONTRASTS = {"but", "however", "although", "though", "except", "yet"}
+
+TOKEN = re.compile(r"[a-z']+")
+
+# VADER-style normalization constant mapping the summed valence into (-1, 1)
+NORMALIZATION_ALPHA = 15.0
+NEGATION_FACTOR = -0.74
+
+
+class LexiconScorer:
+    """
+    Fast lexicon-based sentiment scorer.
+
+    Confidence grows with the number of sentiment words found and drops when
+    they disagree in polarity or the review contains a contrast marker.
+    """
+
+    def score(self, text):
+        """
+        Score a review.
+
+        Args:
+            text (str): The review text.
+
+        Returns:
+            tuple: A dictionary containing 'score' and 'magnitude', and the
+                confidence of the prediction between 0 and 1.
+        """
+        tokens = TOKEN.findall(str(text).lower())
+        valences = []
+        for index, token in enumerate(tokens):
+            valence = LEXICON.get(token)
+            if valence is None:
+                continue
+            if index > 0 and tokens[index - 1] in INTENSIFIERS:
+                valence *= INTENSIFIERS[tokens[index - 1]]
+            if any(previous in NEGATIONS for previous in tokens[max(0, index - 3):index]):
+                valence *= NEGATION_FACTOR
+            valences.append(valence)
+
+        if not valences:
+            return {'score': 0.0, 'magnitude': 0.0}, 0.0
+
+        total = sum(valences)
+        score = total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+        magnitude = sum(abs(valence) for valence in valences) / 4
+
+        positive = sum(valence for valence in valences if valence > 0)
+        negative = -sum(valence for valence in valences if valence < 0)
+        agreement = abs(positive - negative) / (positive + negative)
+        coverage = min(1.0, len(valences) / 3)
+        confidence = agreement * coverage * min(1.0, abs(score) / 0.5)
+        if CONTRASTS.intersection(tokens):
+            confidence *= 0.5
+        return {'score': score, 'magnitude': magnitude}, confidence
+
+
+class Cascade:
+    """
+    Splits reviews into those the local scorer is confident about and those
+    that need the LLM, and keeps count of the offloaded traffic.
+
+    Args:
+        scorer (optional): Local scorer. Defaults to LexiconScorer().
+        threshold (float, optional): Minimum confidence for a local result to
+            be used. Defaults to config.SENTIMENT_CASCADE_THRESHOLD.
+    """
+
+    def __init__(self, scorer=None, threshold=None):
+        self.scorer = scorer or LexiconScorer()
+        self.threshold = config.SENTIMENT_CASCADE_THRESHOLD if threshold is None else threshold
+        self.reviews = 0
+        self.offloaded = 0
+
+    def split(self, reviews):
+        """
+        Score reviews locally and separate out the uncertain ones.
+
+        Args:
+            reviews (list): Feedback rows with 'Id' and 'Review' keys.
+
+        Returns:
+            tuple: Sentiment table rows (dictionaries with 'Id', 'Score' and
+                'Magnitude' keys) for the confident reviews, and the list of
+                feedback rows that still need to be scored by the LLM.
+        """
+        texts = [review['Review'] for review in reviews]
+        if hasattr(self.scorer, 'score_many'):
+            scored = self.scorer.score_many(texts) if texts else []
+        else:
+            scored = [self.scorer.score(text) for text in texts]
+
+        rows, uncertain = [], []
+        for review, (sentiment, confidence) in zip(reviews, scored):
+            if confidence >= self.threshold:
+                rows.append({"Id": review['Id'], "Score": sentiment['score'], "Magnitude": sentiment['magnitude']})
+            else:
+                uncertain.append(review)
+
+        self.reviews += len(reviews)
+        self.offloaded += len(rows)
+        return rows, uncertain
+
+    def stats(self):
+        """
+        Return the offload report.
+
+        Returns:
+            dict: Number of reviews seen, scored locally and sent to the LLM,
+                the offload rate and the threshold in use.
+        """
+        return {
+            'reviews': self.reviews,
+            'offloaded': self.offloaded,
+            'escalated': self.reviews - self.offloaded,
+            'offload_rate': self.offloaded / self.reviews if self.reviews else 0.0,
+            'threshold': self.threshold,
+        }
+
+    def log_report(self):
+        """Log how much traffic was kept away from the LLM."""
+        stats = self.stats()
+        logger.info(f"Cascade scored {stats['offloaded']} of {stats['reviews']} reviews locally "
+                    f"({stats['offload_rate']:.1%} offloaded at threshold {stats['threshold']}); "
+                    f"{stats['escalated']} sent to the LLM")
+
+
+def get_cascade(threshold=None):
+    """
+    Build the cascade stage if it is enabled.
+
+    Args:
+        threshold (float, optional): Confidence threshold. Passing a threshold
+            enables the cascade regardless of config.SENTIMENT_CASCADE_ENABLED.
+
+    Returns:
+        Cascade: The cascade, or None if it is disabled.
+    """
+    if threshold is None and not config.SENTIMENT_CASCADE_ENABLED:
+        return None
+    scorer = None
+    if config.SENTIMENT_CASCADE_SCORER == "linear":
+        # Imported here because the linear model module depends on the pipeline
+        from src.sentiment.linear_model import LinearSentimentModel
+        scorer = LinearSentimentModel.load(config.SENTIMENT_MODEL_PATH)
+        logger.info(f"Using linear model {config.SENTIMENT_MODEL_PATH} as cascade scorer")
+    return Cascade(scorer=scorer, threshold=threshold)
@@ -0,0 +1,288 @@
+"""
+This module manages the HTTP clients used to reach the LLM providers.
+
+Every OpenAI and Ollama client is built on an httpx connection pool that is
+created once and shared, so requests reuse keep-alive connections instead of
+paying client construction and a TLS handshake per review. Sync clients are
+shared by all threads of the process; async clients are shared by everything
+running on the same event loop, because httpx async pools cannot be used
+across loops. Pool size, timeouts and HTTP/2 come from the LLM_HTTP_*
+settings in config. Response hooks registered on a pool see every response
+it receives, e.g. to read rate-limit headers (see src/sentiment/rate_limit.py).
+
+The SDKs and httpx are only imported when the first client is created.
+"""
+
+# file: src/sentiment/clients.py
+
+import asyncio
+import threading
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import logger, sampled_logger
+
+httpx = lazy_import("httpx")
+ollama = lazy_import("ollama")
+openai = lazy_import("openai")
+
+
+def transport_options():
+    """
+    Build the connection pool options shared by every provider client.
+
+    HTTP/2 is only enabled if requested and the h2 package is installed.
+
+    Returns:
+        dict: Keyword arguments for httpx.HTTPTransport and httpx.AsyncHTTPTransport.
+    """
+    http2 = config.LLM_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("LLM_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+
+    return {
+        'limits': httpx.Limits(
+            max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        'http2': http2,
+    }
+
+
+def http_timeout():
+    """
+    Build the request timeout shared by every provider client.
+
+    Returns:
+        httpx.Timeout: Read/write/pool timeout with a separate connect timeout.
+    """
+    return httpx.Timeout(config.LLM_HTTP_READ_TIMEOUT, connect=config.LLM_HTTP_CONNECT_TIMEOUT)
+
+
+class PoolStats:
+    """
+    Request counters, response hooks and live transports of one provider connection pool.
+
+    The counters survive the transports they describe, so totals keep growing
+    across pipeline runs that each use their own event loop.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.transports = []
+        self.response_hooks = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def finish(self, failed):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+    def observe(self, response):
+        for hook in self.response_hooks:
+            try:
+                hook(response)
+            except Exception as e:
+                sampled_logger.warning("Response hook failed: %s", e)
+
+    def snapshot(self):
+        """
+        Return the counters together with the state of the live connections.
+
+        Returns:
+            dict: Request, error and in-flight counts, plus the number of open
+                and idle connections of the pools still in use.
+        """
+        connections = [connection for transport in self.transports for connection in transport.connections()]
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'connections': len(connections),
+            'idle_connections': sum(1 for connection in connections if connection.is_idle()),
+        }
+
+
+def _pool_name(provider, host):
+    return f"{provider}:{host}" if host else provider
+
+
+class ProviderClientManager:
+    """Process-wide registry of pooled OpenAI and Ollama clients."""
+
+    _clients = {}
+    _stats = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _transport(cls, name, is_async):
+        """Create a counted transport for the pool called name. Caller holds the lock."""
+        from src.sentiment.transports import AsyncCountingTransport, CountingTransport
+
+        stats = cls._stats.setdefault(name, PoolStats())
+        transport_class = AsyncCountingTransport if is_async else CountingTransport
+        transport = transport_class(stats, **transport_options())
+        stats.transports.append(transport)
+        return transport
+
+    @classmethod
+    def _http_client(cls, name, is_async):
+        """Create an httpx client on a counted transport. Caller holds the lock."""
+        client_class = httpx.AsyncClient if is_async else httpx.Client
+        return client_class(transport=cls._transport(name, is_async), timeout=http_timeout())
+
+    @classmethod
+    def _get(cls, key, factory):
+        with cls._lock:
+            if key not in cls._clients:
+                cls._clients[key] = factory()
+            return cls._clients[key]
+
+    @classmethod
+    def _loop_key(cls, *key):
+        """Key an async client by the running event loop and forget clients of closed loops."""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            for stale in [k for k in cls._clients if k[-1] is not None and k[-1].is_closed()]:
+                cls._forget(stale)
+        return (*key, loop)
+
+    @classmethod
+    def _forget(cls, key):
+        """Drop a client from the registry. Caller holds the lock."""
+        client = cls._clients.pop(key)
+        stats = cls._stats.get(_pool_name(key[0], key[1]))
+        if stats:
+            transport = client._client._transport
+            stats.transports = [t for t in stats.transports if t is not transport]
+
+    @classmethod
+    def get_openai_client(cls):
+        return cls._get(('openai', None, None), lambda: openai.OpenAI(
+            api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL,
+            http_client=cls._http_client('openai', False)))
+
+    @classmethod
+    def get_async_openai_client(cls):
+        return cls._get(cls._loop_key('openai', None), lambda: openai.AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL,
+            http_client=cls._http_client('openai', True)))
+
+    @classmethod
+    def get_ollama_client(cls, host=None):
+        host = host or config.OLLAMA_HOST
+        return cls._get(('ollama', host, None), lambda: cls._ollama_client(ollama.Client, host, False))
+
+    @classmethod
+    def get_async_ollama_client(cls, host=None):
+        host = host or config.OLLAMA_HOST
+        return cls._get(cls._loop_key('ollama', host), lambda: cls._ollama_client(ollama.AsyncClient, host, True))
+
+    @classmethod
+    def _ollama_client(cls, client_class, host, is_async):
+        """Create an Ollama client on a counted transport. Caller holds the lock."""
+        return client_class(host=host, transport=cls._transport(_pool_name('ollama', host), is_async),
+                            timeout=http_timeout())
+
+    @classmethod
+    def add_response_hook(cls, name, hook):
+        with cls._lock:
+            cls._stats.setdefault(name, PoolStats()).response_hooks.append(hook)
+
+    @classmethod
+    def pool_stats(cls):
+        with cls._lock:
+            return {name: stats.snapshot() for name, stats in cls._stats.items()}
+
+    @classmethod
+    def close(cls):
+        """Close the sync clients and forget every client. Async clients close with their event loop."""
+        with cls._lock:
+            for key in list(cls._clients):
+                client = cls._clients[key]
+                if key[-1] is None:
+                    client.close()
+                cls._forget(key)
+
+
+def get_openai_client():
+    """
+    Return the shared OpenAI client.
+
+    Returns:
+        openai.OpenAI: Client backed by the shared connection pool.
+    """
+    return ProviderClientManager.get_openai_client()
+
+
+def get_async_openai_client():
+    """
+    Return the AsyncOpenAI client shared on the running event loop.
+
+    Returns:
+        openai.AsyncOpenAI: Client backed by the loop's connection pool.
+    """
+    return ProviderClientManager.get_async_openai_client()
+
+
+def get_ollama_client(host=None):
+    """
+    Return the shared Ollama client for a host.
+
+    Args:
+        host (str, optional): Ollama server URL. Defaults to config.OLLAMA_HOST
+            (or the ollama library default).
+
+    Returns:
+        ollama.Client: Client backed by the host's connection pool.
+    """
+    return ProviderClientManager.get_ollama_client(host)
+
+
+def get_async_ollama_client(host=None):
+    """
+    Return the async Ollama client for a host shared on the running event loop.
+
+    Args:
+        host (str, optional): Ollama server URL. Defaults to config.OLLAMA_HOST
+            (or the ollama library default).
+
+    Returns:
+        ollama.AsyncClient: Client backed by the loop's connection pool.
+    """
+    return ProviderClientManager.get_async_ollama_client(host)
+
+
+def add_response_hook(pool, hook):
+    """
+    Register a function called with every response of a connection pool.
+
+    Args:
+        pool (str): Pool name, e.g. "openai" or "ollama:<host>".
+        hook (callable): Called with each httpx.Response before its body is read.
+    """
+    ProviderClientManager.add_response_hook(pool, hook)
+
+
+def get_pool_stats():
+    """
+    Return connection pool statistics per provider.
+
+    Returns:
+        dict: Mapping of provider name (e.g. "openai" or "ollama:<host>") to
+            request, error and in-flight counts and open and idle connections.
+    """
+    return ProviderClientManager.pool_stats()
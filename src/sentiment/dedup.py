@@ -0,0 +1,271 @@
+"""
+This module groups duplicate and near-duplicate reviews before scoring.
+
+Reviews are normalized (case-folded, punctuation removed, whitespace
+collapsed) so copies that differ only in punctuation or casing become exact
+duplicates. Near-duplicates are found with MinHash signatures over the
+byte 4-grams of the normalized text and locality-sensitive hashing (LSH):
+signatures are cut into bands, and reviews sharing a band bucket are
+compared by their estimated Jaccard similarity.
+
+Only one representative per cluster is scored; its result is fanned out to
+every member Id on insert. The index of representatives lives for the whole
+run, so duplicates of reviews scored on earlier pages are not scored again.
+When a representative cannot be scored, its duplicates are handed back to be
+scored on their own.
+"""
+
+# file: src/sentiment/dedup.py
+
+import re
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import logger
+
+np = lazy_import("numpy")
+
+# Mersenne prime used by the universal hash functions of the MinHash permutations
+MERSENNE_PRIME = (1 << 61) - 1
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_review(text):
+    """
+    Normalize a review for duplicate detection.
+
+    Args:
+        text (str): The review text.
+
+    Returns:
+        str: The text case-folded, without punctuation and with whitespace collapsed.
+    """
+    return " ".join(PUNCTUATION.sub(" ", str(text).casefold()).split())
+
+
+def shingles(text):
+    """
+    Encode the byte 4-grams of a normalized review as integers.
+
+    Args:
+        text (str): The normalized review text.
+
+    Returns:
+        numpy.ndarray: The distinct 4-grams as uint64 values.
+    """
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    if len(data) < 4:
+        data = np.pad(data, (0, 4 - len(data)))
+    values = (data[:-3] << np.uint64(24)) | (data[1:-2] << np.uint64(16)) | (data[2:-1] << np.uint64(8)) | data[3:]
+    return np.unique(values)
+
+
+class MinHasher:
+    """
+    MinHash signatures from a fixed family of universal hash functions.
+
+    Args:
+        num_perm (int): Number of hash functions, i.e. the signature length.
+        seed (int, optional): Seed of the hash function parameters. Defaults to 1.
+    """
+
+    def __init__(self, num_perm, seed=1):
+        rng = np.random.default_rng(seed)
+        # Keep a * x below 2 ** 64 for 32-bit x so the products do not overflow
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, values):
+        """
+        Compute the MinHash signature of a set of shingles.
+
+        Args:
+            values (numpy.ndarray): Output of shingles().
+
+        Returns:
+            numpy.ndarray: The signature, one uint64 per hash function.
+        """
+        hashed = (self.a[:, None] * values[None, :] + self.b[:, None]) % np.uint64(MERSENNE_PRIME)
+        return hashed.min(axis=1)
+
+
+class ReviewDeduplicator:
+    """
+    Clusters reviews across the pages of a run and fans results out to cluster members.
+
+    Args:
+        threshold (float, optional): Minimum estimated Jaccard similarity of
+            near-duplicates. Defaults to config.DEDUP_THRESHOLD.
+        num_perm (int, optional): MinHash signature length. Defaults to config.DEDUP_NUM_PERM.
+        bands (int, optional): Number of LSH bands; must divide num_perm.
+            Defaults to config.DEDUP_BANDS.
+        max_index_size (int, optional): Maximum number of representatives kept
+            for matching later pages. Defaults to config.DEDUP_MAX_INDEX_SIZE.
+
+    Raises:
+        ValueError: If bands does not divide num_perm.
+    """
+
+    def __init__(self, threshold=None, num_perm=None, bands=None, max_index_size=None):
+        self.threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        num_perm = num_perm or config.DEDUP_NUM_PERM
+        self.bands = bands or config.DEDUP_BANDS
+        if num_perm % self.bands:
+            raise ValueError(f"bands ({self.bands}) must divide num_perm ({num_perm})")
+        self.rows_per_band = num_perm // self.bands
+        self.max_index_size = max_index_size or config.DEDUP_MAX_INDEX_SIZE
+        self.hasher = MinHasher(num_perm)
+
+        self.reviews = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.orphaned = 0
+        self._reset_index()
+
+    def _reset_index(self):
+        self._exact = {}        # normalized text -> representative key
+        self._texts = {}        # representative key -> normalized texts mapped to it
+        self._buckets = {}      # (band, band bytes) -> list of representative keys
+        self._signatures = {}   # representative key -> signature
+        self._results = {}      # representative key -> scored row, once known
+
+    def _bands(self, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            yield band, rows.tobytes()
+
+    def _find_similar(self, signature):
+        seen = set()
+        for band_key in self._bands(signature):
+            for key in self._buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if np.mean(self._signatures[key] == signature) >= self.threshold:
+                    return key
+        return None
+
+    def _add(self, key, normalized, signature):
+        self._exact[normalized] = key
+        self._texts[key] = [normalized]
+        self._signatures[key] = signature
+        for band_key in self._bands(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def group(self, reviews):
+        """
+        Assign reviews to clusters.
+
+        Args:
+            reviews (list): Feedback rows with 'Id' and 'Review' keys.
+
+        Returns:
+            tuple: The representatives that need scoring, and a list of
+                (review, representative key) pairs covering every review.
+        """
+        if len(self._signatures) >= self.max_index_size:
+            logger.info(f"Dedup index reached {self.max_index_size} representatives; starting a new index")
+            self._reset_index()
+
+        representatives, members = [], []
+        for review in reviews:
+            normalized = normalize_review(review['Review'])
+            key = self._exact.get(normalized)
+            if key is not None:
+                self.exact_duplicates += 1
+            else:
+                signature = self.hasher.signature(shingles(normalized))
+                key = self._find_similar(signature)
+                if key is not None:
+                    self.near_duplicates += 1
+                    self._exact[normalized] = key
+                    self._texts[key].append(normalized)
+                else:
+                    key = str(review['Id'])
+                    self._add(key, normalized, signature)
+                    representatives.append(review)
+            members.append((review, key))
+
+        self.reviews += len(reviews)
+        return representatives, members
+
+    def fan_out(self, rows, members):
+        """
+        Record the results of the representatives and copy them to every member.
+
+        Args:
+            rows (list): Sentiment table rows of the scored representatives.
+            members (list): The (review, representative key) pairs from group().
+
+        Returns:
+            tuple: Sentiment table rows for every member whose representative
+                has a result, and the duplicates whose representative has none,
+                which need to be scored on their own. Representatives without
+                a result are dropped from the index.
+        """
+        for row in rows:
+            self._results[str(row['Id'])] = row
+
+        results, orphans = [], []
+        for review, key in members:
+            row = self._results.get(key)
+            if row is not None:
+                results.append({**row, "Id": review['Id']})
+                continue
+            if key in self._signatures:
+                self._forget(key)
+            if str(review['Id']) != key:
+                orphans.append(review)
+        self.orphaned += len(orphans)
+        return results, orphans
+
+    def _forget(self, key):
+        signature = self._signatures.pop(key)
+        for text in self._texts.pop(key, ()):
+            if self._exact.get(text) == key:
+                del self._exact[text]
+        for band_key in self._bands(signature):
+            bucket = self._buckets.get(band_key, [])
+            if key in bucket:
+                bucket.remove(key)
+
+    def stats(self):
+        """
+        Return deduplication statistics.
+
+        Returns:
+            dict: Reviews seen, exact and near duplicates found, duplicates
+                that had to be scored on their own ('orphaned') and the share
+                of reviews that did not need scoring.
+        """
+        duplicates = self.exact_duplicates + self.near_duplicates - self.orphaned
+        return {
+            'reviews': self.reviews,
+            'exact_duplicates': self.exact_duplicates,
+            'near_duplicates': self.near_duplicates,
+            'orphaned': self.orphaned,
+            'duplicate_rate': duplicates / self.reviews if self.reviews else 0.0,
+        }
+
+    def log_report(self):
+        """Log how many scoring calls were saved."""
+        stats = self.stats()
+        skipped = stats['exact_duplicates'] + stats['near_duplicates'] - stats['orphaned']
+        logger.info(f"Dedup skipped {skipped} of {stats['reviews']} "
+                    f"reviews ({stats['exact_duplicates']} exact, {stats['near_duplicates']} near duplicates, "
+                    f"{stats['orphaned']} scored on their own, {stats['duplicate_rate']:.1%})")
+
+
+def get_deduplicator(enabled=None):
+    """
+    Build the deduplication stage if it is enabled.
+
+    Args:
+        enabled (bool, optional): Enable or disable deduplication. Defaults to config.DEDUP_ENABLED.
+
+    Returns:
+        ReviewDeduplicator: The deduplicator, or None if it is disabled.
+    """
+    enabled = config.DEDUP_ENABLED if enabled is None else enabled
+    return ReviewDeduplicator() if enabled else None
@@ -0,0 +1,175 @@
+"""
+This module provides the asynchronous scoring engine used by the sentiment
+analysis pipelines.
+
+It runs an async evaluation function over a list of reviews with a bounded
+number of requests in flight, returns the results in input order and reports
+the achieved throughput. Reviews can be scored one per request or packed into
+multi-review prompts (see src/sentiment/batching.py), which are packed up to
+a per-request token budget (see src/sentiment/tokens.py). Results can be
+recorded in a checkpoint journal (see src/sentiment/journal.py) as each
+request completes.
+"""
+
+# file: src/sentiment/engine.py
+
+import asyncio
+import time
+
+from src.utils.config import config
+from src.utils.logging import logger
+from src.sentiment.tokens import pack_batches
+
+
+async def score_reviews_async(items, evaluate, concurrency=None):
+    """
+    Score items concurrently with an async evaluation function.
+
+    A fixed pool of workers pulls items off a shared queue, so the number of
+    pending coroutines never exceeds the concurrency level regardless of how
+    many items are passed in.
+
+    Args:
+        items (list): Items to score, e.g. review texts.
+        evaluate (callable): Coroutine function called with a single item.
+        concurrency (int, optional): Maximum number of evaluations in flight.
+            Defaults to config.SENTIMENT_CONCURRENCY.
+
+    Returns:
+        list: The evaluation results, in the same order as items.
+
+    Raises:
+        Exception: The first error raised by an evaluation. Remaining workers
+            are cancelled.
+    """
+    concurrency = max(1, min(concurrency or config.SENTIMENT_CONCURRENCY, len(items) or 1))
+    results = [None] * len(items)
+    queue = asyncio.Queue()
+    for index, item in enumerate(items):
+        queue.put_nowait((index, item))
+
+    async def worker():
+        while True:
+            try:
+                index, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[index] = await evaluate(item)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+    except Exception:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+
+    return results
+
+
+def _log_throughput(num_reviews, elapsed):
+    """Log the number of reviews scored and the achieved reviews/s."""
+    rate = num_reviews / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Scored {num_reviews} reviews in {elapsed:.2f}s ({rate:.2f} reviews/s)")
+
+
+def score_reviews(items, evaluate, concurrency=None, num_reviews=None):
+    """
+    Synchronous entry point for score_reviews_async that logs throughput.
+
+    Args:
+        items (list): Items to score, e.g. review texts or batches of reviews.
+        evaluate (callable): Coroutine function called with a single item.
+        concurrency (int, optional): Maximum number of evaluations in flight.
+            Defaults to config.SENTIMENT_CONCURRENCY.
+        num_reviews (int, optional): Number of reviews contained in items, used
+            for the throughput report. Defaults to len(items).
+
+    Returns:
+        list: The evaluation results, in the same order as items.
+    """
+    start = time.perf_counter()
+    results = asyncio.run(score_reviews_async(items, evaluate, concurrency))
+    _log_throughput(len(items) if num_reviews is None else num_reviews, time.perf_counter() - start)
+    return results
+
+
+async def score_feedback_rows_async(reviews, evaluate, evaluate_batch=None, batch_size=None, concurrency=None,
+                                    journal=None):
+    """
+    Score feedback rows and build the corresponding sentiment table rows.
+
+    Args:
+        reviews (list): Feedback rows with 'Id' and 'Review' keys.
+        evaluate (callable): Coroutine function scoring a single review text.
+        evaluate_batch (callable, optional): Coroutine function scoring a list of
+            feedback rows and returning a mapping of Id to sentiment.
+        batch_size (int, optional): Maximum number of reviews per prompt. Batched
+            prompts are used when this is greater than 1 and evaluate_batch is
+            given; they are also kept under config.SENTIMENT_MAX_PROMPT_TOKENS.
+            Defaults to config.SENTIMENT_PROMPT_BATCH_SIZE.
+        concurrency (int, optional): Maximum number of requests in flight.
+            Defaults to config.SENTIMENT_CONCURRENCY.
+        journal (CheckpointJournal, optional): Journal that every result is
+            appended to as soon as its request completes. Defaults to None.
+
+    Returns:
+        list: Dictionaries with 'Id', 'Score' and 'Magnitude' keys. Reviews that
+            could not be scored are left out.
+    """
+    batch_size = batch_size or config.SENTIMENT_PROMPT_BATCH_SIZE
+    start = time.perf_counter()
+
+    if evaluate_batch is not None and batch_size > 1:
+        if journal is not None:
+            unjournaled_batch = evaluate_batch
+
+            async def evaluate_batch(batch):
+                batch_result = await unjournaled_batch(batch)
+                journal.append(batch_result)
+                return batch_result
+
+        scored = {}
+        for batch_result in await score_reviews_async(pack_batches(reviews, batch_size), evaluate_batch, concurrency):
+            scored.update(batch_result)
+        sentiments = [scored.get(str(review['Id'])) for review in reviews]
+    elif journal is not None:
+        async def evaluate_review(review):
+            sentiment = await evaluate(review['Review'])
+            journal.append({review['Id']: sentiment})
+            return sentiment
+
+        sentiments = await score_reviews_async(reviews, evaluate_review, concurrency)
+    else:
+        sentiments = await score_reviews_async([review['Review'] for review in reviews], evaluate, concurrency)
+
+    _log_throughput(len(reviews), time.perf_counter() - start)
+
+    results = []
+    for review, sentiment in zip(reviews, sentiments):
+        if sentiment is None:
+            continue
+        results.append({
+            "Id": review['Id'],
+            "Score": sentiment['score'],
+            "Magnitude": sentiment['magnitude']
+        })
+    return results
+
+
+def score_feedback_rows(reviews, evaluate, evaluate_batch=None, batch_size=None, concurrency=None):
+    """
+    Synchronous entry point for score_feedback_rows_async.
+
+    Args:
+        reviews (list): Feedback rows with 'Id' and 'Review' keys.
+        evaluate (callable): Coroutine function scoring a single review text.
+        evaluate_batch (callable, optional): Coroutine function scoring a list of feedback rows.
+        batch_size (int, optional): Number of reviews per prompt.
+        concurrency (int, optional): Maximum number of requests in flight.
+
+    Returns:
+        list: Dictionaries with 'Id', 'Score' and 'Magnitude' keys.
+    """
+    return asyncio.run(score_feedback_rows_async(reviews, evaluate, evaluate_batch, batch_size, concurrency))
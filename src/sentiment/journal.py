@@ -0,0 +1,122 @@
+"""
+This module provides the crash-safe checkpoint journal of the sentiment pipeline.
+
+Every LLM result is appended to a local JSON-lines file as soon as its
+request completes, before the page it belongs to is written to the sentiment
+table. The journal is truncated once the page has been flushed and the
+watermark stored, so it only ever holds the results of the page in flight.
+If the process dies part-way through a page, a run started with resume=True
+(--resume on the command line) replays the journaled results into the
+sentiment table and skips their Ids, so paid LLM work is never repeated.
+"""
+
+# file: src/sentiment/journal.py
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from src.utils.config import config
+from src.utils.logging import logger
+
+
+class CheckpointJournal:
+    """
+    Append-only JSON-lines journal of sentiment results.
+
+    Each line holds one sentiment table row ('Id', 'Score' and 'Magnitude').
+    Lines are flushed to the operating system as they are written, so they
+    survive the process being killed; with fsync enabled they also survive a
+    machine crash at the cost of one disk sync per completed request.
+
+    Args:
+        path (str): Path of the journal file. Parent directories are created.
+        fsync (bool, optional): Sync every append to disk. Defaults to
+            config.SENTIMENT_JOURNAL_FSYNC.
+    """
+
+    def __init__(self, path, fsync=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = config.SENTIMENT_JOURNAL_FSYNC if fsync is None else fsync
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, scored):
+        """
+        Record completed results.
+
+        Args:
+            scored (dict): Mapping of review Id to a sentiment dictionary with
+                'score' and 'magnitude' keys. None values are skipped.
+        """
+        lines = "".join(
+            json.dumps({"Id": str(review_id), "Score": sentiment['score'], "Magnitude": sentiment['magnitude']}) + "\n"
+            for review_id, sentiment in scored.items() if sentiment is not None)
+        if not lines:
+            return
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(lines)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def read(self):
+        """
+        Read the journaled results.
+
+        A line that cannot be decoded, e.g. one cut short by a crash, is
+        skipped. Later entries for the same Id win.
+
+        Returns:
+            dict: Mapping of Id to a dictionary with 'Id', 'Score' and 'Magnitude' keys.
+        """
+        rows = {}
+        with self._lock:
+            if not self.path.exists():
+                return rows
+            with open(self.path, encoding="utf-8") as journal_file:
+                for line_number, line in enumerate(journal_file, 1):
+                    try:
+                        row = json.loads(line)
+                        rows[str(row['Id'])] = {"Id": str(row['Id']), "Score": row['Score'],
+                                                "Magnitude": row['Magnitude']}
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning("Skipping unreadable line %d of journal %s", line_number, self.path)
+        return rows
+
+    def clear(self):
+        """Truncate the journal once its results are in the sentiment table."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.path.exists():
+                open(self.path, "w").close()
+
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def get_journal(name):
+    """
+    Return the journal of a pipeline.
+
+    Args:
+        name (str): Name of the pipeline, e.g. its watermark key. Pipelines
+            running side by side must use different names.
+
+    Returns:
+        CheckpointJournal: The journal stored in config.SENTIMENT_JOURNAL_DIR,
+            or None if journaling is disabled.
+    """
+    if not config.SENTIMENT_JOURNAL_ENABLED:
+        return None
+    return CheckpointJournal(Path(config.SENTIMENT_JOURNAL_DIR) / f"{name}.jsonl")
@@ -0,0 +1,576 @@
+"""
+This module implements a local sentiment model trained on the feedback Label column.
+
+Reviews are turned into hashed TF-IDF features (word unigrams and bigrams
+hashed into a fixed number of columns, so no vocabulary has to be stored)
+and scored by a multinomial logistic regression over the labels. Labels are
+mapped to sentiment scores between -1 and 1 (star ratings linearly, text
+labels through LABEL_SCORES), so predictions are written in the same
+Score/Magnitude form as the LLM results. Inference is vectorized over whole
+pages with SciPy sparse matrices and needs no LLM.
+
+Run as a module for the train, evaluate and score commands:
+
+    python -m src.sentiment.linear_model train [--csv reviews.csv]
+    python -m src.sentiment.linear_model evaluate [--csv reviews.csv]
+    python -m src.sentiment.linear_model score [--limit N] [--backfill]
+"""
+
+# file: src/sentiment/linear_model.py
+
+import argparse
+import csv
+import re
+import time
+import zlib
+from pathlib import Path
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import logger
+from src.database import get_data_pages, get_watermark, set_watermark, setup_state_table
+from src.sentiment.pipeline import WATERMARK_KEY, flush_results, iter_unprocessed_pages
+
+np = lazy_import("numpy")
+sp = lazy_import("scipy.sparse")
+
+TOKEN = re.compile(r"[a-z0-9']+")
+
+LABEL_SCORES = {"negative": -1.0, "neutral": 0.0, "positive": 1.0}
+
+# Watermark of score_unprocessed, kept apart from the LLM pipeline's
+LINEAR_WATERMARK_KEY = f"{WATERMARK_KEY}_linear"
+
+
+def tokenize(text, ngram_range=(1, 2)):
+    """
+    Split a review into word n-grams.
+
+    Args:
+        text (str): The review text.
+        ngram_range (tuple, optional): Smallest and largest n-gram length. Defaults to (1, 2).
+
+    Returns:
+        list: The n-grams as strings.
+    """
+    tokens = TOKEN.findall(str(text).lower())
+    grams = []
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        if n == 1:
+            grams.extend(tokens)
+        else:
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return grams
+
+
+class HashingTfidfVectorizer:
+    """
+    Hashed TF-IDF features with sublinear term frequency and L2-normalized rows.
+
+    CRC32 is used for hashing because, unlike hash(), it is stable across
+    processes. One bit of the hash sets the sign of the feature so that
+    collisions tend to cancel out.
+
+    Args:
+        n_features (int, optional): Number of hashed columns. Defaults to 2 ** 20.
+        ngram_range (tuple, optional): Smallest and largest n-gram length. Defaults to (1, 2).
+    """
+
+    def __init__(self, n_features=2 ** 20, ngram_range=(1, 2)):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.idf = None
+
+    def counts(self, texts):
+        """
+        Build the hashed term count matrix.
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            scipy.sparse.csr_matrix: Signed term counts, one row per text.
+        """
+        indices, values, indptr = [], [], [0]
+        for text in texts:
+            for gram in tokenize(text, self.ngram_range):
+                h = zlib.crc32(gram.encode("utf-8"))
+                indices.append(h % self.n_features)
+                values.append(1.0 if h & 0x80000000 else -1.0)
+            indptr.append(len(indices))
+
+        matrix = sp.csr_matrix(
+            (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(texts), self.n_features))
+        matrix.sum_duplicates()
+        # Colliding grams of opposite sign cancel out; drop the zeros they leave
+        # behind so that weight() never takes the log of 0.
+        matrix.eliminate_zeros()
+        return matrix
+
+    def fit(self, counts):
+        """
+        Learn the inverse document frequencies from a count matrix.
+
+        Args:
+            counts (scipy.sparse.csr_matrix): Output of counts().
+
+        Returns:
+            HashingTfidfVectorizer: self.
+        """
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf = (np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def weight(self, counts):
+        """
+        Turn a count matrix into TF-IDF features.
+
+        Args:
+            counts (scipy.sparse.csr_matrix): Output of counts().
+
+        Returns:
+            scipy.sparse.csr_matrix: L2-normalized TF-IDF rows.
+        """
+        features = counts.copy()
+        features.data = np.sign(features.data) * (1 + np.log(np.abs(features.data)))
+        features.data *= self.idf[features.indices]
+        norms = np.sqrt(np.asarray(features.multiply(features).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sp.csr_matrix(sp.diags(1 / norms) @ features)
+
+    def transform(self, texts):
+        """
+        Build TF-IDF features for review texts.
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            scipy.sparse.csr_matrix: L2-normalized TF-IDF rows.
+        """
+        return self.weight(self.counts(texts))
+
+
+def label_scores(labels):
+    """
+    Map labels to sentiment scores between -1 and 1.
+
+    Numeric labels (e.g. 1 to 5 star ratings) are mapped linearly from the
+    lowest to the highest label, text labels through LABEL_SCORES.
+
+    Args:
+        labels (list): The distinct labels, sorted.
+
+    Returns:
+        numpy.ndarray: The score of each label.
+
+    Raises:
+        ValueError: If a text label is not in LABEL_SCORES.
+    """
+    try:
+        values = np.array([float(label) for label in labels])
+    except ValueError:
+        unknown = [label for label in labels if str(label).lower() not in LABEL_SCORES]
+        if unknown:
+            raise ValueError(f"No sentiment score for labels {unknown}; add them to LABEL_SCORES")
+        return np.array([LABEL_SCORES[str(label).lower()] for label in labels])
+    if values.max() == values.min():
+        return np.zeros(len(values))
+    return 2 * (values - values.min()) / (values.max() - values.min()) - 1
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    return logits / logits.sum(axis=1, keepdims=True)
+
+
+def _sort_labels(labels):
+    try:
+        return sorted(labels, key=float)
+    except ValueError:
+        return sorted(labels)
+
+
+class LinearSentimentModel:
+    """
+    Multinomial logistic regression over hashed TF-IDF features.
+
+    Args:
+        n_features (int, optional): Number of hashed feature columns. Defaults to 2 ** 20.
+        ngram_range (tuple, optional): Smallest and largest n-gram length. Defaults to (1, 2).
+    """
+
+    def __init__(self, n_features=2 ** 20, ngram_range=(1, 2)):
+        self.vectorizer = HashingTfidfVectorizer(n_features, ngram_range)
+        self.labels = None
+        self.class_scores = None
+        self.weights = None
+        self.bias = None
+
+    def fit(self, counts, labels, epochs=5, batch_size=4096, learning_rate=0.05, l2=1e-6,
+            balanced=True, seed=0):
+        """
+        Train the model with mini-batch Adam.
+
+        Args:
+            counts (scipy.sparse.csr_matrix): Term counts from vectorizer.counts().
+            labels (list): The label of each row.
+            epochs (int, optional): Passes over the data. Defaults to 5.
+            batch_size (int, optional): Rows per gradient step. Defaults to 4096.
+            learning_rate (float, optional): Adam step size. Defaults to 0.05.
+            l2 (float, optional): L2 regularization strength. Defaults to 1e-6.
+            balanced (bool, optional): Weight classes inversely to their frequency,
+                so rare (usually negative) labels are not drowned out. Defaults to True.
+            seed (int, optional): Seed of the shuffling. Defaults to 0.
+
+        Returns:
+            LinearSentimentModel: self.
+        """
+        labels = [str(label) for label in labels]
+        self.labels = _sort_labels(set(labels))
+        self.class_scores = label_scores(self.labels)
+        index = {label: i for i, label in enumerate(self.labels)}
+        y = np.array([index[label] for label in labels])
+        num_classes = len(self.labels)
+
+        features = self.vectorizer.fit(counts).weight(counts)
+        class_counts = np.bincount(y, minlength=num_classes)
+        sample_weight = (len(y) / (num_classes * class_counts))[y] if balanced else np.ones(len(y))
+
+        rng = np.random.default_rng(seed)
+        self.weights = np.zeros((self.vectorizer.n_features, num_classes), dtype=np.float32)
+        self.bias = np.zeros(num_classes, dtype=np.float32)
+        moments = [np.zeros_like(self.weights), np.zeros_like(self.weights),
+                   np.zeros_like(self.bias), np.zeros_like(self.bias)]
+        beta1, beta2, eps, step = 0.9, 0.999, 1e-8, 0
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(y))
+            loss = 0.0
+            for start in range(0, len(y), batch_size):
+                batch = order[start:start + batch_size]
+                x, w = features[batch], sample_weight[batch]
+                probabilities = _softmax(x @ self.weights + self.bias)
+                loss -= float(np.sum(w * np.log(probabilities[np.arange(len(batch)), y[batch]] + 1e-12)))
+
+                residual = probabilities
+                residual[np.arange(len(batch)), y[batch]] -= 1
+                residual *= (w / w.sum())[:, None]
+                gradients = [np.asarray(x.T @ residual) + l2 * self.weights, residual.sum(axis=0)]
+
+                step += 1
+                for i, (param, gradient) in enumerate(zip((self.weights, self.bias), gradients)):
+                    m, v = moments[2 * i], moments[2 * i + 1]
+                    m *= beta1
+                    m += (1 - beta1) * gradient
+                    v *= beta2
+                    v += (1 - beta2) * gradient * gradient
+                    m_hat = m / (1 - beta1 ** step)
+                    v_hat = v / (1 - beta2 ** step)
+                    param -= (learning_rate * m_hat / (np.sqrt(v_hat) + eps)).astype(param.dtype)
+            logger.info(f"Epoch {epoch + 1}/{epochs}: loss {loss / sample_weight.sum():.4f}")
+        return self
+
+    def predict_proba(self, texts):
+        """
+        Predict label probabilities.
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            numpy.ndarray: One row of probabilities over self.labels per text.
+        """
+        features = self.vectorizer.transform(texts)
+        return _softmax(np.asarray(features @ self.weights) + self.bias)
+
+    def polarity_probabilities(self, probabilities):
+        """
+        Sum label probabilities into negative, neutral and positive polarity.
+
+        Args:
+            probabilities (numpy.ndarray): Output of predict_proba().
+
+        Returns:
+            numpy.ndarray: One row of (negative, neutral, positive) probabilities per review.
+        """
+        polarity = np.sign(np.round(self.class_scores, 6))
+        return np.stack([probabilities[:, polarity == sign].sum(axis=1) for sign in (-1, 0, 1)], axis=1)
+
+    def predict(self, texts):
+        """
+        Predict sentiment for many reviews at once.
+
+        Score is the expected label score, magnitude the expected absolute
+        label score, and confidence the probability of the most likely
+        polarity (negative, neutral or positive).
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            tuple: Arrays of scores, magnitudes and confidences.
+        """
+        probabilities = self.predict_proba(texts)
+        scores = probabilities @ self.class_scores
+        magnitudes = probabilities @ np.abs(self.class_scores)
+        confidences = self.polarity_probabilities(probabilities).max(axis=1)
+        return scores, magnitudes, confidences
+
+    def score(self, text):
+        """
+        Score a single review; makes the model usable as a cascade scorer.
+
+        Args:
+            text (str): The review text.
+
+        Returns:
+            tuple: A dictionary containing 'score' and 'magnitude', and the confidence.
+        """
+        return self.score_many([text])[0]
+
+    def score_many(self, texts):
+        """
+        Score several reviews with one sparse matrix product.
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            list: (sentiment, confidence) tuples, see score().
+        """
+        scores, magnitudes, confidences = self.predict(texts)
+        return [({'score': float(s), 'magnitude': float(m)}, float(c))
+                for s, m, c in zip(scores, magnitudes, confidences)]
+
+    def predict_rows(self, reviews):
+        """
+        Build sentiment table rows for feedback rows.
+
+        Args:
+            reviews (list): Feedback rows with 'Id' and 'Review' keys.
+
+        Returns:
+            list: Dictionaries with 'Id', 'Score' and 'Magnitude' keys.
+        """
+        if not reviews:
+            return []
+        scores, magnitudes, _ = self.predict([review['Review'] for review in reviews])
+        return [{"Id": review['Id'], "Score": float(s), "Magnitude": float(m)}
+                for review, s, m in zip(reviews, scores, magnitudes)]
+
+    def save(self, path):
+        """
+        Save the model to a compressed .npz file.
+
+        Args:
+            path (str or Path): Destination file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, weights=self.weights, bias=self.bias, idf=self.vectorizer.idf,
+                labels=np.array(self.labels), class_scores=self.class_scores,
+                n_features=self.vectorizer.n_features, ngram_range=np.array(self.vectorizer.ngram_range))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a model saved with save().
+
+        Args:
+            path (str or Path): The model file.
+
+        Returns:
+            LinearSentimentModel: The model.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(int(data['n_features']), tuple(int(n) for n in data['ngram_range']))
+            model.weights = data['weights']
+            model.bias = data['bias']
+            model.vectorizer.idf = data['idf']
+            model.labels = [str(label) for label in data['labels']]
+            model.class_scores = data['class_scores']
+        return model
+
+
+def evaluate_model(model, texts, labels):
+    """
+    Measure a model on labeled reviews.
+
+    Args:
+        model (LinearSentimentModel): The trained model.
+        texts (list): Review texts.
+        labels (list): The label of each review.
+
+    Returns:
+        dict: Label accuracy, polarity accuracy, mean absolute error of the
+            score and the number of reviews.
+    """
+    labels = [str(label) for label in labels]
+    known = [i for i, label in enumerate(labels) if label in model.labels]
+    texts = [texts[i] for i in known]
+    targets = np.array([model.class_scores[model.labels.index(labels[i])] for i in known])
+
+    probabilities = model.predict_proba(texts)
+    predicted_labels = np.array(model.labels)[probabilities.argmax(axis=1)]
+    predicted_polarity = model.polarity_probabilities(probabilities).argmax(axis=1) - 1
+    scores = probabilities @ model.class_scores
+
+    return {
+        'reviews': len(known),
+        'accuracy': float(np.mean(predicted_labels == np.array([labels[i] for i in known]))),
+        'polarity_accuracy': float(np.mean(predicted_polarity == np.sign(np.round(targets, 6)))),
+        'score_mae': float(np.mean(np.abs(scores - targets))),
+    }
+
+
+def read_labeled_csv(path):
+    """
+    Read labeled reviews from a CSV file with Review and Label columns.
+
+    Args:
+        path (str or Path): The CSV file.
+
+    Returns:
+        tuple: Lists of review texts and labels.
+    """
+    texts, labels = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get('Label') not in (None, ""):
+                texts.append(row['Review'])
+                labels.append(row['Label'])
+    return texts, labels
+
+
+def read_labeled_feedback(limit=None):
+    """
+    Read labeled reviews from the feedback table.
+
+    Args:
+        limit (int, optional): Maximum number of rows. Defaults to None.
+
+    Returns:
+        tuple: Lists of review texts and labels.
+    """
+    texts, labels = [], []
+    for page in get_data_pages(config.FEEDBACK_TABLE_NAME, limit=limit, where_clause="Label IS NOT NULL"):
+        texts.extend(row['Review'] for row in page)
+        labels.extend(str(row['Label']) for row in page)
+    return texts, labels
+
+
+def split_holdout(texts, labels, test_size, seed=0):
+    """Shuffle labeled reviews and split off a test set."""
+    order = np.random.default_rng(seed).permutation(len(texts))
+    cut = int(len(texts) * (1 - test_size))
+    train, test = order[:cut], order[cut:]
+    return ([texts[i] for i in train], [labels[i] for i in train],
+            [texts[i] for i in test], [labels[i] for i in test])
+
+
+def train_model(texts, labels, n_features=2 ** 20, epochs=5, test_size=0.1):
+    """
+    Train a model, reporting its metrics on a held-out share of the data.
+
+    Args:
+        texts (list): Review texts.
+        labels (list): The label of each review.
+        n_features (int, optional): Number of hashed feature columns. Defaults to 2 ** 20.
+        epochs (int, optional): Passes over the training data. Defaults to 5.
+        test_size (float, optional): Share of the data held out for evaluation. Defaults to 0.1.
+
+    Returns:
+        tuple: The trained model and its holdout metrics (None without a holdout).
+    """
+    train_texts, train_labels, test_texts, test_labels = split_holdout(texts, labels, test_size)
+    model = LinearSentimentModel(n_features)
+    start = time.perf_counter()
+    model.fit(model.vectorizer.counts(train_texts), train_labels, epochs=epochs)
+    logger.info(f"Trained on {len(train_texts)} reviews in {time.perf_counter() - start:.1f}s")
+
+    metrics = evaluate_model(model, test_texts, test_labels) if test_texts else None
+    if metrics:
+        logger.info(f"Holdout metrics: {metrics}")
+    return model, metrics
+
+
+def score_unprocessed(model, limit=None, page_size=None, backfill=False):
+    """
+    Bulk-score unscored feedback rows with the model and write them to the sentiment table.
+
+    Uses the same page selection as the LLM pipeline under a watermark of
+    its own (LINEAR_WATERMARK_KEY). Reviews scored here are left out by the
+    LLM pipeline afterwards, and vice versa, without either moving the
+    other's watermark.
+
+    Args:
+        model (LinearSentimentModel): The trained model.
+        limit (int, optional): Maximum number of reviews to score. Defaults to None.
+        page_size (int, optional): Rows scored and flushed together. Defaults to config.SENTIMENT_BATCH_SIZE.
+        backfill (bool, optional): Select every unscored review with an anti-join. Defaults to False.
+
+    Returns:
+        dict: Counts of fetched, scored and inserted rows.
+    """
+    watermark = None
+    if not backfill:
+        setup_state_table()
+        watermark = get_watermark(LINEAR_WATERMARK_KEY)
+
+    summary = {'fetched': 0, 'scored': 0, 'inserted': 0}
+    start = time.perf_counter()
+    for page in iter_unprocessed_pages(limit=limit, page_size=page_size, watermark=watermark, backfill=backfill):
+        rows = model.predict_rows(page)
+        flush_results(rows)
+        summary['fetched'] += len(page)
+        summary['scored'] += len(rows)
+        summary['inserted'] += len(rows)
+        if not backfill:
+            set_watermark(LINEAR_WATERMARK_KEY, str(page[-1]['Id']))
+
+    elapsed = time.perf_counter() - start
+    rate = summary['scored'] / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Linear model scored {summary} in {elapsed:.2f}s ({rate:.0f} reviews/s)")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, evaluate or run the local linear sentiment model.")
+    parser.add_argument("command", choices=["train", "evaluate", "score"])
+    parser.add_argument("--model", default=config.SENTIMENT_MODEL_PATH, help="Model file.")
+    parser.add_argument("--csv", help="Read labeled reviews from a CSV file instead of the feedback table.")
+    parser.add_argument("--limit", type=int, help="Maximum number of reviews to read.")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--n-features", type=int, default=2 ** 20)
+    parser.add_argument("--test-size", type=float, default=0.1)
+    parser.add_argument("--page-size", type=int, help="Rows scored per page.")
+    parser.add_argument("--backfill", action="store_true", help="Score every unscored review, ignoring the watermark.")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "score":
+            return score_unprocessed(LinearSentimentModel.load(args.model), args.limit, args.page_size, args.backfill)
+
+        texts, labels = read_labeled_csv(args.csv) if args.csv else read_labeled_feedback(args.limit)
+        if args.command == "train":
+            model, metrics = train_model(texts, labels, args.n_features, args.epochs, args.test_size)
+            model.save(args.model)
+            logger.info(f"Saved model to {args.model}")
+            return metrics
+
+        metrics = evaluate_model(LinearSentimentModel.load(args.model), texts, labels)
+        logger.info(f"Evaluation metrics: {metrics}")
+        return metrics
+
+    except Exception as e:
+        logger.error(f"Error in linear_model {args.command}: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,28 @@
-import ollama
 from src.utils.config import config
 from src.utils.logging import logger
-from src.database import get_data, insert_rows
+from src.utils import metrics
+from src.sentiment.batching import evaluate_batch_with_retries
+from src.sentiment.cache import cached_sentiment, cached_sentiment_batch
+from src.sentiment.clients import get_async_ollama_client, get_ollama_client
+from src.sentiment.parsing import request_sentiment, request_sentiment_async
+from src.sentiment.pipeline import run_sentiment_pipeline
 
+OLLAMA_MODEL = 'phi3:medium-128k'
 
-def evaluate_sentiment_ollama(review):
+
+def _build_messages(review):
     """
-    Evaluates the sentiment of a given review using the phi3:medium-128k model from Ollama.
+    Builds the chat messages used to request a sentiment score for a review.
 
     Args:
         review (str): The review text to analyze.
 
     Returns:
-        dict: A dictionary containing 'score' and 'magnitude'.
+        list: The system and user messages for the chat request.
     """
     prompt = f"Analyze the sentiment of the following review. Respond with a JSON object containing 'score' (a float between -1 and 1, where -1 is very negative and 1 is very positive) and 'magnitude' (a float representing the strength of the sentiment, where 0 is neutral and higher values indicate stronger sentiment):\n\n{review}"
 
-    ollama_response = ollama.chat(model='phi3:medium-128k', messages=[
+    return [
         {
             'role': 'system',
             'content': 'You are a sentiment analysis expert. Analyze the sentiment of the given text and provide a score and magnitude.',
@@ -25,42 +31,138 @@ def evaluate_sentiment_ollama(review):
             'role': 'user',
             'content': prompt,
         },
-    ])
+    ]
+
+
+def _record_usage(response, span):
+    """
+    Records the token usage reported in an Ollama chat response.
 
-    return eval(ollama_response['message']['content'])
+    Args:
+        response (dict): The chat response.
+        span (opentelemetry.trace.Span): The request's span, or None.
+    """
+    metrics.record_llm_tokens(
+        "ollama", OLLAMA_MODEL, response.get('prompt_eval_count'), response.get('eval_count'), span)
 
 
-def perform_sentiment_analysis_ollama(limit=None):
+@cached_sentiment(OLLAMA_MODEL)
+def evaluate_sentiment_ollama(review):
+    """
+    Evaluates the sentiment of a given review using the phi3:medium-128k model from Ollama.
+
+    Args:
+        review (str): The review text to analyze.
+
+    Returns:
+        dict: A dictionary containing 'score' and 'magnitude', or None if the
+            model gave no valid answer.
+    """
+    client = get_ollama_client()
+
+    def complete():
+        with metrics.llm_request("ollama", OLLAMA_MODEL) as span:
+            ollama_response = client.chat(model=OLLAMA_MODEL, messages=_build_messages(review), format='json')
+            _record_usage(ollama_response, span)
+        return ollama_response['message']['content']
+
+    return request_sentiment(complete)
+
+
+@cached_sentiment(OLLAMA_MODEL)
+async def evaluate_sentiment_ollama_async(review, client=None):
+    """
+    Evaluates the sentiment of a given review using the async Ollama client.
+
+    Args:
+        review (str): The review text to analyze.
+        client (ollama.AsyncClient, optional): Client to reuse across calls.
+            The client shared on the running event loop is used if None.
+
+    Returns:
+        dict: A dictionary containing 'score' and 'magnitude', or None if the
+            model gave no valid answer.
+    """
+    client = client or get_async_ollama_client()
+
+    async def complete():
+        with metrics.llm_request("ollama", OLLAMA_MODEL) as span:
+            ollama_response = await client.chat(model=OLLAMA_MODEL, messages=_build_messages(review), format='json')
+            _record_usage(ollama_response, span)
+        return ollama_response['message']['content']
+
+    return await request_sentiment_async(complete)
+
+
+@cached_sentiment_batch(OLLAMA_MODEL)
+async def evaluate_sentiment_ollama_batch_async(reviews, client=None):
+    """
+    Evaluates the sentiment of several reviews with batched Ollama prompts.
+
+    Args:
+        reviews (list): Dictionaries with 'Id' and 'Review' keys.
+        client (ollama.AsyncClient, optional): Client to reuse across calls.
+            The client shared on the running event loop is used if None.
+
+    Returns:
+        dict: Mapping of Id to a dictionary containing 'score' and 'magnitude'.
+    """
+    client = client or get_async_ollama_client()
+
+    async def complete(messages):
+        with metrics.llm_request("ollama", OLLAMA_MODEL) as span:
+            ollama_response = await client.chat(model=OLLAMA_MODEL, messages=messages, format='json')
+            _record_usage(ollama_response, span)
+        return ollama_response['message']['content']
+
+    return await evaluate_batch_with_retries(reviews, complete)
+
+
+def perform_sentiment_analysis_ollama(limit=None, concurrency=None, batch_size=None, backfill=False, cascade_threshold=None, dedup=None, resume=False, shard=None, num_shards=None):
     """
     Performs sentiment analysis on user feedback data using the phi3:medium-128k model from Ollama.
 
+    Unscored reviews are streamed page by page through the async scoring
+    engine and each page is written to the sentiment table as soon as it is
+    scored (see src/sentiment/pipeline.py).
+
     Args:
         limit (int): The number of rows to process for sentiment analysis. If None, all rows are processed.
+        concurrency (int, optional): Maximum number of requests in flight.
+            Defaults to config.SENTIMENT_CONCURRENCY.
+        batch_size (int, optional): Number of reviews packed into each prompt.
+            Defaults to config.SENTIMENT_PROMPT_BATCH_SIZE.
+        backfill (bool, optional): Select every unscored review with an anti-join
+            instead of only the reviews after the stored watermark. Defaults to False.
+        cascade_threshold (float, optional): Use the local cascade scorer for reviews it
+            scores with at least this confidence. Defaults to None (see config.SENTIMENT_CASCADE_ENABLED).
+        dedup (bool, optional): Score only one review per cluster of exact or near-duplicate
+            reviews and copy its result to the others. Defaults to config.DEDUP_ENABLED.
+        resume (bool, optional): Replay the checkpoint journal of an interrupted run
+            and skip the reviews it holds (see src/sentiment/journal.py). Defaults to False.
+        shard (int, optional): Only score the reviews of this shard of the backlog
+            (see src/sentiment/pipeline.py). Defaults to None.
+        num_shards (int, optional): Total number of shards. Required with shard.
+
+    Returns:
+        dict: Counts of fetched, scored and inserted rows.
 
     Raises:
         Exception: An error occurred when performing sentiment analysis.
     """
     try:
-        # Get unprocessed reviews
-        where_clause = f"Id NOT IN (SELECT Id FROM `{config.PROJECT_ID}.{config.DATASET_NAME}.{config.SENTIMENT_TABLE_NAME}`)"
-        unprocessed_reviews = get_data(
-            config.FEEDBACK_TABLE_NAME, limit=limit, where_clause=where_clause)
-
-        results = []
-        for review in unprocessed_reviews:
-            sentiment = evaluate_sentiment_ollama(review['Review'])
-            results.append({
-                "Id": review['Id'],
-                "Score": sentiment['score'],
-                "Magnitude": sentiment['magnitude']
-            })
-
-        if results:
-            success = insert_rows(config.SENTIMENT_TABLE_NAME, results)
-            if not success:
-                logger.error("Failed to insert sentiment results.")
-        else:
-            logger.info("No new rows to process for sentiment analysis.")
+        return run_sentiment_pipeline(
+            evaluate_sentiment_ollama_async,
+            evaluate_batch=evaluate_sentiment_ollama_batch_async,
+            limit=limit,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            backfill=backfill,
+            cascade_threshold=cascade_threshold,
+            dedup=dedup,
+            resume=resume,
+            shard=shard,
+            num_shards=num_shards)
 
     except Exception as e:
         logger.error(f"Error in perform_sentiment_analysis_ollama: {str(e)}")
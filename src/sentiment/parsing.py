@@ -0,0 +1,203 @@
+"""
+This module parses and validates structured sentiment output from the LLMs.
+
+Model output is decoded as JSON (with orjson when it is installed) without
+ever evaluating it as code. Markdown code fences and prose around the JSON
+are tolerated, Python-style dictionaries with single quotes are still
+accepted through ast.literal_eval, and every result is checked to have a
+score between -1 and 1 and a non-negative magnitude. Responses that cannot
+be parsed are re-requested for that review only.
+"""
+
+# file: src/sentiment/parsing.py
+
+import ast
+import json
+import math
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from src.utils.config import config
+from src.utils.logging import sampled_logger
+from src.utils import metrics
+
+CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+
+_decoder = json.JSONDecoder()
+
+
+class SentimentParseError(ValueError):
+    """Raised when model output does not contain a valid sentiment result."""
+
+
+def loads(text):
+    """
+    Decode a JSON document, using orjson when available.
+
+    Args:
+        text (str): The JSON text.
+
+    Returns:
+        The decoded value.
+
+    Raises:
+        ValueError: If the text is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _candidates(content):
+    """Yield the whole output first, then the contents of any code fences."""
+    yield content
+    for match in CODE_FENCE.finditer(content):
+        yield match.group(1)
+
+
+def extract_json(content, types=(dict, list)):
+    """
+    Extract the first JSON value of the given types from model output.
+
+    The whole output is tried first, then the contents of markdown code
+    fences, then every '{' or '[' in the text in order, so JSON embedded in
+    prose is found as well. Python literals (single-quoted dictionaries) are
+    accepted as a last resort.
+
+    Args:
+        content (str): Raw model output.
+        types (tuple, optional): Accepted types of the decoded value.
+            Defaults to (dict, list).
+
+    Returns:
+        The decoded value, or None if no value of the given types was found.
+    """
+    if not isinstance(content, str):
+        return None
+
+    for candidate in _candidates(content):
+        candidate = candidate.strip()
+        try:
+            value = loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, types):
+            return value
+
+    starts = "".join(opening for opening, kind in (("{", dict), ("[", list)) if kind in types)
+    for index, char in enumerate(content):
+        if char in starts:
+            try:
+                value, _ = _decoder.raw_decode(content, index)
+            except ValueError:
+                continue
+            if isinstance(value, types):
+                return value
+
+    try:
+        value = ast.literal_eval(content.strip())
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, types) else None
+
+
+def validate_sentiment(item):
+    """
+    Validate a decoded sentiment result.
+
+    Keys are matched case-insensitively.
+
+    Args:
+        item: The decoded value, expected to be a dictionary with 'score' and 'magnitude'.
+
+    Returns:
+        dict: A dictionary containing float 'score' and 'magnitude', or None
+            if a key is missing or a value is out of range or not finite.
+    """
+    if not isinstance(item, dict):
+        return None
+    lowered = {str(key).lower(): value for key, value in item.items()}
+    try:
+        score = float(lowered['score'])
+        magnitude = float(lowered['magnitude'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if -1 <= score <= 1 and magnitude >= 0 and math.isfinite(magnitude):
+        return {'score': score, 'magnitude': magnitude}
+    return None
+
+
+def parse_sentiment(content):
+    """
+    Parse a single-review sentiment response.
+
+    Args:
+        content (str): Raw model output.
+
+    Returns:
+        dict: A dictionary containing 'score' and 'magnitude'.
+
+    Raises:
+        SentimentParseError: If the output holds no valid sentiment result.
+    """
+    value = extract_json(content, types=(dict,))
+    # Models in JSON mode sometimes wrap the result, e.g. {"sentiment": {...}}
+    if isinstance(value, dict) and 'score' not in {str(key).lower() for key in value}:
+        value = next((nested for nested in value.values() if isinstance(nested, dict)), value)
+    sentiment = validate_sentiment(value)
+    if sentiment is None:
+        raise SentimentParseError(f"No valid sentiment in model output: {str(content)[:200]!r}")
+    return sentiment
+
+
+def request_sentiment(complete, max_retries=None):
+    """
+    Request and parse a single-review sentiment result, re-requesting unparsable answers.
+
+    Args:
+        complete (callable): Function that sends the request and returns the model's text response.
+        max_retries (int, optional): Number of re-requests after an unparsable answer.
+            Defaults to config.SENTIMENT_PARSE_MAX_RETRIES.
+
+    Returns:
+        dict: A dictionary containing 'score' and 'magnitude', or None if no
+            valid answer was received.
+    """
+    max_retries = config.SENTIMENT_PARSE_MAX_RETRIES if max_retries is None else max_retries
+    for attempt in range(max_retries + 1):
+        try:
+            return parse_sentiment(complete())
+        except SentimentParseError as e:
+            metrics.PARSE_FAILURES.labels(mode="single").inc()
+            sampled_logger.warning("Attempt %d: %s", attempt + 1, e)
+    sampled_logger.error("Giving up on review after %d retries", max_retries)
+    return None
+
+
+async def request_sentiment_async(complete, max_retries=None):
+    """
+    Async version of request_sentiment.
+
+    Args:
+        complete (callable): Coroutine function that sends the request and
+            returns the model's text response.
+        max_retries (int, optional): Number of re-requests after an unparsable answer.
+            Defaults to config.SENTIMENT_PARSE_MAX_RETRIES.
+
+    Returns:
+        dict: A dictionary containing 'score' and 'magnitude', or None if no
+            valid answer was received.
+    """
+    max_retries = config.SENTIMENT_PARSE_MAX_RETRIES if max_retries is None else max_retries
+    for attempt in range(max_retries + 1):
+        try:
+            return parse_sentiment(await complete())
+        except SentimentParseError as e:
+            metrics.PARSE_FAILURES.labels(mode="single").inc()
+            sampled_logger.warning("Attempt %d: %s", attempt + 1, e)
+    sampled_logger.error("Giving up on review after %d retries", max_retries)
+    return None
@@ -0,0 +1,456 @@
+"""
+This module implements the streaming sentiment analysis pipeline.
+
+Unscored reviews are paged out of the feedback table, each page is scored by
+the async scoring engine and the results are flushed to the sentiment table
+before the next page is processed. Memory use is bounded by the page size
+(config.SENTIMENT_BATCH_SIZE) regardless of the size of the backlog, and a
+failure part-way through only loses the page being scored.
+
+Unscored reviews are selected incrementally: feedback rows are read in Id
+order and the highest flushed Id is stored as a watermark in the processing
+state table, so a run only reads rows past the watermark instead of
+anti-joining the whole feedback and sentiment tables. Rows past the
+watermark that already have a score, e.g. because a backfill scored them
+without moving the watermark, are still left out with an anti-join limited
+to the Ids past the watermark. The full anti-join is used for the very first
+run and for explicit backfills, which pick up rows that arrived with Ids
+below the watermark or that could not be scored.
+
+Ids are STRING columns but are numbers in practice, and "100000" < "99999"
+as strings, so Ids are ordered by their length first and then by value
+(ID_ORDER). That is numeric order for numeric Ids without leading zeros
+and a total order for any other Ids.
+
+With deduplication enabled (see src/sentiment/dedup.py), only one review per
+cluster of exact or near-duplicate reviews is scored and its result is
+copied to the other members; members whose representative could not be
+scored are scored on their own. With the cascade enabled (see
+src/sentiment/cascade.py), the remaining reviews are first scored by a fast
+local scorer and only the ones it is unsure about are sent to the LLM.
+
+The backlog can be split into shards by a hash of the Id (see
+shard_where_clause()) that are scored by independent runs, e.g. the mapped
+tasks of dags/feedback_dag.py. Each shard has its own watermark and journal.
+
+LLM results are appended to a checkpoint journal (see
+src/sentiment/journal.py) as they complete and the journal is cleared once
+their page is flushed. A run started with resume=True replays the results of
+an interrupted page into the sentiment table and does not score them again.
+
+Every page runs in a "sentiment.page" trace span and the row counts and
+throughput of a run are recorded in src/utils/metrics.py, which is served on
+config.METRICS_PORT and/or written to config.METRICS_TEXTFILE when the run ends.
+"""
+
+# file: src/sentiment/pipeline.py
+
+import asyncio
+import time
+
+from src.utils.config import config
+from src.utils.logging import logger
+from src.utils import metrics
+from src.database import get_data, get_data_pages, get_watermark, insert_rows, run_query, set_watermark, setup_state_table
+from src.database.operations import sql_string_literal
+from src.sentiment.cache import get_sentiment_cache
+from src.sentiment.cascade import get_cascade
+from src.sentiment.dedup import get_deduplicator
+from src.sentiment.clients import get_pool_stats
+from src.sentiment.engine import score_feedback_rows_async
+from src.sentiment.journal import get_journal
+from src.sentiment.rate_limit import get_rate_limiter_stats
+
+WATERMARK_KEY = "sentiment"
+
+# Ids are ordered by length first, so numeric Ids sort numerically
+ID_ORDER = "LENGTH(Id), Id"
+
+
+def id_after_clause(watermark):
+    """
+    Build the condition selecting Ids that come after the watermark in ID_ORDER.
+
+    Args:
+        watermark (str): The last Id that was processed.
+
+    Returns:
+        str: The condition.
+    """
+    watermark = str(watermark)
+    length = len(watermark)
+    literal = sql_string_literal(watermark)
+    return f"(LENGTH(Id) > {length} OR (LENGTH(Id) = {length} AND Id > {literal}))"
+
+
+def unprocessed_where_clause(watermark=None):
+    """
+    Build the WHERE clause selecting feedback rows without a sentiment score.
+
+    Args:
+        watermark (str, optional): Only select rows with Ids after it in
+            ID_ORDER, and only anti-join the sentiment rows past it. Defaults to None.
+
+    Returns:
+        str: The WHERE clause.
+    """
+    sentiment_ids = f"SELECT Id FROM `{config.PROJECT_ID}.{config.DATASET_NAME}.{config.SENTIMENT_TABLE_NAME}`"
+    if watermark is None:
+        return f"Id NOT IN ({sentiment_ids})"
+    after_watermark = id_after_clause(watermark)
+    return f"{after_watermark} AND Id NOT IN ({sentiment_ids} WHERE {after_watermark})"
+
+
+def shard_where_clause(shard, num_shards):
+    """
+    Build the WHERE clause selecting the feedback rows of one shard.
+
+    Rows are assigned to shards by a fingerprint of their Id, so every row
+    belongs to exactly one shard for a given number of shards.
+
+    Args:
+        shard (int): Index of the shard, from 0 to num_shards - 1.
+        num_shards (int): Total number of shards.
+
+    Returns:
+        str: The WHERE clause.
+
+    Raises:
+        ValueError: If shard is not between 0 and num_shards - 1.
+    """
+    shard, num_shards = int(shard), int(num_shards)
+    if not 0 <= shard < num_shards:
+        raise ValueError(f"Shard {shard} is out of range for {num_shards} shards.")
+    # MOD before ABS: ABS overflows on the smallest INT64 fingerprint
+    return f"ABS(MOD(FARM_FINGERPRINT(Id), {num_shards})) = {shard}"
+
+
+def shard_watermark_key(shard, num_shards, watermark_key=WATERMARK_KEY):
+    """
+    Return the name under which the watermark of a shard is stored.
+
+    The number of shards is part of the name, so changing it starts new
+    watermarks (selected with the anti-join) instead of reusing ones that
+    cover different rows.
+
+    Args:
+        shard (int): Index of the shard.
+        num_shards (int): Total number of shards.
+        watermark_key (str, optional): Name of the unsharded watermark. Defaults to WATERMARK_KEY.
+
+    Returns:
+        str: The watermark name, e.g. "sentiment_shard_0_of_4".
+    """
+    return f"{watermark_key}_shard_{int(shard)}_of_{int(num_shards)}"
+
+
+def count_unprocessed_by_shard(num_shards):
+    """
+    Count the feedback rows without a sentiment score in each shard.
+
+    Args:
+        num_shards (int): Total number of shards.
+
+    Returns:
+        dict: Mapping of shard index to number of unscored rows. Shards
+            without unscored rows are left out.
+    """
+    num_shards = int(num_shards)
+    rows = run_query(f"""
+        SELECT ABS(MOD(FARM_FINGERPRINT(Id), {num_shards})) AS Shard, COUNT(*) AS Backlog
+        FROM `{config.PROJECT_ID}.{config.DATASET_NAME}.{config.FEEDBACK_TABLE_NAME}`
+        WHERE {unprocessed_where_clause()}
+        GROUP BY Shard
+    """, use_cache=False)
+    return {int(row['Shard']): int(row['Backlog']) for row in rows}
+
+
+def verify_sentiment_results():
+    """
+    Check the sentiment table after a (sharded) run.
+
+    Returns:
+        dict: Number of rows in the sentiment table ('rows'), of Ids
+            scored more than once ('duplicates') and of feedback rows still
+            without a score ('unscored').
+    """
+    sentiment_table = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.SENTIMENT_TABLE_NAME}`"
+    feedback_table = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.FEEDBACK_TABLE_NAME}`"
+    row = run_query(f"""
+        SELECT
+            (SELECT COUNT(*) FROM {sentiment_table}) AS rows,
+            (SELECT COUNT(*) - COUNT(DISTINCT Id) FROM {sentiment_table}) AS duplicates,
+            (SELECT COUNT(*) FROM {feedback_table} WHERE {unprocessed_where_clause()}) AS unscored
+    """, use_cache=False)[0]
+    return {key: int(value) for key, value in row.items()}
+
+
+def merge_shard_summaries(summaries):
+    """
+    Add up the summaries of sharded runs and check the sentiment table.
+
+    Args:
+        summaries (list): Summaries returned by the runs of the shards.
+
+    Returns:
+        dict: Total counts of fetched, scored and inserted rows, followed by
+            the checks of verify_sentiment_results().
+
+    Raises:
+        ValueError: If a review was scored more than once.
+    """
+    summaries = list(summaries or [])
+    totals = {key: sum(summary.get(key, 0) for summary in summaries) for key in ('fetched', 'scored', 'inserted')}
+    report = verify_sentiment_results()
+    if report['duplicates']:
+        raise ValueError(f"{report['duplicates']} reviews have more than one sentiment row.")
+    return {**totals, **report}
+
+
+def iter_unprocessed_pages(limit=None, page_size=None, watermark=None, backfill=False, shard=None, num_shards=None):
+    """
+    Page through feedback rows that have not been scored yet.
+
+    Args:
+        limit (int, optional): Maximum number of rows to return. Defaults to None.
+        page_size (int, optional): Number of rows per page. Defaults to config.SENTIMENT_BATCH_SIZE.
+        watermark (str, optional): Only rows with Ids after it in ID_ORDER are returned. Defaults to None.
+        backfill (bool, optional): Select every unscored row with the anti-join,
+            ignoring the watermark and Id ordering. Defaults to False.
+        shard (int, optional): Only return the rows of this shard. Defaults to None.
+        num_shards (int, optional): Total number of shards. Required with shard.
+
+    Yields:
+        list: A list of feedback row dictionaries for each page.
+    """
+    conditions = []
+    conditions.append(unprocessed_where_clause(None if backfill else watermark))
+    if shard is not None:
+        conditions.append(shard_where_clause(shard, num_shards))
+
+    yield from get_data_pages(
+        config.FEEDBACK_TABLE_NAME,
+        page_size=page_size or config.SENTIMENT_BATCH_SIZE,
+        limit=limit,
+        where_clause=" AND ".join(conditions),
+        order_by=None if backfill else ID_ORDER)
+
+
+def flush_results(rows):
+    """
+    Write scored rows to the sentiment table.
+
+    Args:
+        rows (list): Dictionaries with 'Id', 'Score' and 'Magnitude' keys.
+
+    Raises:
+        RuntimeError: If the rows could not be inserted. The run is stopped so
+            that the watermark never moves past rows that were not written.
+    """
+    if rows and not insert_rows(config.SENTIMENT_TABLE_NAME, rows):
+        raise RuntimeError("Failed to insert sentiment results.")
+
+
+def replay_journal(journal):
+    """
+    Write the journaled results of an interrupted run to the sentiment table.
+
+    Results whose Id is already in the sentiment table, because the run died
+    after flushing their page but before clearing the journal, are not
+    inserted again. The journal is cleared afterwards.
+
+    Args:
+        journal (CheckpointJournal): The journal of the interrupted run.
+
+    Returns:
+        set: Ids of the journaled results, which must not be scored again.
+    """
+    rows = journal.read()
+    if rows:
+        id_list = ", ".join(sql_string_literal(review_id) for review_id in rows)
+        existing = {str(row['Id']) for row in get_data(
+            config.SENTIMENT_TABLE_NAME, where_clause=f"Id IN ({id_list})", use_cache=False)}
+        missing = [row for review_id, row in rows.items() if review_id not in existing]
+        flush_results(missing)
+        logger.info(f"Replayed {len(missing)} journaled results into the sentiment table "
+                    f"({len(rows) - len(missing)} were already written)")
+    journal.clear()
+    return set(rows)
+
+
+async def run_sentiment_pipeline_async(evaluate, evaluate_batch=None, limit=None, batch_size=None,
+                                       concurrency=None, page_size=None, backfill=False,
+                                       watermark_key=WATERMARK_KEY, cascade_threshold=None, dedup=None,
+                                       resume=False, shard=None, num_shards=None):
+    """
+    Stream unscored reviews through the scoring engine into the sentiment table.
+
+    The next page is fetched while the current one is being scored, and
+    fetching and inserting run in worker threads so they never block the
+    event loop. Outside of backfills the watermark is advanced after every
+    flushed page.
+
+    Args:
+        evaluate (callable): Coroutine function scoring a single review text.
+        evaluate_batch (callable, optional): Coroutine function scoring a list of feedback rows.
+        limit (int, optional): Maximum number of reviews to process. Defaults to None.
+        batch_size (int, optional): Number of reviews per prompt.
+        concurrency (int, optional): Maximum number of requests in flight.
+        page_size (int, optional): Number of rows fetched, scored and flushed
+            together. Defaults to config.SENTIMENT_BATCH_SIZE.
+        backfill (bool, optional): Use the anti-join instead of the watermark
+            to find unscored rows. Defaults to False.
+        watermark_key (str, optional): Name under which the watermark is stored.
+            Defaults to WATERMARK_KEY.
+        cascade_threshold (float, optional): Confidence above which the local
+            cascade scorer's result is used instead of the LLM. Enables the
+            cascade; otherwise it runs only if config.SENTIMENT_CASCADE_ENABLED is set.
+        dedup (bool, optional): Score one review per cluster of duplicates.
+            Defaults to config.DEDUP_ENABLED.
+        resume (bool, optional): Replay the journal of an interrupted run and
+            skip the reviews it holds. Otherwise the journal is discarded.
+            Defaults to False.
+        shard (int, optional): Only score the rows of this shard, under a
+            watermark and journal of its own (see shard_watermark_key()).
+            Defaults to None.
+        num_shards (int, optional): Total number of shards. Required with shard.
+
+    Returns:
+        dict: Counts of fetched, scored and inserted rows, of rows scored
+            locally ('offloaded') when the cascade is enabled, of rows
+            filled in from a duplicate ('deduplicated') when dedup is enabled
+            and of journaled rows ('resumed') when resuming.
+    """
+    if shard is not None:
+        if not num_shards:
+            raise ValueError("num_shards is required when a shard is given.")
+        watermark_key = shard_watermark_key(shard, num_shards, watermark_key)
+    metrics.start_metrics_server()
+    cascade = get_cascade(cascade_threshold)
+    deduplicator = get_deduplicator(dedup)
+    journal = get_journal(watermark_key)
+    resumed = set()
+    if journal and resume:
+        resumed = await asyncio.to_thread(replay_journal, journal)
+    elif journal:
+        leftover = await asyncio.to_thread(journal.read)
+        if leftover:
+            logger.warning(f"Discarding {len(leftover)} journaled results of an interrupted run; "
+                           f"resume the run to keep them")
+        journal.clear()
+    watermark = None
+    if not backfill:
+        await asyncio.to_thread(setup_state_table)
+        watermark = await asyncio.to_thread(get_watermark, watermark_key)
+        logger.info(f"Selecting reviews after watermark {watermark!r}" if watermark is not None
+                    else "No watermark stored yet, selecting unscored reviews with an anti-join")
+
+    pages = iter_unprocessed_pages(limit=limit, page_size=page_size, watermark=watermark, backfill=backfill,
+                                   shard=shard, num_shards=num_shards)
+    summary = {'fetched': 0, 'scored': 0, 'inserted': 0}
+    if resume:
+        summary['resumed'] = len(resumed)
+    start = time.perf_counter()
+
+    next_page = asyncio.create_task(asyncio.to_thread(next, pages, None))
+    try:
+        while True:
+            page = await next_page
+            if page is None:
+                break
+            next_page = asyncio.create_task(asyncio.to_thread(next, pages, None))
+
+            pending = page
+            if resumed:
+                pending = [row for row in page if str(row['Id']) not in resumed]
+                resumed.difference_update(str(row['Id']) for row in page)
+
+            with metrics.span("sentiment.page", rows=len(page)) as span:
+                representatives, members = deduplicator.group(pending) if deduplicator else (pending, None)
+                rows, uncertain = cascade.split(representatives) if cascade else ([], representatives)
+                if uncertain:
+                    rows += await score_feedback_rows_async(
+                        uncertain, evaluate, evaluate_batch, batch_size, concurrency, journal=journal)
+                orphans = []
+                if deduplicator:
+                    rows, orphans = deduplicator.fan_out(rows, members)
+                if orphans:
+                    # Their representative could not be scored, so each is scored on its own
+                    logger.info(f"Scoring {len(orphans)} duplicates of reviews that could not be scored")
+                    rows += await score_feedback_rows_async(
+                        orphans, evaluate, evaluate_batch, batch_size, concurrency, journal=journal)
+                metrics.set_span_attribute(span, "llm_rows", len(uncertain) + len(orphans))
+                summary['fetched'] += len(page)
+                summary['scored'] += len(rows)
+                await asyncio.to_thread(flush_results, rows)
+                summary['inserted'] += len(rows)
+            metrics.PIPELINE_ROWS.labels(stage="fetched").inc(len(page))
+            metrics.PIPELINE_ROWS.labels(stage="scored").inc(len(rows))
+            metrics.PIPELINE_ROWS.labels(stage="llm").inc(len(uncertain) + len(orphans))
+
+            if len(rows) < len(pending):
+                logger.warning(f"{len(pending) - len(rows)} reviews could not be scored; run a backfill to retry them")
+            if not backfill:
+                await asyncio.to_thread(set_watermark, watermark_key, str(page[-1]['Id']))
+            if journal:
+                await asyncio.to_thread(journal.clear)
+    finally:
+        if journal:
+            journal.close()
+
+    elapsed = time.perf_counter() - start
+    if deduplicator:
+        stats = deduplicator.stats()
+        summary['deduplicated'] = stats['exact_duplicates'] + stats['near_duplicates'] - stats['orphaned']
+        deduplicator.log_report()
+    if cascade:
+        summary['offloaded'] = cascade.offloaded
+        cascade.log_report()
+    if summary['fetched'] == 0:
+        logger.info("No new rows to process for sentiment analysis.")
+    else:
+        rate = summary['scored'] / elapsed if elapsed > 0 else 0.0
+        metrics.PIPELINE_ROWS_PER_SECOND.set(rate)
+        logger.info(f"Sentiment pipeline finished: {summary} in {elapsed:.2f}s ({rate:.2f} reviews/s)")
+
+    cache = get_sentiment_cache()
+    if cache:
+        logger.info(f"Sentiment cache stats: {cache.stats()}")
+    pool_stats = get_pool_stats()
+    if pool_stats:
+        logger.info(f"LLM connection pool stats: {pool_stats}")
+    rate_limiter_stats = get_rate_limiter_stats()
+    if rate_limiter_stats:
+        logger.info(f"LLM rate limiter stats: {rate_limiter_stats}")
+    metrics.write_metrics_textfile()
+    return summary
+
+
+def run_sentiment_pipeline(evaluate, evaluate_batch=None, limit=None, batch_size=None,
+                           concurrency=None, page_size=None, backfill=False,
+                           watermark_key=WATERMARK_KEY, cascade_threshold=None, dedup=None, resume=False,
+                           shard=None, num_shards=None):
+    """
+    Synchronous entry point for run_sentiment_pipeline_async.
+
+    Args:
+        evaluate (callable): Coroutine function scoring a single review text.
+        evaluate_batch (callable, optional): Coroutine function scoring a list of feedback rows.
+        limit (int, optional): Maximum number of reviews to process. Defaults to None.
+        batch_size (int, optional): Number of reviews per prompt.
+        concurrency (int, optional): Maximum number of requests in flight.
+        page_size (int, optional): Number of rows fetched, scored and flushed together.
+        backfill (bool, optional): Use the anti-join instead of the watermark. Defaults to False.
+        watermark_key (str, optional): Name under which the watermark is stored.
+        cascade_threshold (float, optional): Confidence threshold of the local cascade scorer.
+        dedup (bool, optional): Score one review per cluster of duplicates. Defaults to config.DEDUP_ENABLED.
+        resume (bool, optional): Replay the journal of an interrupted run. Defaults to False.
+        shard (int, optional): Only score the rows of this shard. Defaults to None.
+        num_shards (int, optional): Total number of shards. Required with shard.
+
+    Returns:
+        dict: Counts of fetched, scored and inserted rows.
+    """
+    return asyncio.run(run_sentiment_pipeline_async(
+        evaluate, evaluate_batch, limit, batch_size, concurrency, page_size, backfill, watermark_key,
+        cascade_threshold, dedup, resume, shard, num_shards))
@@ -0,0 +1,221 @@
+"""
+This module plans a sentiment analysis run without calling the LLM.
+
+The unscored backlog is paged out of the feedback table the same way the
+pipeline selects it, every review's tokens are counted and the reviews are
+packed into requests with the same token budget the pipeline uses. From the
+resulting number of requests and tokens the plan estimates the cost of the
+run and its wall-clock time, which is bounded both by the number of
+requests in flight and by the provider's TPM limit.
+
+The plan does not account for the cache, the cascade or deduplication, so
+it is an upper bound of what a run sends to the model.
+
+Usage:
+    python -m src.sentiment.planner --model gpt-3.5-turbo --batch-size 20
+"""
+
+# file: src/sentiment/planner.py
+
+import argparse
+import math
+
+from src.utils.config import config
+from src.utils.logging import logger
+from src.database import get_watermark, setup_state_table
+from src.sentiment.batching import build_batch_messages
+from src.sentiment.pipeline import WATERMARK_KEY, iter_unprocessed_pages
+from src.sentiment.sentiment_analysis import _build_messages
+from src.sentiment.tokens import (
+    OUTPUT_TOKENS_OVERHEAD, OUTPUT_TOKENS_PER_REVIEW, SINGLE_OUTPUT_TOKENS, get_token_counter, pack_token_counts,
+)
+
+# USD per 1K (input, output) tokens
+MODEL_PRICING = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+
+def count_requests(pages, batch_size=None, max_prompt_tokens=None, counter=None):
+    """
+    Count the requests and tokens needed to score pages of reviews.
+
+    With a batch size of 1 every review is sent on its own with the
+    single-review prompt and completion limit, like the pipeline does.
+
+    Args:
+        pages (iterable): Lists of dictionaries with 'Id' and 'Review' keys.
+        batch_size (int, optional): Maximum number of reviews per prompt.
+            Defaults to config.SENTIMENT_PROMPT_BATCH_SIZE.
+        max_prompt_tokens (int, optional): Maximum prompt tokens per request.
+            Defaults to config.SENTIMENT_MAX_PROMPT_TOKENS.
+        counter (TokenCounter, optional): Token counter. Defaults to the
+            counter of config.SENTIMENT_TOKENIZER_MODEL.
+
+    Returns:
+        dict: Numbers of reviews and requests, prompt ('input_tokens') and
+            expected completion ('output_tokens') tokens.
+    """
+    batch_size = batch_size or config.SENTIMENT_PROMPT_BATCH_SIZE
+    max_prompt_tokens = max_prompt_tokens or config.SENTIMENT_MAX_PROMPT_TOKENS
+    counter = counter or get_token_counter()
+    base_tokens = counter.count_messages(build_batch_messages([]))
+
+    totals = {'reviews': 0, 'requests': 0, 'input_tokens': 0, 'output_tokens': 0}
+    for page in pages:
+        if batch_size == 1:
+            totals['reviews'] += len(page)
+            totals['requests'] += len(page)
+            totals['input_tokens'] += sum(counter.count_messages(_build_messages(review['Review'])) for review in page)
+            totals['output_tokens'] += SINGLE_OUTPUT_TOKENS * len(page)
+            continue
+        counts = counter.count_reviews(page)
+        ranges = pack_token_counts(counts, batch_size, max_prompt_tokens, base_tokens)
+        totals['reviews'] += len(page)
+        totals['requests'] += len(ranges)
+        totals['input_tokens'] += base_tokens * len(ranges) + sum(counts)
+        totals['output_tokens'] += OUTPUT_TOKENS_PER_REVIEW * len(page) + OUTPUT_TOKENS_OVERHEAD * len(ranges)
+    return totals
+
+
+def estimate_run(totals, model=None, concurrency=None, tokens_per_minute=None, latency=None,
+                 output_tokens_per_second=None, pricing=None):
+    """
+    Estimate the cost and wall-clock time of a run from its request and token counts.
+
+    Args:
+        totals (dict): Output of count_requests().
+        model (str, optional): Model name used for pricing. Defaults to
+            config.SENTIMENT_TOKENIZER_MODEL.
+        concurrency (int, optional): Maximum number of requests in flight.
+            Defaults to config.SENTIMENT_CONCURRENCY.
+        tokens_per_minute (int, optional): The provider's TPM limit; 0 means
+            unlimited. Defaults to config.OPENAI_TPM_LIMIT.
+        latency (float, optional): Seconds of latency per request before the
+            first completion token. Defaults to config.SENTIMENT_PLAN_LATENCY.
+        output_tokens_per_second (float, optional): Completion tokens generated
+            per second and request. Defaults to config.SENTIMENT_PLAN_OUTPUT_TOKENS_PER_SECOND.
+        pricing (tuple, optional): USD per 1K (input, output) tokens. Defaults
+            to the entry of the model in MODEL_PRICING.
+
+    Returns:
+        dict: The totals plus the model, estimated cost in USD (None if the
+            model's pricing is unknown), the wall-clock time in seconds and
+            whether it is bound by 'concurrency' or 'tpm'.
+    """
+    model = model or config.SENTIMENT_TOKENIZER_MODEL
+    concurrency = concurrency or config.SENTIMENT_CONCURRENCY
+    tokens_per_minute = config.OPENAI_TPM_LIMIT if tokens_per_minute is None else tokens_per_minute
+    latency = config.SENTIMENT_PLAN_LATENCY if latency is None else latency
+    output_tokens_per_second = output_tokens_per_second or config.SENTIMENT_PLAN_OUTPUT_TOKENS_PER_SECOND
+    pricing = pricing or MODEL_PRICING.get(model)
+
+    cost = None
+    if pricing is not None:
+        cost = (totals['input_tokens'] * pricing[0] + totals['output_tokens'] * pricing[1]) / 1000
+
+    request_seconds = totals['requests'] * latency + totals['output_tokens'] / output_tokens_per_second
+    concurrency_seconds = request_seconds / concurrency
+    tpm_seconds = 0.0
+    if tokens_per_minute:
+        tpm_seconds = (totals['input_tokens'] + totals['output_tokens']) * 60 / tokens_per_minute
+
+    return {
+        **totals,
+        'model': model,
+        'cost': cost,
+        'seconds': max(concurrency_seconds, tpm_seconds),
+        'bound_by': 'tpm' if tpm_seconds > concurrency_seconds else 'concurrency',
+    }
+
+
+def plan_sentiment_run(model=None, limit=None, batch_size=None, concurrency=None, backfill=False,
+                       tokens_per_minute=None, page_size=None, pricing=None):
+    """
+    Plan a sentiment analysis run over the current backlog without calling the LLM.
+
+    Args:
+        model (str, optional): Model name used for tokenization and pricing.
+            Defaults to config.SENTIMENT_TOKENIZER_MODEL.
+        limit (int, optional): Maximum number of reviews to plan for. Defaults to None.
+        batch_size (int, optional): Maximum number of reviews per prompt.
+        concurrency (int, optional): Maximum number of requests in flight.
+        backfill (bool, optional): Plan a backfill run instead of a run from
+            the watermark. Defaults to False.
+        tokens_per_minute (int, optional): The provider's TPM limit.
+        page_size (int, optional): Number of rows read per page.
+        pricing (tuple, optional): USD per 1K (input, output) tokens.
+
+    Returns:
+        dict: The plan, see estimate_run().
+
+    Raises:
+        Exception: An error occurred when reading the backlog.
+    """
+    try:
+        watermark = None
+        if not backfill:
+            setup_state_table()
+            watermark = get_watermark(WATERMARK_KEY)
+
+        pages = iter_unprocessed_pages(limit=limit, page_size=page_size, watermark=watermark, backfill=backfill)
+        totals = count_requests(pages, batch_size, counter=get_token_counter(model))
+        return estimate_run(totals, model, concurrency, tokens_per_minute, pricing=pricing)
+
+    except Exception as e:
+        logger.error(f"Error in plan_sentiment_run: {str(e)}")
+        raise
+
+
+def format_plan(plan):
+    """
+    Format a plan for display.
+
+    Args:
+        plan (dict): Output of estimate_run().
+
+    Returns:
+        str: One line per figure of the plan.
+    """
+    cost = "unknown pricing" if plan['cost'] is None else f"${plan['cost']:.2f}"
+    minutes, seconds = divmod(math.ceil(plan['seconds']), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "\n".join([
+        f"Model:          {plan['model']}",
+        f"Reviews:        {plan['reviews']}",
+        f"Requests:       {plan['requests']}",
+        f"Input tokens:   {plan['input_tokens']}",
+        f"Output tokens:  {plan['output_tokens']}",
+        f"Estimated cost: {cost}",
+        f"Wall-clock:     {hours:d}:{minutes:02d}:{seconds:02d} (bound by {plan['bound_by']})",
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the expected requests, tokens, cost and duration of a sentiment run.")
+    parser.add_argument("--model", default=config.SENTIMENT_TOKENIZER_MODEL)
+    parser.add_argument("--limit", type=int, help="Maximum number of reviews to plan for.")
+    parser.add_argument("--batch-size", type=int, help="Maximum number of reviews per prompt.")
+    parser.add_argument("--concurrency", type=int, help="Maximum number of requests in flight.")
+    parser.add_argument("--tpm", type=int, help="Provider tokens-per-minute limit.")
+    parser.add_argument("--backfill", action="store_true", help="Plan for every unscored review, ignoring the watermark.")
+    parser.add_argument("--input-price", type=float, help="USD per 1K input tokens.")
+    parser.add_argument("--output-price", type=float, help="USD per 1K output tokens.")
+    args = parser.parse_args(argv)
+
+    pricing = None
+    if args.input_price is not None or args.output_price is not None:
+        pricing = (args.input_price or 0.0, args.output_price or 0.0)
+
+    plan = plan_sentiment_run(args.model, args.limit, args.batch_size, args.concurrency, args.backfill,
+                              args.tpm, pricing=pricing)
+    print(format_plan(plan))
+    return plan
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+This module implements the adaptive rate limiter of the LLM calls.
+
+Requests to a provider pass through an AdaptiveRateLimiter that caps the
+number of requests in flight. The cap follows an AIMD (additive increase,
+multiplicative decrease) rule: it grows by one per window of successful
+requests while the provider's x-ratelimit-remaining-* headers show
+headroom, and is cut by config.LLM_RATE_DECREASE_FACTOR when the headroom
+runs low or a 429 arrives. A 429 also pauses every caller for the
+Retry-After time (or until the reported reset) and the request is retried
+instead of failing the run.
+
+Response headers are read at the transport of the provider's shared
+connection pool (see src/sentiment/clients.py), so every response counts,
+including the ones the OpenAI SDK retries on its own.
+"""
+
+# file: src/sentiment/rate_limit.py
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import sampled_logger
+from src.sentiment.clients import add_response_hook
+
+openai = lazy_import("openai")
+
+# Window of the request and token rate estimates, in seconds
+RATE_WINDOW = 60.0
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+
+def parse_duration(value):
+    """
+    Parse a rate-limit reset or Retry-After header value.
+
+    Args:
+        value (str): Seconds (e.g. "2") or a duration such as "1m30s" or "250ms".
+
+    Returns:
+        float: The duration in seconds, or None if it could not be parsed.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD concurrency limiter for one provider.
+
+    Args:
+        name (str): Provider name used in logs.
+        initial_concurrency (int, optional): Starting number of requests in
+            flight. Defaults to config.LLM_RATE_INITIAL_CONCURRENCY.
+        max_concurrency (int, optional): Upper bound of the concurrency.
+            Defaults to config.LLM_RATE_MAX_CONCURRENCY.
+        headroom (float, optional): Share of the request or token limit that
+            must remain for the concurrency to grow; below it the concurrency
+            is cut. Defaults to config.LLM_RATE_HEADROOM.
+        decrease_factor (float, optional): Factor applied to the concurrency
+            on throttling. Defaults to config.LLM_RATE_DECREASE_FACTOR.
+        max_retries (int, optional): Retries of a request rejected with a 429.
+            Defaults to config.LLM_RATE_MAX_RETRIES.
+    """
+
+    def __init__(self, name, initial_concurrency=None, max_concurrency=None, headroom=None,
+                 decrease_factor=None, max_retries=None):
+        self.name = name
+        self.max_concurrency = max_concurrency or config.LLM_RATE_MAX_CONCURRENCY
+        self.limit = float(min(initial_concurrency or config.LLM_RATE_INITIAL_CONCURRENCY, self.max_concurrency))
+        self.headroom = config.LLM_RATE_HEADROOM if headroom is None else headroom
+        self.decrease_factor = decrease_factor or config.LLM_RATE_DECREASE_FACTOR
+        self.max_retries = config.LLM_RATE_MAX_RETRIES if max_retries is None else max_retries
+
+        self.in_flight = 0
+        self.throttle_events = 0
+        self.increases = 0
+        self.decreases = 0
+        self.paused_until = 0.0
+        self.last_throttle = 0.0
+        self._last_decrease = 0.0
+        self._window = deque()  # (finish time, tokens) of completed requests
+        self.remaining = {}
+        self.limits = {}
+
+        self._lock = threading.Lock()
+        self._condition = None
+        self._loop = None
+
+    def _get_condition(self):
+        # The limiter outlives pipeline runs, each with its own event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    def _low_headroom(self):
+        """Return True if less than the headroom share of any reported limit remains."""
+        return any(self.remaining.get(kind) is not None and self.limits.get(kind)
+                   and self.remaining[kind] < self.headroom * self.limits[kind]
+                   for kind in ('requests', 'tokens'))
+
+    def _decrease(self, now):
+        """Cut the concurrency, at most once per second so one burst of 429s counts once. Caller holds the lock."""
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit * self.decrease_factor)
+        self.decreases += 1
+
+    def throttle(self, delay=None):
+        """
+        Register a rate-limit rejection: cut the concurrency and pause all callers.
+
+        Args:
+            delay (float, optional): Seconds to pause, e.g. from Retry-After.
+                Defaults to config.LLM_RATE_DEFAULT_BACKOFF.
+        """
+        now = time.monotonic()
+        delay = config.LLM_RATE_DEFAULT_BACKOFF if delay is None else delay
+        with self._lock:
+            self.throttle_events += 1
+            self.last_throttle = now
+            self._decrease(now)
+            self.paused_until = max(self.paused_until, now + delay)
+            limit = self.limit
+        sampled_logger.warning("Rate limited by %s; pausing %.1fs, concurrency lowered to %d", self.name, delay, int(limit))
+
+    def observe(self, status_code, headers):
+        """
+        Update the limiter from a provider response.
+
+        Args:
+            status_code (int): HTTP status of the response.
+            headers (Mapping): Response headers.
+        """
+        if status_code == 429:
+            delay = parse_duration(headers.get('retry-after'))
+            self.throttle(parse_duration(headers.get('x-ratelimit-reset-requests')) if delay is None else delay)
+            return
+
+        with self._lock:
+            for kind in ('requests', 'tokens'):
+                remaining = _header_int(headers, f'x-ratelimit-remaining-{kind}')
+                if remaining is None:
+                    continue
+                self.remaining[kind] = remaining
+                self.limits[kind] = _header_int(headers, f'x-ratelimit-limit-{kind}') or self.limits.get(kind)
+                if remaining == 0:
+                    # Out of budget: hold new requests until the window resets
+                    reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                    if reset:
+                        self.paused_until = max(self.paused_until, time.monotonic() + reset)
+            if self._low_headroom():
+                self._decrease(time.monotonic())
+
+    def observe_response(self, response):
+        """Update the limiter from an httpx response. Used as a connection pool response hook."""
+        self.observe(response.status_code, response.headers)
+
+    def _release(self, tokens, succeeded):
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            self._window.append((now, tokens))
+            while self._window and self._window[0][0] < now - RATE_WINDOW:
+                self._window.popleft()
+            if succeeded and not self._low_headroom() and self.limit < self.max_concurrency:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+                self.increases += 1
+
+    async def _acquire(self):
+        async with self._get_condition():
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    with self._lock:
+                        self.in_flight += 1
+                    return
+                await self._condition.wait()
+
+    async def _notify(self):
+        async with self._get_condition():
+            self._condition.notify_all()
+
+    async def run(self, call, tokens=0):
+        """
+        Run a request under the limiter, retrying it after rate-limit rejections.
+
+        Args:
+            call (callable): Coroutine function sending the request.
+            tokens (int, optional): Tokens of the request, for the token rate. Defaults to 0.
+
+        Returns:
+            The result of call.
+
+        Raises:
+            openai.RateLimitError: If the request is still rejected after max_retries retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            started = time.monotonic()
+            succeeded = False
+            try:
+                result = await call()
+                succeeded = True
+                return result
+            except openai.RateLimitError as e:
+                if self.last_throttle < started:
+                    # The rejection was not seen by the pool's response hook, e.g. with a custom client
+                    self.throttle(parse_duration(e.response.headers.get('retry-after')))
+                if attempt == self.max_retries:
+                    raise
+            finally:
+                self._release(tokens, succeeded)
+                await self._notify()
+
+    def run_sync(self, call, tokens=0):
+        """
+        Synchronous variant of run(). Honors pauses and retries but does not cap concurrency.
+
+        Args:
+            call (callable): Function sending the request.
+            tokens (int, optional): Tokens of the request, for the token rate. Defaults to 0.
+
+        Returns:
+            The result of call.
+
+        Raises:
+            openai.RateLimitError: If the request is still rejected after max_retries retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            with self._lock:
+                self.in_flight += 1
+            started = time.monotonic()
+            succeeded = False
+            try:
+                result = call()
+                succeeded = True
+                return result
+            except openai.RateLimitError as e:
+                if self.last_throttle < started:
+                    self.throttle(parse_duration(e.response.headers.get('retry-after')))
+                if attempt == self.max_retries:
+                    raise
+            finally:
+                self._release(tokens, succeeded)
+
+    def stats(self):
+        """
+        Return the limiter state.
+
+        Returns:
+            dict: Current concurrency limit, requests in flight, request and
+                token rates per minute over the last minute, throttle events,
+                AIMD increases and decreases, the remaining request and token
+                budget last reported by the provider and the seconds left in
+                the current pause.
+        """
+        now = time.monotonic()
+        with self._lock:
+            recent = [(finished, tokens) for finished, tokens in self._window if finished >= now - RATE_WINDOW]
+            return {
+                'concurrency': int(self.limit),
+                'in_flight': self.in_flight,
+                'requests_per_minute': len(recent) * 60 / RATE_WINDOW,
+                'tokens_per_minute': sum(tokens for _, tokens in recent) * 60 / RATE_WINDOW,
+                'throttle_events': self.throttle_events,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'remaining_requests': self.remaining.get('requests'),
+                'remaining_tokens': self.remaining.get('tokens'),
+                'paused_for': round(max(0.0, self.paused_until - now), 3),
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """
+    Return the shared adaptive limiter of a provider.
+
+    The limiter is registered as a response hook of the provider's connection
+    pool when it is created.
+
+    Args:
+        provider (str): Provider pool name, e.g. "openai".
+
+    Returns:
+        AdaptiveRateLimiter: The limiter, or None if config.LLM_RATE_LIMIT_ENABLED is not set.
+    """
+    if not config.LLM_RATE_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = AdaptiveRateLimiter(provider)
+            add_response_hook(provider, limiter.observe_response)
+        return limiter
+
+
+def get_rate_limiter_stats():
+    """
+    Return the state of every adaptive limiter.
+
+    Returns:
+        dict: Mapping of provider name to AdaptiveRateLimiter.stats().
+    """
+    with _limiters_lock:
+        return {provider: limiter.stats() for provider, limiter in _limiters.items()}
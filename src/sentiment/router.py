@@ -0,0 +1,306 @@
+"""
+This module routes sentiment requests across several LLM backends.
+
+A run can spread its reviews over any number of Ollama hosts plus the
+OpenAI API. Every request goes to the backend with the lowest expected wait,
+estimated from the backend's in-flight work and an exponentially weighted
+moving average (EWMA) of its observed latency per review. A backend that
+fails, or takes much longer than its EWMA, is put in a cooldown that grows
+with consecutive failures, and the request falls back to the next best
+backend.
+"""
+
+# file: src/sentiment/router.py
+
+import asyncio
+import time
+
+from src.utils.config import config
+from src.utils.logging import logger, sampled_logger
+from src.sentiment.clients import get_async_ollama_client
+from src.sentiment.ollama_sentiment_analysis import (
+    evaluate_sentiment_ollama_async, evaluate_sentiment_ollama_batch_async,
+)
+from src.sentiment.pipeline import run_sentiment_pipeline
+from src.sentiment.sentiment_analysis import evaluate_sentiment_async, evaluate_sentiment_batch_async
+
+
+class Backend:
+    """
+    One LLM endpoint the router can send requests to.
+
+    Args:
+        name (str): Name used in logs and statistics.
+        evaluate (callable): Coroutine function scoring a single review text.
+        evaluate_batch (callable, optional): Coroutine function scoring a list of feedback rows.
+        max_in_flight (int, optional): Maximum number of concurrent requests.
+            Defaults to config.ROUTER_MAX_IN_FLIGHT.
+    """
+
+    def __init__(self, name, evaluate, evaluate_batch=None, max_in_flight=None):
+        self.name = name
+        self.evaluate = evaluate
+        self.evaluate_batch = evaluate_batch
+        self.max_in_flight = max_in_flight or config.ROUTER_MAX_IN_FLIGHT
+        self.in_flight = 0
+        self.in_flight_items = 0
+        self.latency = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def item_latency(self):
+        """Return the EWMA latency per review, or the configured initial estimate."""
+        return config.ROUTER_INITIAL_LATENCY if self.latency is None else self.latency
+
+    def expected_wait(self, num_items):
+        """Estimate how long num_items more reviews would take on this backend."""
+        return (self.in_flight_items + num_items) * self.item_latency() / max(1, self.max_in_flight)
+
+    def timeout(self, num_items):
+        """Return the time after which a request counts as slow, or None before any latency is known."""
+        if self.latency is None:
+            return None
+        return max(config.ROUTER_MIN_TIMEOUT, config.ROUTER_SLOW_FACTOR * self.latency * num_items)
+
+    def is_cooling_down(self, now):
+        return now < self.cooldown_until
+
+    def _observe(self, elapsed, num_items):
+        alpha = config.ROUTER_EWMA_ALPHA
+        sample = elapsed / max(1, num_items)
+        self.latency = sample if self.latency is None else alpha * sample + (1 - alpha) * self.latency
+
+    def record_success(self, elapsed, num_items):
+        self._observe(elapsed, num_items)
+        self.consecutive_failures = 0
+
+    def record_failure(self, elapsed, num_items, now):
+        # Slow and failed requests still update the latency estimate so the
+        # backend is deprioritized once its cooldown ends
+        self._observe(elapsed, num_items)
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.cooldown_until = now + config.ROUTER_COOLDOWN * 2 ** (self.consecutive_failures - 1)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'in_flight': self.in_flight,
+            'latency': self.latency,
+            'cooling_down': self.is_cooling_down(time.monotonic()),
+        }
+
+
+class BackendRouter:
+    """
+    Load balancer with automatic fallback over several backends.
+
+    Args:
+        backends (list): Backend objects to route requests to.
+
+    Raises:
+        ValueError: If no backends are given.
+    """
+
+    def __init__(self, backends):
+        if not backends:
+            raise ValueError("At least one backend is required.")
+        self.backends = backends
+        self._condition = None
+        self._loop = None
+
+    def _choose(self, excluded, num_items):
+        """Pick the free backend with the lowest expected wait, preferring healthy ones."""
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b not in excluded]
+        healthy = [b for b in candidates if not b.is_cooling_down(now)]
+        free = [b for b in healthy or candidates if b.in_flight < b.max_in_flight]
+        if not free:
+            return None
+        return min(free, key=lambda b: b.expected_wait(num_items))
+
+    def _get_condition(self):
+        # The router can be reused by several pipeline runs, each with its own event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    async def _acquire(self, excluded, num_items):
+        """Wait for a backend to become free. Returns None once every backend is excluded."""
+        async with self._get_condition():
+            while True:
+                if all(b in excluded for b in self.backends):
+                    return None
+                backend = self._choose(excluded, num_items)
+                if backend is not None:
+                    backend.in_flight += 1
+                    backend.in_flight_items += num_items
+                    backend.requests += 1
+                    return backend
+                await self._condition.wait()
+
+    async def _release(self, backend, num_items):
+        async with self._get_condition():
+            backend.in_flight -= 1
+            backend.in_flight_items -= num_items
+            self._condition.notify_all()
+
+    async def _route(self, payload, num_items, batch):
+        excluded = {b for b in self.backends if batch and b.evaluate_batch is None}
+        last_error = None
+        while True:
+            backend = await self._acquire(excluded, num_items)
+            if backend is None:
+                raise last_error or RuntimeError("No backend available.")
+            excluded.add(backend)
+
+            start = time.monotonic()
+            try:
+                call = backend.evaluate_batch(payload) if batch else backend.evaluate(payload)
+                result = await asyncio.wait_for(call, backend.timeout(num_items))
+            except Exception as e:
+                now = time.monotonic()
+                backend.record_failure(now - start, num_items, now)
+                if isinstance(e, asyncio.TimeoutError):
+                    e = TimeoutError(f"Backend {backend.name} took longer than {now - start:.1f}s")
+                last_error = e
+                sampled_logger.warning("Backend %s failed: %s; cooling down for %.0fs and falling back",
+                                       backend.name, e, backend.cooldown_until - now)
+            else:
+                backend.record_success(time.monotonic() - start, num_items)
+                return result
+            finally:
+                await self._release(backend, num_items)
+
+    async def evaluate(self, review):
+        """
+        Score a single review on the best available backend.
+
+        Args:
+            review (str): The review text to analyze.
+
+        Returns:
+            dict: A dictionary containing 'score' and 'magnitude'.
+
+        Raises:
+            Exception: The last backend error if every backend failed.
+        """
+        return await self._route(review, 1, batch=False)
+
+    async def evaluate_batch(self, reviews):
+        """
+        Score several reviews with one batched prompt on the best available backend.
+
+        Args:
+            reviews (list): Dictionaries with 'Id' and 'Review' keys.
+
+        Returns:
+            dict: Mapping of Id to a dictionary containing 'score' and 'magnitude'.
+
+        Raises:
+            Exception: The last backend error if every backend failed.
+        """
+        return await self._route(reviews, len(reviews), batch=True)
+
+    def stats(self):
+        """
+        Return routing statistics.
+
+        Returns:
+            dict: Mapping of backend name to its request, failure and
+                in-flight counts, EWMA latency per review and cooldown state.
+        """
+        return {backend.name: backend.stats() for backend in self.backends}
+
+
+def build_default_router(ollama_hosts=None, use_openai=None):
+    """
+    Build a router over the configured Ollama hosts and OpenAI.
+
+    Args:
+        ollama_hosts (list, optional): Ollama server URLs. Defaults to config.OLLAMA_HOSTS.
+        use_openai (bool, optional): Include the OpenAI API. Defaults to
+            config.ROUTER_USE_OPENAI when an API key is configured.
+
+    Returns:
+        BackendRouter: The router.
+
+    Raises:
+        ValueError: If no backend is configured.
+    """
+    ollama_hosts = config.OLLAMA_HOSTS if ollama_hosts is None else ollama_hosts
+    use_openai = (config.ROUTER_USE_OPENAI and bool(config.OPENAI_API_KEY)) if use_openai is None else use_openai
+
+    backends = []
+    for host in ollama_hosts:
+        # Clients are looked up per call because async clients belong to the running event loop
+        backends.append(Backend(
+            f"ollama:{host}",
+            lambda review, host=host: evaluate_sentiment_ollama_async(review, client=get_async_ollama_client(host)),
+            lambda reviews, host=host: evaluate_sentiment_ollama_batch_async(
+                reviews, client=get_async_ollama_client(host))))
+    if use_openai:
+        backends.append(Backend("openai", evaluate_sentiment_async, evaluate_sentiment_batch_async))
+    return BackendRouter(backends)
+
+
+def perform_sentiment_analysis_routed(limit=None, concurrency=None, batch_size=None, backfill=False,
+                                      cascade_threshold=None, dedup=None, resume=False,
+                                      shard=None, num_shards=None, router=None):
+    """
+    Performs sentiment analysis on user feedback data across several backends.
+
+    Args:
+        limit (int): The number of rows to process for sentiment analysis. If None, all rows are processed.
+        concurrency (int, optional): Maximum number of requests in flight. Defaults to the
+            combined max_in_flight of all backends.
+        batch_size (int, optional): Number of reviews packed into each prompt.
+            Defaults to config.SENTIMENT_PROMPT_BATCH_SIZE.
+        backfill (bool, optional): Select every unscored review with an anti-join
+            instead of only the reviews after the stored watermark. Defaults to False.
+        cascade_threshold (float, optional): Use the local cascade scorer for reviews it
+            scores with at least this confidence. Defaults to None (see config.SENTIMENT_CASCADE_ENABLED).
+        dedup (bool, optional): Score only one review per cluster of exact or near-duplicate
+            reviews and copy its result to the others. Defaults to config.DEDUP_ENABLED.
+        resume (bool, optional): Replay the checkpoint journal of an interrupted run
+            and skip the reviews it holds (see src/sentiment/journal.py). Defaults to False.
+        shard (int, optional): Only score the reviews of this shard of the backlog
+            (see src/sentiment/pipeline.py). Defaults to None.
+        num_shards (int, optional): Total number of shards. Required with shard.
+        router (BackendRouter, optional): Router to use. Defaults to build_default_router().
+
+    Returns:
+        dict: Counts of fetched, scored and inserted rows.
+
+    Raises:
+        Exception: An error occurred when performing sentiment analysis.
+    """
+    try:
+        router = router or build_default_router()
+        concurrency = concurrency or sum(backend.max_in_flight for backend in router.backends)
+        logger.info(f"Routing sentiment analysis over {[b.name for b in router.backends]} "
+                    f"with {concurrency} requests in flight")
+
+        summary = run_sentiment_pipeline(
+            router.evaluate,
+            evaluate_batch=router.evaluate_batch,
+            limit=limit,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            backfill=backfill,
+            cascade_threshold=cascade_threshold,
+            dedup=dedup,
+            resume=resume,
+            shard=shard,
+            num_shards=num_shards)
+        logger.info(f"Router stats: {router.stats()}")
+        return summary
+
+    except Exception as e:
+        logger.error(f"Error in perform_sentiment_analysis_routed: {str(e)}")
+        raise
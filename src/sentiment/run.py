@@ -0,0 +1,63 @@
+"""
+This module runs sentiment analysis from the command line.
+
+A run that died part-way through, e.g. because the process was killed or an
+insert failed, is continued with --resume: the results recorded in its
+checkpoint journal are written to the sentiment table and those reviews are
+not sent to the model again (see src/sentiment/journal.py).
+
+Usage:
+    python -m src.sentiment.run --provider openai --batch-size 20
+    python -m src.sentiment.run --provider openai --resume
+    python -m src.sentiment.run --shard 0 --num-shards 4
+"""
+
+# file: src/sentiment/run.py
+
+import argparse
+
+from src.sentiment.ollama_sentiment_analysis import perform_sentiment_analysis_ollama
+from src.sentiment.router import perform_sentiment_analysis_routed
+from src.sentiment.sentiment_analysis import perform_sentiment_analysis
+
+PROVIDERS = {
+    'openai': perform_sentiment_analysis,
+    'ollama': perform_sentiment_analysis_ollama,
+    'router': perform_sentiment_analysis_routed,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score unscored reviews and write them to the sentiment table.")
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), default="openai")
+    parser.add_argument("--limit", type=int, help="Maximum number of reviews to score.")
+    parser.add_argument("--batch-size", type=int, help="Maximum number of reviews per prompt.")
+    parser.add_argument("--concurrency", type=int, help="Maximum number of requests in flight.")
+    parser.add_argument("--backfill", action="store_true", help="Score every unscored review, ignoring the watermark.")
+    parser.add_argument("--cascade-threshold", type=float,
+                        help="Use the local cascade scorer for reviews it scores with at least this confidence.")
+    parser.add_argument("--dedup", action="store_true", default=None, help="Score one review per cluster of duplicates.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Replay the checkpoint journal of an interrupted run instead of discarding it.")
+    parser.add_argument("--shard", type=int, help="Only score this shard of the backlog (0 to --num-shards - 1).")
+    parser.add_argument("--num-shards", type=int, help="Total number of shards. Required with --shard.")
+    args = parser.parse_args(argv)
+    if (args.shard is None) != (args.num_shards is None):
+        parser.error("--shard and --num-shards must be given together")
+
+    summary = PROVIDERS[args.provider](
+        limit=args.limit,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        backfill=args.backfill,
+        cascade_threshold=args.cascade_threshold,
+        dedup=args.dedup,
+        resume=args.resume,
+        shard=args.shard,
+        num_shards=args.num_shards)
+    print(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,126 @@
-import openai
-from google.cloud import bigquery
-from openai import OpenAI
-
 from src.utils.config import config
+from src.utils.lazy import lazy_import
 from src.utils.logging import logger
-from src.database import get_data, insert_rows
+from src.utils import metrics
+from src.sentiment.batching import evaluate_batch_with_retries
+from src.sentiment.cache import cached_sentiment, cached_sentiment_batch
+from src.sentiment.clients import get_async_openai_client, get_openai_client
+from src.sentiment.parsing import request_sentiment, request_sentiment_async
+from src.sentiment.pipeline import run_sentiment_pipeline
+from src.sentiment.rate_limit import get_rate_limiter
+from src.sentiment.tokens import SINGLE_OUTPUT_TOKENS, get_token_counter, get_token_limiter, max_output_tokens
+
+openai = lazy_import("openai")
+
+MODEL = "gpt-3.5-turbo"
+
+def _build_messages(review):
+    """
+    Builds the chat messages used to request a sentiment score for a review.
+
+    Args:
+        review (str): The review text to analyze.
 
+    Returns:
+        list: The system and user messages for the chat completion request.
+    """
+    prompt = f"Analyze the sentiment of the following review. Respond with a JSON object containing 'score' (a float between -1 and 1, where -1 is very negative and 1 is very positive) and 'magnitude' (a float representing the strength of the sentiment, where 0 is neutral and higher values indicate stronger sentiment):\n\n{review}"
+
+    return [
+        {"role": "system", "content": "You are a sentiment analysis expert. Analyze the sentiment of the given text and provide a score and magnitude."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _request_tokens(messages, max_tokens):
+    """
+    Estimates the tokens a chat completion request counts against the TPM limit.
+
+    Args:
+        messages (list): The chat messages of the request.
+        max_tokens (int): The completion token limit of the request.
+
+    Returns:
+        int: The prompt tokens plus the completion token limit.
+    """
+    return get_token_counter(MODEL).count_messages(messages) + max_tokens
+
+def _record_usage(response, span):
+    """
+    Records the token usage reported in a chat completion response.
+
+    Args:
+        response (openai.types.chat.ChatCompletion): The response.
+        span (opentelemetry.trace.Span): The request's span, or None.
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        metrics.record_llm_tokens("openai", MODEL, usage.prompt_tokens, usage.completion_tokens, span)
+
+def _create_completion(client, messages, max_tokens):
+    """
+    Sends a chat completion request under the TPM and adaptive rate limiters.
+
+    Args:
+        client (openai.OpenAI): The client.
+        messages (list): The chat messages of the request.
+        max_tokens (int): The completion token limit of the request.
+
+    Returns:
+        str: The model's text response.
+    """
+    tokens = _request_tokens(messages, max_tokens)
+    token_limiter = get_token_limiter("openai", config.OPENAI_TPM_LIMIT)
+    rate_limiter = get_rate_limiter("openai")
+
+    def call():
+        if token_limiter:
+            token_limiter.acquire(tokens)
+        with metrics.llm_request("openai", MODEL) as span:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
+            )
+            _record_usage(response, span)
+        return response.choices[0].message.content
+
+    return rate_limiter.run_sync(call, tokens) if rate_limiter else call()
+
+async def _create_completion_async(client, messages, max_tokens):
+    """
+    Sends a chat completion request under the TPM and adaptive rate limiters.
+
+    Args:
+        client (openai.AsyncOpenAI): The client.
+        messages (list): The chat messages of the request.
+        max_tokens (int): The completion token limit of the request.
+
+    Returns:
+        str: The model's text response.
+    """
+    tokens = _request_tokens(messages, max_tokens)
+    token_limiter = get_token_limiter("openai", config.OPENAI_TPM_LIMIT)
+    rate_limiter = get_rate_limiter("openai")
+
+    async def call():
+        if token_limiter:
+            await token_limiter.acquire_async(tokens)
+        with metrics.llm_request("openai", MODEL) as span:
+            response = await client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
+            )
+            _record_usage(response, span)
+        return response.choices[0].message.content
+
+    return await rate_limiter.run(call, tokens) if rate_limiter else await call()
+
+@cached_sentiment(MODEL)
 def evaluate_sentiment(review):
     """
     Evaluates the sentiment of a given review using GPT-3.5.
@@ -14,31 +129,78 @@ def evaluate_sentiment(review):
         review (str): The review text to analyze.
 
     Returns:
-        dict: A dictionary containing 'score' and 'magnitude'.
+        dict: A dictionary containing 'score' and 'magnitude', or None if the
+            model gave no valid answer.
     """
-    prompt = f"Analyze the sentiment of the following review. Respond with a JSON object containing 'score' (a float between -1 and 1, where -1 is very negative and 1 is very positive) and 'magnitude' (a float representing the strength of the sentiment, where 0 is neutral and higher values indicate stronger sentiment):\n\n{review}"
-    
-    client = OpenAI(api_key=config.OPENAI_API_KEY)
+    client = get_openai_client()
+    messages = _build_messages(review)
+    return request_sentiment(lambda: _create_completion(client, messages, SINGLE_OUTPUT_TOKENS))
+
+@cached_sentiment(MODEL)
+async def evaluate_sentiment_async(review, client=None):
+    """
+    Evaluates the sentiment of a given review using GPT-3.5 and the async OpenAI client.
 
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a sentiment analysis expert. Analyze the sentiment of the given text and provide a score and magnitude."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.3,
-        max_tokens=100
-    )
+    Args:
+        review (str): The review text to analyze.
+        client (openai.AsyncOpenAI, optional): Client to reuse across calls.
+            The client shared on the running event loop is used if None.
 
-    return eval(response.choices[0].message.content)
+    Returns:
+        dict: A dictionary containing 'score' and 'magnitude', or None if the
+            model gave no valid answer.
+    """
+    client = client or get_async_openai_client()
+    messages = _build_messages(review)
+    return await request_sentiment_async(lambda: _create_completion_async(client, messages, SINGLE_OUTPUT_TOKENS))
 
-def perform_sentiment_analysis(limit=None):
+@cached_sentiment_batch(MODEL)
+async def evaluate_sentiment_batch_async(reviews, client=None):
+    """
+    Evaluates the sentiment of several reviews with batched GPT-3.5 prompts.
+
+    Args:
+        reviews (list): Dictionaries with 'Id' and 'Review' keys.
+        client (openai.AsyncOpenAI, optional): Client to reuse across calls.
+            The client shared on the running event loop is used if None.
+
+    Returns:
+        dict: Mapping of Id to a dictionary containing 'score' and 'magnitude'.
+    """
+    client = client or get_async_openai_client()
+    max_tokens = max_output_tokens(len(reviews))
+    return await evaluate_batch_with_retries(
+        reviews, lambda messages: _create_completion_async(client, messages, max_tokens))
+
+def perform_sentiment_analysis(limit=None, concurrency=None, batch_size=None, backfill=False, cascade_threshold=None, dedup=None, resume=False, shard=None, num_shards=None):
     """
     Performs sentiment analysis on user feedback data using GPT-3.5.
 
+    Unscored reviews are streamed page by page through the async scoring
+    engine and each page is written to the sentiment table as soon as it is
+    scored (see src/sentiment/pipeline.py).
+
     Args:
         limit (int): The number of rows to process for sentiment
             analysis. If None, all rows are processed.
+        concurrency (int, optional): Maximum number of requests in flight.
+            Defaults to config.SENTIMENT_CONCURRENCY.
+        batch_size (int, optional): Number of reviews packed into each prompt.
+            Defaults to config.SENTIMENT_PROMPT_BATCH_SIZE.
+        backfill (bool, optional): Select every unscored review with an anti-join
+            instead of only the reviews after the stored watermark. Defaults to False.
+        cascade_threshold (float, optional): Use the local cascade scorer for reviews it
+            scores with at least this confidence. Defaults to None (see config.SENTIMENT_CASCADE_ENABLED).
+        dedup (bool, optional): Score only one review per cluster of exact or near-duplicate
+            reviews and copy its result to the others. Defaults to config.DEDUP_ENABLED.
+        resume (bool, optional): Replay the checkpoint journal of an interrupted run
+            and skip the reviews it holds (see src/sentiment/journal.py). Defaults to False.
+        shard (int, optional): Only score the reviews of this shard of the backlog
+            (see src/sentiment/pipeline.py). Defaults to None.
+        num_shards (int, optional): Total number of shards. Required with shard.
+
+    Returns:
+        dict: Counts of fetched, scored and inserted rows.
     
     Raises:
         Exception: An error occurred when performing sentiment analysis.
@@ -46,25 +208,18 @@ def perform_sentiment_analysis(limit=None):
     try:
         openai.api_key = config.OPENAI_API_KEY
 
-        # Get unprocessed reviews
-        where_clause = f"Id NOT IN (SELECT Id FROM `{config.PROJECT_ID}.{config.DATASET_NAME}.{config.SENTIMENT_TABLE_NAME}`)"
-        unprocessed_reviews = get_data(config.FEEDBACK_TABLE_NAME, limit=limit, where_clause=where_clause)
-        
-        results = []
-        for review in unprocessed_reviews:
-            sentiment = evaluate_sentiment(review['Review'])
-            results.append({
-                "Id": review['Id'],
-                "Score": sentiment['score'],
-                "Magnitude": sentiment['magnitude']
-            })
-
-        if results:
-            success = insert_rows(config.SENTIMENT_TABLE_NAME, results)
-            if not success:
-                logger.error("Failed to insert sentiment results.")
-        else:
-            logger.info("No new rows to process for sentiment analysis.")
+        return run_sentiment_pipeline(
+            evaluate_sentiment_async,
+            evaluate_batch=evaluate_sentiment_batch_async,
+            limit=limit,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            backfill=backfill,
+            cascade_threshold=cascade_threshold,
+            dedup=dedup,
+            resume=resume,
+            shard=shard,
+            num_shards=num_shards)
 
     except Exception as e:
         logger.error(f"Error in perform_sentiment_analysis: {str(e)}")
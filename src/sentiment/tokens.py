@@ -0,0 +1,314 @@
+"""
+This module implements token accounting for the LLM scorers.
+
+Review tokens are counted up front with tiktoken, and batched prompts are
+packed until they reach a per-request token budget
+(config.SENTIMENT_MAX_PROMPT_TOKENS) instead of a fixed number of reviews,
+so long reviews do not blow up the context and short ones share a request.
+A token-bucket limiter keeps the tokens sent per minute under the
+provider's TPM limit (config.OPENAI_TPM_LIMIT).
+
+When tiktoken or its encoding files are not available, e.g. offline, token
+counts fall back to an estimate of one token per four bytes of UTF-8.
+"""
+
+# file: src/sentiment/tokens.py
+
+import asyncio
+import json
+import math
+import threading
+import time
+from functools import lru_cache
+
+from src.utils.config import config
+from src.utils.logging import logger
+from src.sentiment.batching import build_batch_messages
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is optional
+    tiktoken = None
+
+# Completion tokens reserved per review (one {"Id", "score", "magnitude"} object) and per batch
+OUTPUT_TOKENS_PER_REVIEW = 40
+OUTPUT_TOKENS_OVERHEAD = 20
+# Completion token limit of single-review requests
+SINGLE_OUTPUT_TOKENS = 100
+
+# Chat formatting overhead: tokens per message and tokens priming the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+BYTES_PER_TOKEN = 4
+
+
+def max_output_tokens(num_reviews):
+    """
+    Compute the completion token limit for a batch of reviews.
+
+    Args:
+        num_reviews (int): Number of reviews in the request.
+
+    Returns:
+        int: The max_tokens value to request.
+    """
+    return OUTPUT_TOKENS_PER_REVIEW * num_reviews + OUTPUT_TOKENS_OVERHEAD
+
+
+class TokenCounter:
+    """
+    Counts tokens with the tiktoken encoding of a model.
+
+    Args:
+        model (str, optional): Model whose encoding is used. Defaults to
+            config.SENTIMENT_TOKENIZER_MODEL. Models unknown to tiktoken, such
+            as Ollama models, use the cl100k_base encoding.
+    """
+
+    def __init__(self, model=None):
+        self.model = model or config.SENTIMENT_TOKENIZER_MODEL
+        self.encoding = None
+        if tiktoken is None:
+            logger.warning("tiktoken is not installed; estimating token counts from text length")
+            return
+        try:
+            try:
+                self.encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Could not load tiktoken encoding for {self.model}, estimating token counts: {str(e)}")
+
+    def count(self, text):
+        """
+        Count the tokens of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            int: The number of tokens.
+        """
+        if self.encoding is None:
+            return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_many(self, texts):
+        """
+        Count the tokens of several texts, encoding them in parallel where possible.
+
+        Args:
+            texts (list): The texts.
+
+        Returns:
+            list: The number of tokens of each text.
+        """
+        if self.encoding is None:
+            return [self.count(text) for text in texts]
+        return [len(tokens) for tokens in self.encoding.encode_batch(list(texts), disallowed_special=())]
+
+    def count_messages(self, messages):
+        """
+        Count the prompt tokens of a list of chat messages.
+
+        Args:
+            messages (list): Dictionaries with 'role' and 'content' keys.
+
+        Returns:
+            int: The number of prompt tokens, including the chat formatting overhead.
+        """
+        return TOKENS_PER_REPLY + sum(
+            TOKENS_PER_MESSAGE + self.count(message['role']) + self.count(message['content'])
+            for message in messages)
+
+    def count_reviews(self, reviews):
+        """
+        Count the tokens each review adds to a batched prompt.
+
+        Args:
+            reviews (list): Dictionaries with 'Id' and 'Review' keys.
+
+        Returns:
+            list: The number of tokens of each review's entry in the prompt payload.
+        """
+        # Each review is one element of the JSON array, plus the separator after it
+        items = [json.dumps({"Id": str(review['Id']), "Review": review['Review']}, ensure_ascii=False) + ", "
+                 for review in reviews]
+        return self.count_many(items)
+
+
+def get_token_counter(model=None):
+    """
+    Return the shared token counter of a model.
+
+    Args:
+        model (str, optional): Model name. Defaults to config.SENTIMENT_TOKENIZER_MODEL.
+
+    Returns:
+        TokenCounter: The token counter.
+    """
+    return _token_counter(model or config.SENTIMENT_TOKENIZER_MODEL)
+
+
+@lru_cache(maxsize=None)
+def _token_counter(model):
+    return TokenCounter(model)
+
+
+def pack_token_counts(counts, max_items, max_tokens, base_tokens=0):
+    """
+    Group consecutive items into requests under an item and a token budget.
+
+    Args:
+        counts (list): Token count of each item.
+        max_items (int): Maximum number of items per request.
+        max_tokens (int): Maximum prompt tokens per request. A single item
+            larger than the budget is put in a request of its own.
+        base_tokens (int, optional): Tokens every request pays regardless of
+            its items, e.g. the system prompt. Defaults to 0.
+
+    Returns:
+        list: (start, end) index ranges of the requests, in order.
+    """
+    max_items = max(1, max_items)
+    ranges = []
+    start, tokens = 0, base_tokens
+    for index, count in enumerate(counts):
+        if index > start and (index - start >= max_items or tokens + count > max_tokens):
+            ranges.append((start, index))
+            start, tokens = index, base_tokens
+        tokens += count
+    if start < len(counts):
+        ranges.append((start, len(counts)))
+    return ranges
+
+
+def pack_batches(reviews, max_items, max_tokens=None, counter=None):
+    """
+    Pack reviews into batched prompts under the per-request token budget.
+
+    Args:
+        reviews (list): Dictionaries with 'Id' and 'Review' keys.
+        max_items (int): Maximum number of reviews per prompt.
+        max_tokens (int, optional): Maximum prompt tokens per request.
+            Defaults to config.SENTIMENT_MAX_PROMPT_TOKENS.
+        counter (TokenCounter, optional): Token counter. Defaults to the
+            counter of config.SENTIMENT_TOKENIZER_MODEL.
+
+    Returns:
+        list: A list of lists of reviews, one per prompt.
+    """
+    counter = counter or get_token_counter()
+    max_tokens = max_tokens or config.SENTIMENT_MAX_PROMPT_TOKENS
+    base_tokens = counter.count_messages(build_batch_messages([]))
+    ranges = pack_token_counts(counter.count_reviews(reviews), max_items, max_tokens, base_tokens)
+    return [reviews[start:end] for start, end in ranges]
+
+
+class TokenRateLimiter:
+    """
+    Token bucket limiting the tokens sent per minute.
+
+    The bucket holds up to one minute of tokens and refills continuously.
+    Callers reserve the tokens of a request before sending it and wait until
+    the bucket has covered them, so concurrent callers are spaced out
+    instead of all failing with 429 errors at the start of a minute.
+
+    Args:
+        tokens_per_minute (int): The TPM limit.
+    """
+
+    def __init__(self, tokens_per_minute):
+        self.tokens_per_minute = tokens_per_minute
+        self._available = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.tokens = 0
+        self.requests = 0
+        self.waited = 0.0
+
+    def reserve(self, tokens):
+        """
+        Reserve tokens from the bucket.
+
+        Args:
+            tokens (int): Tokens of the request. Requests larger than the
+                bucket are charged a full bucket.
+
+        Returns:
+            float: Seconds to wait before sending the request.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._updated) * self.tokens_per_minute / 60
+            self._available = min(float(self.tokens_per_minute), self._available + refill)
+            self._updated = now
+            self._available -= tokens
+            delay = max(0.0, -self._available) * 60 / self.tokens_per_minute
+            self.tokens += tokens
+            self.requests += 1
+            self.waited += delay
+        return delay
+
+    def acquire(self, tokens):
+        """
+        Block until tokens may be sent.
+
+        Args:
+            tokens (int): Tokens of the request.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens):
+        """
+        Wait without blocking the event loop until tokens may be sent.
+
+        Args:
+            tokens (int): Tokens of the request.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        """
+        Return the limiter statistics.
+
+        Returns:
+            dict: The TPM limit, tokens and requests admitted and the total
+                seconds callers were delayed.
+        """
+        return {
+            'tokens_per_minute': self.tokens_per_minute,
+            'tokens': self.tokens,
+            'requests': self.requests,
+            'waited': round(self.waited, 3),
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_token_limiter(provider, tokens_per_minute):
+    """
+    Return the shared token limiter of a provider.
+
+    Args:
+        provider (str): Provider name, e.g. "openai".
+        tokens_per_minute (int): The provider's TPM limit. 0 or None disables limiting.
+
+    Returns:
+        TokenRateLimiter: The limiter, or None if limiting is disabled.
+    """
+    if not tokens_per_minute:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None or limiter.tokens_per_minute != tokens_per_minute:
+            limiter = _limiters[provider] = TokenRateLimiter(tokens_per_minute)
+        return limiter
@@ -0,0 +1,55 @@
+"""
+This module implements the counted httpx transports of the provider clients.
+
+They live apart from src/sentiment/clients.py because subclassing httpx
+requires importing it, which clients.py defers until the first client is
+created.
+"""
+
+# file: src/sentiment/transports.py
+
+import httpx
+
+
+class CountingTransport(httpx.HTTPTransport):
+    """httpx transport that records its requests in a PoolStats."""
+
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request):
+        self.stats.start()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = False
+            self.stats.observe(response)
+            return response
+        finally:
+            self.stats.finish(failed)
+
+    def connections(self):
+        return list(self._pool.connections)
+
+
+class AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    """Async httpx transport that records its requests in a PoolStats."""
+
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request):
+        self.stats.start()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = False
+            self.stats.observe(response)
+            return response
+        finally:
+            self.stats.finish(failed)
+
+    def connections(self):
+        return list(self._pool.connections)
@@ -22,9 +22,72 @@ class Config:
         self.FEEDBACK_TABLE_NAME = os.getenv('FEEDBACK_TABLE_NAME')
         self.SENTIMENT_TABLE_NAME = os.getenv('SENTIMENT_TABLE_NAME')
         self.TEMP_TABLE_NAME = os.getenv('TEMP_TABLE_NAME')
+        self.STATE_TABLE_NAME = os.getenv('STATE_TABLE_NAME', 'processing_state')
+        # GCS objects (and generations) already loaded by the incremental ingestion
+        self.MANIFEST_TABLE_NAME = os.getenv('MANIFEST_TABLE_NAME', 'load_manifest')
+        # "truncate" reloads BLOB_NAME into the feedback table; "incremental" loads only new
+        # objects under BLOB_PREFIX (defaults to BLOB_NAME) through TEMP_TABLE_NAME
+        self.INGEST_MODE = os.getenv('INGEST_MODE', 'truncate').lower()
+        self.BLOB_PREFIX = os.getenv('BLOB_PREFIX', self.BLOB_NAME)
+
+        # Storage backend: "bigquery" or "sqlite" (local, see src/database/local_backend.py)
+        self.STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'bigquery').lower()
+        self.LOCAL_DB_PATH = os.getenv(
+            'LOCAL_DB_PATH',
+            str(Path(__file__).resolve().parent.parent.parent / '.cache' / 'local_backend.sqlite3'))
+        self.LOCAL_DATA_DIR = os.getenv(
+            'LOCAL_DATA_DIR',
+            str(Path(__file__).resolve().parent.parent.parent / 'data'))
 
         self.DEFAULT_ROW_LIMIT = int(os.getenv('DEFAULT_ROW_LIMIT', 100))
         self.SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', 1000))
+        self.SENTIMENT_CONCURRENCY = int(os.getenv('SENTIMENT_CONCURRENCY', 8))
+        self.SENTIMENT_PROMPT_BATCH_SIZE = int(os.getenv('SENTIMENT_PROMPT_BATCH_SIZE', 1))
+        self.SENTIMENT_BATCH_MAX_RETRIES = int(os.getenv('SENTIMENT_BATCH_MAX_RETRIES', 2))
+        self.SENTIMENT_PARSE_MAX_RETRIES = int(os.getenv('SENTIMENT_PARSE_MAX_RETRIES', 2))
+        # Token accounting and dry-run planning (see src/sentiment/tokens.py and src/sentiment/planner.py)
+        self.SENTIMENT_TOKENIZER_MODEL = os.getenv('SENTIMENT_TOKENIZER_MODEL', 'gpt-3.5-turbo')
+        self.SENTIMENT_MAX_PROMPT_TOKENS = int(os.getenv('SENTIMENT_MAX_PROMPT_TOKENS', 3000))
+        self.OPENAI_TPM_LIMIT = int(os.getenv('OPENAI_TPM_LIMIT', 0))
+        self.SENTIMENT_PLAN_LATENCY = float(os.getenv('SENTIMENT_PLAN_LATENCY', 0.5))
+        self.SENTIMENT_PLAN_OUTPUT_TOKENS_PER_SECOND = float(os.getenv('SENTIMENT_PLAN_OUTPUT_TOKENS_PER_SECOND', 60))
+        self.SENTIMENT_CASCADE_ENABLED = os.getenv('SENTIMENT_CASCADE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        self.SENTIMENT_CASCADE_THRESHOLD = float(os.getenv('SENTIMENT_CASCADE_THRESHOLD', 0.8))
+        # Local scorer of the cascade: "lexicon" or "linear" (the model at SENTIMENT_MODEL_PATH)
+        self.SENTIMENT_CASCADE_SCORER = os.getenv('SENTIMENT_CASCADE_SCORER', 'lexicon').lower()
+        self.DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        self.DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.8))
+        self.DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', 64))
+        self.DEDUP_BANDS = int(os.getenv('DEDUP_BANDS', 16))
+        self.DEDUP_MAX_INDEX_SIZE = int(os.getenv('DEDUP_MAX_INDEX_SIZE', 500000))
+        self.SENTIMENT_MODEL_PATH = os.getenv(
+            'SENTIMENT_MODEL_PATH',
+            str(Path(__file__).resolve().parent.parent.parent / 'models' / 'sentiment_linear.npz'))
+
+        self.BULK_INSERT_MAX_ROWS = int(os.getenv('BULK_INSERT_MAX_ROWS', 500))
+        self.BULK_INSERT_MAX_BYTES = int(os.getenv('BULK_INSERT_MAX_BYTES', 9 * 1024 * 1024))
+        self.BULK_INSERT_WORKERS = int(os.getenv('BULK_INSERT_WORKERS', 4))
+        self.BULK_INSERT_MAX_RETRIES = int(os.getenv('BULK_INSERT_MAX_RETRIES', 3))
+        self.BULK_LOAD_THRESHOLD = int(os.getenv('BULK_LOAD_THRESHOLD', 10000))
+
+        self.QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        self.QUERY_CACHE_DIR = os.getenv(
+            'QUERY_CACHE_DIR',
+            str(Path(__file__).resolve().parent.parent.parent / '.cache' / 'query_results'))
+        self.QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+        self.SENTIMENT_CACHE_ENABLED = os.getenv('SENTIMENT_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.SENTIMENT_CACHE_PATH = os.getenv(
+            'SENTIMENT_CACHE_PATH',
+            str(Path(__file__).resolve().parent.parent.parent / '.cache' / 'sentiment_cache.sqlite3'))
+        self.SENTIMENT_CACHE_MAX_ENTRIES = int(os.getenv('SENTIMENT_CACHE_MAX_ENTRIES', 1000000))
+
+        # Checkpoint journal of LLM results (see src/sentiment/journal.py)
+        self.SENTIMENT_JOURNAL_ENABLED = os.getenv('SENTIMENT_JOURNAL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.SENTIMENT_JOURNAL_DIR = os.getenv(
+            'SENTIMENT_JOURNAL_DIR',
+            str(Path(__file__).resolve().parent.parent.parent / '.cache' / 'journal'))
+        self.SENTIMENT_JOURNAL_FSYNC = os.getenv('SENTIMENT_JOURNAL_FSYNC', 'false').lower() in ('1', 'true', 'yes')
 
         self.FEEDBACK_SCHEMA = [
             {"name": "Id", "type": "STRING", "mode": "REQUIRED"},
@@ -38,8 +101,57 @@ class Config:
             {"name": "Magnitude", "type": "FLOAT", "mode": "REQUIRED"},
         ]
 
+        self.STATE_SCHEMA = [
+            {"name": "Pipeline", "type": "STRING", "mode": "REQUIRED"},
+            {"name": "Watermark", "type": "STRING", "mode": "NULLABLE"},
+            {"name": "UpdatedAt", "type": "TIMESTAMP", "mode": "REQUIRED"},
+        ]
+
         self.GCS_CSV_PATH = f"gs://{self.BUCKET_NAME}/{self.BLOB_NAME}" if self.BUCKET_NAME and self.BLOB_NAME else None
 
         self.OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+        # Alternative OpenAI-compatible endpoint, e.g. the local emulator in benchmarks/llm_emulator.py
+        self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
+        self.OLLAMA_HOST = os.getenv('OLLAMA_HOST')
+
+        # Shared HTTP connection pools for the LLM clients (see src/sentiment/clients.py)
+        self.LLM_HTTP_MAX_CONNECTIONS = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', 32))
+        self.LLM_HTTP_MAX_KEEPALIVE = int(os.getenv('LLM_HTTP_MAX_KEEPALIVE', 32))
+        self.LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('LLM_HTTP_KEEPALIVE_EXPIRY', 60.0))
+        self.LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv('LLM_HTTP_CONNECT_TIMEOUT', 5.0))
+        self.LLM_HTTP_READ_TIMEOUT = float(os.getenv('LLM_HTTP_READ_TIMEOUT', 120.0))
+        self.LLM_HTTP2 = os.getenv('LLM_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+
+        # Adaptive (AIMD) rate limiting of LLM requests (see src/sentiment/rate_limit.py)
+        self.LLM_RATE_LIMIT_ENABLED = os.getenv('LLM_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.LLM_RATE_INITIAL_CONCURRENCY = int(os.getenv('LLM_RATE_INITIAL_CONCURRENCY', 4))
+        self.LLM_RATE_MAX_CONCURRENCY = int(os.getenv('LLM_RATE_MAX_CONCURRENCY', 64))
+        self.LLM_RATE_HEADROOM = float(os.getenv('LLM_RATE_HEADROOM', 0.1))
+        self.LLM_RATE_DECREASE_FACTOR = float(os.getenv('LLM_RATE_DECREASE_FACTOR', 0.5))
+        self.LLM_RATE_MAX_RETRIES = int(os.getenv('LLM_RATE_MAX_RETRIES', 5))
+        self.LLM_RATE_DEFAULT_BACKOFF = float(os.getenv('LLM_RATE_DEFAULT_BACKOFF', 1.0))
+
+        # Logging (see src/utils/logging.py)
+        self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+        self.LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+        self.LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+        self.LOG_RATE_LIMIT = int(os.getenv('LOG_RATE_LIMIT', 10))
+        self.LOG_RATE_INTERVAL = float(os.getenv('LOG_RATE_INTERVAL', 60.0))
+
+        # Metrics and tracing (see src/utils/metrics.py)
+        self.METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+        self.METRICS_TEXTFILE = os.getenv('METRICS_TEXTFILE')
+        self.TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+        # Multi-backend router (see src/sentiment/router.py)
+        self.OLLAMA_HOSTS = [host.strip() for host in os.getenv('OLLAMA_HOSTS', '').split(',') if host.strip()]
+        self.ROUTER_USE_OPENAI = os.getenv('ROUTER_USE_OPENAI', 'true').lower() in ('1', 'true', 'yes')
+        self.ROUTER_MAX_IN_FLIGHT = int(os.getenv('ROUTER_MAX_IN_FLIGHT', 4))
+        self.ROUTER_EWMA_ALPHA = float(os.getenv('ROUTER_EWMA_ALPHA', 0.2))
+        self.ROUTER_INITIAL_LATENCY = float(os.getenv('ROUTER_INITIAL_LATENCY', 1.0))
+        self.ROUTER_SLOW_FACTOR = float(os.getenv('ROUTER_SLOW_FACTOR', 4.0))
+        self.ROUTER_MIN_TIMEOUT = float(os.getenv('ROUTER_MIN_TIMEOUT', 10.0))
+        self.ROUTER_COOLDOWN = float(os.getenv('ROUTER_COOLDOWN', 30.0))
 
 config = Config()
@@ -0,0 +1,66 @@
+"""
+This module defers the import of heavy dependencies until they are used.
+
+The Google Cloud, OpenAI and Ollama SDKs, pyarrow, numpy and scipy take
+seconds to import together. Modules bind them with lazy_import() instead of
+a plain import, so importing the package, e.g. while Airflow parses a DAG
+file or a CLI prints its help, does not load them until a client is created
+or a function actually needs them.
+"""
+
+# file: src/utils/lazy.py
+
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module stand-in that imports the real module on first attribute access.
+
+    Attributes are looked up on the real module on every access, so patches
+    applied to it later, e.g. in tests, are seen through the stand-in.
+
+    Args:
+        name (str): Full name of the module, e.g. "google.cloud.bigquery".
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = self.__dict__['_lazy_module'] = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_lazy_module'] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """
+    Return a stand-in for a module that is imported on first use.
+
+    Args:
+        name (str): Full name of the module.
+
+    Returns:
+        types.ModuleType: The module if it is already imported, otherwise a LazyModule.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -1,5 +1,64 @@
+"""
+This module provides the project-wide logger.
+
+Records are handed to a background writer thread through a queue
+(QueueHandler/QueueListener), so a worker that logs only pays for putting
+the record on the queue; formatting and writing to the console happen on
+the writer thread. Messages should use lazy %-style arguments
+(logger.info("Scored %d reviews", n)) so they are only formatted when written.
+
+config.LOG_FORMAT selects plain text or one JSON object per line, with any
+`extra` fields of a record included in the JSON. Per-row events in hot loops
+should go through `sampled_logger`, which lets through a limited number of
+records per message template and interval and reports how many it dropped.
+"""
+
+# file: src/utils/logging.py
+
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import threading
+import time
+
+from src.utils.config import config
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes of every LogRecord; anything else on a record was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+# Message templates tracked by a RateLimitedLogger before its windows are reset
+MAX_RATE_LIMITED_TEMPLATES = 1000
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records unformatted; the listener formats them on the writer thread."""
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record needs no pickling-safe copy
+        return record
+
 
 class Logger:
     _instance = None
@@ -15,23 +74,98 @@ class Logger:
     def _configure_logger(self):
         # Configure the logger here
         self._logger = logging.getLogger(self.__class__.__name__)
-        self._logger.setLevel(logging.INFO)
+        self._logger.setLevel(getattr(logging, config.LOG_LEVEL.upper(), logging.INFO))
 
         # Create console handler and set level to debug
         ch = logging.StreamHandler()
         ch.setLevel(logging.DEBUG)
 
         # Create formatter and add it to the handlers
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        formatter = JsonFormatter() if config.LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT)
         ch.setFormatter(formatter)
 
+        # Write from a background thread; callers only enqueue the record
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        if config.LOG_ASYNC:
+            log_queue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(log_queue, ch, respect_handler_level=True)
+            self._listener.start()
+            atexit.register(self.flush)
+            ch = _QueueHandler(log_queue)
+
         # Add the handlers to the logger
         self._logger.addHandler(ch)
 
+    def flush(self):
+        """Block until every queued record has been written."""
+        if self._listener is None:
+            return
+        with self._listener_lock:
+            # Stopping the listener drains the queue; restarting it keeps later records flowing
+            self._listener.stop()
+            self._listener.start()
+
     @property
     def logger(self):
         """Property to access the logger."""
         return self._logger
-    
+
+
+class RateLimitedLogger(logging.LoggerAdapter):
+    """
+    Logger adapter that rate-limits records per message template.
+
+    At most `limit` records with the same level and message template are
+    written every `interval` seconds; the rest are dropped and counted, and
+    the count is appended to the next record of that template that gets through.
+
+    Args:
+        logger (logging.Logger): The logger to write to.
+        limit (int, optional): Records per template and interval. Defaults to
+            config.LOG_RATE_LIMIT; 0 disables rate limiting.
+        interval (float, optional): Window length in seconds. Defaults to config.LOG_RATE_INTERVAL.
+    """
+
+    def __init__(self, logger, limit=None, interval=None):
+        super().__init__(logger, {})
+        self.limit = config.LOG_RATE_LIMIT if limit is None else limit
+        self.interval = config.LOG_RATE_INTERVAL if interval is None else interval
+        self._windows = {}
+        self._window_lock = threading.Lock()
+
+    def _admit(self, key):
+        """Return whether a record may be written and how many were dropped before it."""
+        now = time.monotonic()
+        with self._window_lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is None and len(self._windows) >= MAX_RATE_LIMITED_TEMPLATES:
+                    self._windows.clear()
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                return True, suppressed
+            if window[1] < self.limit:
+                window[1] += 1
+                return True, 0
+            window[2] += 1
+            return False, 0
+
+    def log(self, level, msg, *args, **kwargs):
+        if not self.isEnabledFor(level):
+            return
+        if self.limit:
+            admitted, suppressed = self._admit((level, msg))
+            if not admitted:
+                return
+            if suppressed:
+                msg = (str(msg) if args else str(msg).replace('%', '%%')) + " (%d similar messages suppressed)"
+                args = args + (suppressed,)
+        self.logger.log(level, msg, *args, **kwargs)
+
+
 # Create a logger instance
-logger = Logger().logger
\ No newline at end of file
+logger = Logger().logger
+
+# Rate-limited view of the logger for per-row events in hot loops
+sampled_logger = RateLimitedLogger(logger)
@@ -0,0 +1,263 @@
+"""
+This module collects per-stage metrics and trace spans of the pipeline.
+
+Metrics are Prometheus/OpenMetrics counters and histograms kept in a
+dedicated registry (REGISTRY): query time and rows fetched, insert and load
+latency and row counts, LLM request latency, tokens in and out, parse
+failures and the throughput of the sentiment pipeline. They can be exposed
+on an HTTP endpoint (config.METRICS_PORT) for scraping, or written to a
+textfile (config.METRICS_TEXTFILE) for the node_exporter textfile collector
+at the end of a run, which suits short-lived batch jobs such as Airflow tasks.
+
+With config.TRACING_ENABLED set, the same stages also open OpenTelemetry
+spans. Only the OpenTelemetry API is used; spans are exported by whatever
+tracer provider the process configures and are no-ops otherwise.
+
+prometheus_client and opentelemetry-api are optional: without them every
+metric and span is a no-op.
+"""
+
+# file: src/utils/metrics.py
+
+import contextlib
+import importlib.util
+import threading
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client.openmetrics import exposition as openmetrics
+except ImportError:  # pragma: no cover - prometheus_client is optional
+    prometheus_client = None
+    openmetrics = None
+
+from src.utils.config import config
+from src.utils.lazy import lazy_import
+from src.utils.logging import logger
+
+# Only imported once tracing is enabled and the first span is opened
+trace = lazy_import("opentelemetry.trace") if importlib.util.find_spec("opentelemetry") else None
+
+TRACER_NAME = "user_feedback_analysis"
+
+# Latency buckets in seconds: BigQuery calls and LLM requests range from milliseconds to minutes
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _NoopMetric:
+    """Stands in for a Prometheus metric when metrics are disabled."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+REGISTRY = prometheus_client.CollectorRegistry() if prometheus_client and config.METRICS_ENABLED else None
+
+
+def _metric(kind, name, documentation, labelnames=(), **kwargs):
+    """Create a metric in REGISTRY, or a no-op stand-in if metrics are disabled."""
+    if REGISTRY is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, registry=REGISTRY, **kwargs)
+
+
+QUERY_SECONDS = _metric(
+    "Histogram", "feedback_query_seconds", "Time to run a query until its results are available.",
+    ["mode"], buckets=LATENCY_BUCKETS)
+ROWS_FETCHED = _metric("Counter", "feedback_rows_fetched", "Rows returned by queries.", ["mode"])
+INSERT_SECONDS = _metric(
+    "Histogram", "feedback_insert_seconds", "Time to insert a batch of rows.", ["table"], buckets=LATENCY_BUCKETS)
+ROWS_INSERTED = _metric("Counter", "feedback_rows_inserted", "Rows inserted.", ["table"])
+INSERT_ERRORS = _metric("Counter", "feedback_insert_errors", "Rows rejected by inserts.", ["table"])
+LOAD_SECONDS = _metric(
+    "Histogram", "feedback_load_seconds", "Time to load a CSV file into a table.", ["table"], buckets=LATENCY_BUCKETS)
+ROWS_LOADED = _metric("Counter", "feedback_rows_loaded", "Rows loaded from CSV files.", ["table"])
+
+LLM_REQUEST_SECONDS = _metric(
+    "Histogram", "feedback_llm_request_seconds", "Latency of LLM chat requests.",
+    ["provider", "model"], buckets=LATENCY_BUCKETS)
+LLM_REQUESTS = _metric("Counter", "feedback_llm_requests", "LLM chat requests by outcome.", ["provider", "model", "outcome"])
+LLM_PROMPT_TOKENS = _metric("Counter", "feedback_llm_prompt_tokens", "Prompt tokens sent to the LLM.", ["provider", "model"])
+LLM_COMPLETION_TOKENS = _metric(
+    "Counter", "feedback_llm_completion_tokens", "Completion tokens generated by the LLM.", ["provider", "model"])
+PARSE_FAILURES = _metric(
+    "Counter", "feedback_parse_failures", "Reviews whose LLM answer could not be parsed.", ["mode"])
+
+PIPELINE_ROWS = _metric("Counter", "feedback_pipeline_rows", "Rows handled by the sentiment pipeline.", ["stage"])
+PIPELINE_ROWS_PER_SECOND = _metric(
+    "Gauge", "feedback_pipeline_rows_per_second", "Reviews scored per second by the last sentiment pipeline run.")
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Open a trace span if tracing is enabled.
+
+    Args:
+        name (str): Span name, e.g. "bigquery.query".
+        **attributes: Span attributes.
+
+    Yields:
+        opentelemetry.trace.Span: The span, or None if tracing is disabled.
+    """
+    if trace is None or not config.TRACING_ENABLED:
+        yield None
+        return
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def set_span_attribute(current, key, value):
+    """
+    Set an attribute of a span returned by span(), if there is one.
+
+    Args:
+        current (opentelemetry.trace.Span): The span, or None.
+        key (str): Attribute name.
+        value: Attribute value.
+    """
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+@contextlib.contextmanager
+def timed(histogram, name, **labels):
+    """
+    Time a block into a histogram and a trace span.
+
+    Args:
+        histogram: The histogram to observe the duration in.
+        name (str): Span name.
+        **labels: Histogram labels, also set as span attributes.
+
+    Yields:
+        opentelemetry.trace.Span: The span, or None if tracing is disabled.
+    """
+    with span(name, **labels) as current:
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def llm_request(provider, model):
+    """
+    Time an LLM chat request and count it by outcome.
+
+    Args:
+        provider (str): Provider name, e.g. "openai".
+        model (str): Model name.
+
+    Yields:
+        opentelemetry.trace.Span: The span, or None if tracing is disabled.
+    """
+    with timed(LLM_REQUEST_SECONDS, "llm.chat", provider=provider, model=model) as current:
+        try:
+            yield current
+        except Exception:
+            LLM_REQUESTS.labels(provider, model, "error").inc()
+            raise
+        LLM_REQUESTS.labels(provider, model, "ok").inc()
+
+
+def record_llm_tokens(provider, model, prompt_tokens, completion_tokens, current=None):
+    """
+    Count the tokens of an LLM response.
+
+    Args:
+        provider (str): Provider name.
+        model (str): Model name.
+        prompt_tokens (int): Prompt tokens reported by the provider, or None.
+        completion_tokens (int): Completion tokens reported by the provider, or None.
+        current (opentelemetry.trace.Span, optional): Span to annotate with the token counts.
+    """
+    # Responses without usage, e.g. from streaming or stand-in clients, are skipped
+    if isinstance(prompt_tokens, int) and prompt_tokens > 0:
+        LLM_PROMPT_TOKENS.labels(provider, model).inc(prompt_tokens)
+        set_span_attribute(current, "llm.prompt_tokens", prompt_tokens)
+    if isinstance(completion_tokens, int) and completion_tokens > 0:
+        LLM_COMPLETION_TOKENS.labels(provider, model).inc(completion_tokens)
+        set_span_attribute(current, "llm.completion_tokens", completion_tokens)
+
+
+def render_metrics(openmetrics_format=False):
+    """
+    Render the current metrics.
+
+    Args:
+        openmetrics_format (bool, optional): Use the OpenMetrics exposition
+            format instead of the Prometheus text format. Defaults to False.
+
+    Returns:
+        bytes: The exposition, or an empty string if metrics are disabled.
+    """
+    if REGISTRY is None:
+        return b""
+    if openmetrics_format:
+        return openmetrics.generate_latest(REGISTRY)
+    return prometheus_client.generate_latest(REGISTRY)
+
+
+_server_lock = threading.Lock()
+_server_port = None
+
+
+def start_metrics_server(port=None):
+    """
+    Serve the metrics over HTTP for Prometheus to scrape, once per process.
+
+    Args:
+        port (int, optional): Port to listen on. Defaults to config.METRICS_PORT;
+            0 disables the endpoint.
+
+    Returns:
+        bool: True if the endpoint is running.
+    """
+    global _server_port
+    port = config.METRICS_PORT if port is None else port
+    if REGISTRY is None or not port:
+        return False
+    with _server_lock:
+        if _server_port is None:
+            try:
+                prometheus_client.start_http_server(port, registry=REGISTRY)
+            except OSError as e:
+                logger.error(f"Error in start_metrics_server: {str(e)}")
+                return False
+            _server_port = port
+            logger.info(f"Serving metrics on port {port}")
+    return True
+
+
+def write_metrics_textfile(path=None):
+    """
+    Write the metrics to a textfile for the node_exporter textfile collector.
+
+    The file is written atomically, so a collector never reads a partial file.
+
+    Args:
+        path (str, optional): Path of the .prom file. Defaults to config.METRICS_TEXTFILE.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    path = path or config.METRICS_TEXTFILE
+    if REGISTRY is None or not path:
+        return False
+    try:
+        prometheus_client.write_to_textfile(path, REGISTRY)
+    except OSError as e:
+        logger.error(f"Error in write_metrics_textfile: {str(e)}")
+        return False
+    return True
@@ -0,0 +1,17 @@
+# file: tests/conftest.py
+
+import pytest
+
+from src.utils.config import config
+
+
+@pytest.fixture(autouse=True)
+def disable_sentiment_cache(monkeypatch):
+    """Keep tests from reading or writing the persistent sentiment cache."""
+    monkeypatch.setattr(config, 'SENTIMENT_CACHE_ENABLED', False)
+
+
+@pytest.fixture(autouse=True)
+def isolate_sentiment_journal(tmp_path, monkeypatch):
+    """Keep tests from reading or writing the checkpoint journal of real runs."""
+    monkeypatch.setattr(config, 'SENTIMENT_JOURNAL_DIR', str(tmp_path / 'journal'))
@@ -0,0 +1,71 @@
+# file: tests/test_batching.py
+import asyncio
+import json
+import unittest
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.sentiment.batching import (
+    build_batch_messages,
+    chunk,
+    evaluate_batch_with_retries,
+    parse_batch_response,
+)
+
+
+class TestBatching(unittest.TestCase):
+
+    def test_chunk(self):
+        self.assertEqual(chunk([1, 2, 3, 4, 5], 2), [[1, 2], [3, 4], [5]])
+
+    def test_build_batch_messages_contains_ids(self):
+        messages = build_batch_messages([{'Id': 1, 'Review': 'Great'}, {'Id': '2', 'Review': 'Bad'}])
+        payload = messages[1]['content'].split('\n\n', 1)[1]
+        self.assertEqual(json.loads(payload), [{'Id': '1', 'Review': 'Great'}, {'Id': '2', 'Review': 'Bad'}])
+
+    def test_parse_batch_response_drops_malformed_items(self):
+        content = 'Here you go:\n[{"Id": "1", "score": 0.8, "magnitude": 0.9}, {"Id": "2", "score": 3, "magnitude": 1}, {"Id": "9", "score": 0, "magnitude": 0}, {"Id": 3, "score": -0.5}]'
+        result = parse_batch_response(content, {'1', '2', '3'})
+        self.assertEqual(result, {'1': {'score': 0.8, 'magnitude': 0.9}})
+
+    def test_parse_batch_response_accepts_wrapped_array(self):
+        content = '{"results": [{"Id": "1", "score": -0.2, "magnitude": 0.3}]}'
+        self.assertEqual(parse_batch_response(content, {'1'}), {'1': {'score': -0.2, 'magnitude': 0.3}})
+
+    def test_parse_batch_response_invalid_json(self):
+        self.assertEqual(parse_batch_response('not json at all', {'1'}), {})
+
+    def test_evaluate_batch_resubmits_only_missing_items(self):
+        submitted = []
+
+        async def complete(messages):
+            payload = json.loads(messages[1]['content'].split('\n\n', 1)[1])
+            submitted.append([item['Id'] for item in payload])
+            # The first answer skips review 2
+            return json.dumps([{'Id': item['Id'], 'score': 0.5, 'magnitude': 0.5}
+                               for item in payload if len(submitted) > 1 or item['Id'] != '2'])
+
+        reviews = [{'Id': '1', 'Review': 'a'}, {'Id': '2', 'Review': 'b'}, {'Id': '3', 'Review': 'c'}]
+        result = asyncio.run(evaluate_batch_with_retries(reviews, complete, max_retries=2))
+
+        self.assertEqual(set(result), {'1', '2', '3'})
+        self.assertEqual(submitted, [['1', '2', '3'], ['2']])
+
+    def test_evaluate_batch_gives_up_after_retries(self):
+        calls = 0
+
+        async def complete(messages):
+            nonlocal calls
+            calls += 1
+            return '[]'
+
+        result = asyncio.run(evaluate_batch_with_retries([{'Id': '1', 'Review': 'a'}], complete, max_retries=1))
+        self.assertEqual(result, {})
+        self.assertEqual(calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# file: tests/test_benchmarks.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import json
+import tracemalloc
+
+from benchmarks.fakes import FakeAsyncOpenAI, fake_sentiment
+from benchmarks.run import compare_with_baseline, main, percentile, run_scenario
+from src.sentiment.batching import build_batch_messages
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 0.5) == 50
+    assert percentile(samples, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_fake_llm_answers_batched_prompts():
+    import asyncio
+
+    llm = FakeAsyncOpenAI()
+    messages = build_batch_messages([{'Id': 'a', 'Review': 'x'}, {'Id': 'b', 'Review': 'y'}])
+    response = asyncio.run(llm.chat.completions.create(model="m", messages=messages))
+    results = json.loads(response.choices[0].message.content)['results']
+    assert results == [{'Id': 'a', **fake_sentiment('a')}, {'Id': 'b', **fake_sentiment('b')}]
+
+
+def test_scenario_scores_every_review():
+    tracemalloc.start()
+    try:
+        results = run_scenario(300, latency_scale=0, batch_size=10, concurrency=4, page_size=100)
+    finally:
+        tracemalloc.stop()
+
+    assert set(results) == {'load', 'scan', 'sentiment'}
+    assert results['sentiment']['llm_requests'] == 30
+    assert results['sentiment']['calls']['llm.request']['count'] == 30
+    assert results['scan']['calls']['bigquery.page']['count'] >= 3
+    assert all(result['items_per_second'] > 0 for result in results.values())
+
+
+def test_compare_with_baseline():
+    baseline = {'1000': {'sentiment': {'items_per_second': 100.0, 'peak_mb': 10.0}}}
+    assert compare_with_baseline({'1000': {'sentiment': {'items_per_second': 90.0, 'peak_mb': 11.0}}}, baseline) == []
+
+    regressions = compare_with_baseline(
+        {'1000': {'sentiment': {'items_per_second': 50.0, 'peak_mb': 20.0}}}, baseline)
+    assert len(regressions) == 2
+    assert compare_with_baseline({'5': {'sentiment': {'items_per_second': 1.0, 'peak_mb': 1.0}}}, baseline) == []
+
+
+def test_main_check_against_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "50", "--latency-scale", "0", "--baseline", str(baseline)]
+    assert main(args + ["--update-baseline"]) == 0
+    stored = json.loads(baseline.read_text())
+    stored['50']['sentiment']['items_per_second'] *= 100
+    baseline.write_text(json.dumps(stored))
+    assert main(args + ["--check"]) == 1
@@ -0,0 +1,88 @@
+# file: tests/test_bulk_writer.py
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from unittest.mock import MagicMock, patch
+from src.database import bulk_writer
+from src.database.bulk_writer import split_into_requests, stream_rows, write_rows
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(bulk_writer.time, 'sleep', lambda seconds: None)
+
+
+def test_split_into_requests_by_row_count():
+    rows = [{"Id": str(i)} for i in range(5)]
+    assert split_into_requests(range(5), rows, max_rows=2, max_bytes=10 ** 6) == [[0, 1], [2, 3], [4]]
+
+
+def test_split_into_requests_by_byte_size():
+    rows = [{"Id": str(i), "Review": "x" * 100} for i in range(4)]
+    row_bytes = len(json.dumps(rows[0])) + bulk_writer.ROW_OVERHEAD_BYTES
+    requests = split_into_requests(range(4), rows, max_rows=500, max_bytes=row_bytes * 2)
+    assert requests == [[0, 1], [2, 3]]
+
+
+def test_stream_rows_retries_only_rejected_rows():
+    client = MagicMock()
+    sent = []
+
+    def insert_rows_json(table_id, rows, row_ids):
+        sent.append([row["Id"] for row in rows])
+        if len(sent) == 1:
+            # Row 1 is invalid, row 2 was stopped because of it
+            return [
+                {"index": 1, "errors": [{"reason": "invalid", "message": "bad value"}]},
+                {"index": 2, "errors": [{"reason": "stopped", "message": ""}]},
+            ]
+        return []
+
+    client.insert_rows_json.side_effect = insert_rows_json
+    rows = [{"Id": str(i)} for i in range(3)]
+
+    failed = stream_rows(client, "p.d.t", rows, max_rows=10, max_bytes=10 ** 6, workers=2, max_retries=2)
+
+    assert sent == [["0", "1", "2"], ["2"]]
+    assert [index for index, _ in failed] == [1]
+    # Retried rows keep their insert ids so BigQuery can de-duplicate them
+    first_ids = client.insert_rows_json.call_args_list[0].kwargs["row_ids"]
+    retry_ids = client.insert_rows_json.call_args_list[1].kwargs["row_ids"]
+    assert retry_ids == [first_ids[2]]
+
+
+def test_stream_rows_gives_up_after_retries():
+    client = MagicMock()
+    client.insert_rows_json.side_effect = Exception("timeout")
+
+    failed = stream_rows(client, "p.d.t", [{"Id": "1"}], max_rows=10, max_bytes=10 ** 6, workers=1, max_retries=1)
+
+    assert client.insert_rows_json.call_count == 2
+    assert [index for index, _ in failed] == [0]
+
+
+def test_write_rows_uses_load_job_for_large_batches(monkeypatch):
+    monkeypatch.setattr(bulk_writer.config, 'BULK_LOAD_THRESHOLD', 2)
+    client = MagicMock()
+
+    assert write_rows(client, "p.d.t", [{"Id": "1"}, {"Id": "2"}]) == []
+
+    client.insert_rows_json.assert_not_called()
+    buffer = client.load_table_from_file.call_args.args[0]
+    assert buffer.getvalue() == b'{"Id": "1"}\n{"Id": "2"}\n'
+
+
+@patch('src.database.operations.get_bigquery_client')
+def test_insert_rows_reports_failure(mock_get_client):
+    from src.database.operations import insert_rows
+
+    mock_get_client.return_value.insert_rows_json.return_value = [
+        {"index": 0, "errors": [{"reason": "invalid", "message": "bad"}]}
+    ]
+    assert insert_rows("sentiment", [{"Id": "1"}]) is False
+    assert insert_rows("sentiment", []) is True
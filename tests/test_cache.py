@@ -0,0 +1,112 @@
+# file: tests/test_cache.py
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from src.utils.config import config
+from src.sentiment import cache as cache_module
+from src.sentiment.cache import SentimentCache, cached_sentiment, cached_sentiment_batch, make_cache_key
+
+
+@pytest.fixture
+def sentiment_cache(tmp_path):
+    cache = SentimentCache(tmp_path / 'cache.sqlite3', max_entries=3)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def shared_cache(monkeypatch, sentiment_cache):
+    monkeypatch.setattr(config, 'SENTIMENT_CACHE_ENABLED', True)
+    monkeypatch.setattr(cache_module.SentimentCacheManager, '_instance', sentiment_cache)
+    return sentiment_cache
+
+
+def test_cache_key_normalizes_text():
+    assert make_cache_key("Great  app!", "m") == make_cache_key(" great app! ", "m")
+    assert make_cache_key("Great app!", "m") != make_cache_key("Great app!", "other-model")
+    assert make_cache_key("Great app!", "m", "1") != make_cache_key("Great app!", "m", "2")
+
+
+def test_get_and_put(sentiment_cache):
+    assert sentiment_cache.get("Great app!", "m") is None
+    sentiment_cache.put("Great app!", "m", {'score': 0.9, 'magnitude': 0.8})
+
+    assert sentiment_cache.get("great app!", "m") == {'score': 0.9, 'magnitude': 0.8}
+    stats = sentiment_cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['entries'] == 1
+
+
+def test_lru_eviction(sentiment_cache):
+    for text in ["a", "b", "c"]:
+        sentiment_cache.put(text, "m", {'score': 0.0, 'magnitude': 0.0})
+    # Touch "a" so that "b" becomes the least recently used entry
+    sentiment_cache.get("a", "m")
+    sentiment_cache.put("d", "m", {'score': 0.0, 'magnitude': 0.0})
+
+    assert sentiment_cache.get("b", "m") is None
+    assert sentiment_cache.get("a", "m") is not None
+    assert sentiment_cache.stats()['entries'] == 3
+    assert sentiment_cache.stats()['evictions'] == 1
+
+
+def test_cached_sentiment_decorator(shared_cache):
+    calls = []
+
+    @cached_sentiment("m")
+    def evaluate(review):
+        calls.append(review)
+        return {'score': 0.5, 'magnitude': 0.5}
+
+    evaluate("Great app!")
+    evaluate("great app!")
+    assert calls == ["Great app!"]
+
+
+def test_async_cache_lookups_run_off_the_event_loop(shared_cache, monkeypatch):
+    threads = []
+    for name in ('get_many', 'put_many'):
+        method = getattr(shared_cache, name)
+
+        def record(*args, method=method):
+            threads.append(threading.current_thread())
+            return method(*args)
+
+        monkeypatch.setattr(shared_cache, name, record)
+
+    @cached_sentiment("m")
+    async def evaluate(review):
+        return {'score': 0.5, 'magnitude': 0.5}
+
+    async def run():
+        await evaluate("Great app!")
+        return await evaluate("great app!")
+
+    assert asyncio.run(run()) == {'score': 0.5, 'magnitude': 0.5}
+    # Two lookups and one store, none of them on the event loop's thread
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
+
+
+def test_cached_sentiment_batch_decorator(shared_cache):
+    shared_cache.put("cached review", "m", {'score': 0.1, 'magnitude': 0.2})
+    submitted = []
+
+    @cached_sentiment_batch("m")
+    async def evaluate_batch(reviews):
+        submitted.extend(review['Id'] for review in reviews)
+        return {review['Id']: {'score': 0.3, 'magnitude': 0.4} for review in reviews}
+
+    reviews = [{'Id': '1', 'Review': 'cached review'}, {'Id': '2', 'Review': 'new review'}]
+    result = asyncio.run(evaluate_batch(reviews))
+
+    assert submitted == ['2']
+    assert result == {'1': {'score': 0.1, 'magnitude': 0.2}, '2': {'score': 0.3, 'magnitude': 0.4}}
+    assert shared_cache.get("new review", "m") == {'score': 0.3, 'magnitude': 0.4}
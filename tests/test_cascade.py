@@ -0,0 +1,72 @@
+# file: tests/test_cascade.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from src.utils.config import config
+from src.sentiment.cascade import Cascade, LexiconScorer, get_cascade
+from src.sentiment.pipeline import run_sentiment_pipeline
+
+
+def test_lexicon_scorer_polarity():
+    scorer = LexiconScorer()
+    positive, positive_confidence = scorer.score("Excellent product, I love it. Really great value!")
+    negative, negative_confidence = scorer.score("Terrible. Broke after a day, total waste of money.")
+
+    assert positive['score'] > 0.5 and negative['score'] < -0.5
+    assert positive['magnitude'] > 0 and negative['magnitude'] > 0
+    assert positive_confidence > 0.8 and negative_confidence > 0.8
+
+
+def test_lexicon_scorer_handles_negation():
+    sentiment, _ = LexiconScorer().score("not good at all")
+    assert sentiment['score'] < 0
+
+
+def test_lexicon_scorer_is_unsure_about_mixed_or_unknown_text():
+    scorer = LexiconScorer()
+    assert scorer.score("The package arrived on Tuesday.")[1] == 0.0
+    assert scorer.score("Great screen but terrible battery.")[1] < 0.5
+
+
+def test_cascade_split_and_report():
+    cascade = Cascade(threshold=0.8)
+    rows, uncertain = cascade.split([
+        {'Id': '1', 'Review': 'Amazing, excellent, love it'},
+        {'Id': '2', 'Review': 'It is a blender.'},
+    ])
+
+    assert [row['Id'] for row in rows] == ['1']
+    assert set(rows[0]) == {'Id', 'Score', 'Magnitude'}
+    assert uncertain == [{'Id': '2', 'Review': 'It is a blender.'}]
+    assert cascade.stats()['offload_rate'] == 0.5
+
+
+def test_get_cascade_respects_config(monkeypatch):
+    monkeypatch.setattr(config, 'SENTIMENT_CASCADE_ENABLED', False)
+    assert get_cascade() is None
+    assert get_cascade(0.5).threshold == 0.5
+
+    monkeypatch.setattr(config, 'SENTIMENT_CASCADE_ENABLED', True)
+    monkeypatch.setattr(config, 'SENTIMENT_CASCADE_THRESHOLD', 0.9)
+    assert get_cascade().threshold == 0.9
+
+
+@pytest.mark.parametrize("threshold, expected_llm_calls", [(0.8, 1), (1.1, 2)])
+def test_pipeline_sends_only_uncertain_reviews_to_llm(threshold, expected_llm_calls):
+    page = [{'Id': '1', 'Review': 'Awful, horrible, worst purchase'}, {'Id': '2', 'Review': 'It is blue.'}]
+    evaluate = AsyncMock(return_value={'score': 0.0, 'magnitude': 0.1})
+
+    with patch('src.sentiment.pipeline.get_data_pages', return_value=iter([page])), \
+         patch('src.sentiment.pipeline.insert_rows', return_value=True) as mock_insert_rows:
+        summary = run_sentiment_pipeline(evaluate, backfill=True, cascade_threshold=threshold)
+
+    assert evaluate.await_count == expected_llm_calls
+    assert summary['inserted'] == 2
+    assert summary['offloaded'] == 2 - expected_llm_calls
+    assert len(mock_insert_rows.call_args[0][1]) == 2
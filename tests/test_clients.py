@@ -0,0 +1,90 @@
+# file: tests/test_clients.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.utils.config import config
+from src.sentiment.clients import (
+    ProviderClientManager, get_async_ollama_client, get_ollama_client, get_openai_client, get_pool_stats,
+)
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_clients(monkeypatch):
+    monkeypatch.setattr(ProviderClientManager, '_clients', {})
+    monkeypatch.setattr(ProviderClientManager, '_stats', {})
+    yield
+    ProviderClientManager.close()
+
+
+def test_sync_clients_are_shared(monkeypatch):
+    monkeypatch.setattr(config, 'OPENAI_API_KEY', 'test-key')
+    assert get_openai_client() is get_openai_client()
+    assert get_ollama_client("http://a:11434") is get_ollama_client("http://a:11434")
+    assert get_ollama_client("http://a:11434") is not get_ollama_client("http://b:11434")
+
+
+def test_async_clients_are_shared_per_event_loop():
+    async def get_twice():
+        return get_async_ollama_client("http://a:11434"), get_async_ollama_client("http://a:11434")
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+    third, _ = asyncio.run(get_twice())
+    assert third is not first
+
+
+def test_pool_stats_count_requests_on_one_keepalive_connection(server):
+    client = get_ollama_client(server)
+    for _ in range(3):
+        client._client.get("/")
+
+    stats = get_pool_stats()[f"ollama:{server}"]
+    assert stats['requests'] == 3
+    assert stats['errors'] == 0
+    assert stats['in_flight'] == 0
+    assert stats['connections'] == 1
+    assert stats['idle_connections'] == 1
+
+
+def test_pool_stats_count_failed_requests():
+    client = get_ollama_client("http://127.0.0.1:1")
+    with pytest.raises(Exception):
+        client._client.get("/")
+
+    stats = get_pool_stats()["ollama:http://127.0.0.1:1"]
+    assert stats['requests'] == 1
+    assert stats['errors'] == 1
+    assert stats['in_flight'] == 0
@@ -46,13 +46,14 @@ def test_config_initialization(mock_env):
 
 def test_config_default_values(monkeypatch):
     """Test that Config uses default values when environment variables are not set"""
-    for var in ['DEFAULT_ROW_LIMIT', 'SENTIMENT_BATCH_SIZE']:
+    for var in ['DEFAULT_ROW_LIMIT', 'SENTIMENT_BATCH_SIZE', 'SENTIMENT_CONCURRENCY']:
         monkeypatch.delenv(var, raising=False)
     
     config = Config(load_env=False)
     
     assert config.DEFAULT_ROW_LIMIT == 100
     assert config.SENTIMENT_BATCH_SIZE == 1000
+    assert config.SENTIMENT_CONCURRENCY == 8
 
 def test_config_schemas():
     """Test that Config has correct schema definitions"""
@@ -43,3 +43,20 @@ def test_get_storage_client(mock_config):
         mock_credentials.assert_called_once_with(mock_config.SERVICE_ACCOUNT_FILE)
         MockStorageClient.assert_called_once_with(credentials=credentials_instance, project=mock_config.PROJECT_ID)
 
+
+@patch('src.database.connection.config', new_callable=MagicMock)
+def test_get_bigquery_storage_client(mock_config):
+    from src.database.connection import BigQueryStorageConnection, get_bigquery_storage_client
+
+    mock_config.SERVICE_ACCOUNT_FILE = "path/to/service/account/file.json"
+    BigQueryStorageConnection._instance = None
+
+    with patch('google.oauth2.service_account.Credentials.from_service_account_file') as mock_credentials, \
+         patch('google.cloud.bigquery_storage.BigQueryReadClient') as MockReadClient:
+
+        client = get_bigquery_storage_client()
+        assert client == MockReadClient.return_value
+        assert get_bigquery_storage_client() is client
+        MockReadClient.assert_called_once_with(credentials=mock_credentials.return_value)
+
+    BigQueryStorageConnection._instance = None
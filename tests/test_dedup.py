@@ -0,0 +1,106 @@
+# file: tests/test_dedup.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from src.utils.config import config
+from src.sentiment.dedup import ReviewDeduplicator, get_deduplicator, normalize_review
+from src.sentiment.pipeline import run_sentiment_pipeline
+
+REVIEW = ("The blender is powerful and easy to clean, but the lid cracked after two weeks "
+          "of daily use and customer support never answered my emails.")
+
+
+def test_normalize_review():
+    assert normalize_review("  Great   PRODUCT!!! ") == "great product"
+    assert normalize_review("Great, product.") == normalize_review("great product")
+
+
+def test_group_exact_and_near_duplicates():
+    dedup = ReviewDeduplicator(threshold=0.7, num_perm=64, bands=16)
+    reviews = [
+        {'Id': '1', 'Review': REVIEW},
+        {'Id': '2', 'Review': REVIEW.upper().replace(",", "")},
+        {'Id': '3', 'Review': REVIEW.replace("two weeks", "two week")},
+        {'Id': '4', 'Review': "Arrived late and the box was crushed."},
+    ]
+    representatives, members = dedup.group(reviews)
+
+    assert [review['Id'] for review in representatives] == ['1', '4']
+    assert [key for _, key in members] == ['1', '1', '1', '4']
+    assert dedup.stats()['exact_duplicates'] == 1
+    assert dedup.stats()['near_duplicates'] == 1
+
+
+def test_fan_out_across_pages():
+    dedup = ReviewDeduplicator(threshold=0.8, num_perm=64, bands=16)
+    _, members = dedup.group([{'Id': '1', 'Review': REVIEW}])
+    rows, orphans = dedup.fan_out([{'Id': '1', 'Score': 0.5, 'Magnitude': 0.2}], members)
+    assert rows == [{'Id': '1', 'Score': 0.5, 'Magnitude': 0.2}]
+    assert orphans == []
+
+    representatives, members = dedup.group([{'Id': '7', 'Review': REVIEW + "!"}])
+    assert representatives == []
+    assert dedup.fan_out([], members) == ([{'Id': '7', 'Score': 0.5, 'Magnitude': 0.2}], [])
+
+
+def test_unscored_representative_is_forgotten():
+    dedup = ReviewDeduplicator(threshold=0.8, num_perm=64, bands=16)
+    _, members = dedup.group([{'Id': '1', 'Review': REVIEW}, {'Id': '2', 'Review': REVIEW.lower()},
+                              {'Id': '3', 'Review': REVIEW + "!"}])
+    # The duplicates are handed back to be scored on their own
+    assert dedup.fan_out([], members) == ([], [{'Id': '2', 'Review': REVIEW.lower()},
+                                              {'Id': '3', 'Review': REVIEW + "!"}])
+    assert dedup.stats()['orphaned'] == 2
+
+    representatives, _ = dedup.group([{'Id': '4', 'Review': REVIEW}, {'Id': '5', 'Review': REVIEW.upper()}])
+    assert [review['Id'] for review in representatives] == ['4']
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        ReviewDeduplicator(num_perm=64, bands=10)
+
+
+def test_get_deduplicator_respects_config(monkeypatch):
+    monkeypatch.setattr(config, 'DEDUP_ENABLED', False)
+    assert get_deduplicator() is None
+    assert isinstance(get_deduplicator(True), ReviewDeduplicator)
+
+
+def test_pipeline_scores_one_review_per_cluster():
+    pages = [
+        [{'Id': '1', 'Review': REVIEW}, {'Id': '2', 'Review': REVIEW.lower()}],
+        [{'Id': '3', 'Review': REVIEW + " "}, {'Id': '4', 'Review': "Arrived late."}],
+    ]
+    evaluate = AsyncMock(return_value={'score': -0.3, 'magnitude': 0.6})
+
+    with patch('src.sentiment.pipeline.get_data_pages', return_value=iter(pages)), \
+         patch('src.sentiment.pipeline.insert_rows', return_value=True) as mock_insert_rows:
+        summary = run_sentiment_pipeline(evaluate, backfill=True, dedup=True)
+
+    assert evaluate.await_count == 2
+    assert summary['inserted'] == 4
+    assert summary['deduplicated'] == 2
+    inserted = [row['Id'] for call in mock_insert_rows.call_args_list for row in call[0][1]]
+    assert sorted(inserted) == ['1', '2', '3', '4']
+
+
+def test_pipeline_scores_duplicates_of_a_failed_representative():
+    pages = [[{'Id': '1', 'Review': REVIEW}, {'Id': '2', 'Review': REVIEW.lower()}, {'Id': '3', 'Review': "Fine."}]]
+    evaluate = AsyncMock(side_effect=[None, {'score': 0.1, 'magnitude': 0.1}, {'score': -0.3, 'magnitude': 0.6}])
+
+    with patch('src.sentiment.pipeline.get_data_pages', return_value=iter(pages)), \
+         patch('src.sentiment.pipeline.insert_rows', return_value=True) as mock_insert_rows:
+        summary = run_sentiment_pipeline(evaluate, backfill=True, dedup=True, concurrency=1)
+
+    assert evaluate.await_count == 3
+    assert summary['inserted'] == 2
+    assert summary['deduplicated'] == 0
+    inserted = [row['Id'] for call in mock_insert_rows.call_args_list for row in call[0][1]]
+    assert sorted(inserted) == ['2', '3']
@@ -0,0 +1,57 @@
+# file: tests/test_engine.py
+import asyncio
+import unittest
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.sentiment.engine import score_reviews, score_reviews_async
+
+
+class TestScoringEngine(unittest.TestCase):
+
+    def test_results_keep_input_order(self):
+        async def evaluate(item):
+            # Later items finish first
+            await asyncio.sleep(0.01 * (5 - item))
+            return item * 10
+
+        results = score_reviews([0, 1, 2, 3, 4], evaluate, concurrency=5)
+        self.assertEqual(results, [0, 10, 20, 30, 40])
+
+    def test_concurrency_is_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def evaluate(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return item
+
+        results = asyncio.run(score_reviews_async(list(range(50)), evaluate, concurrency=3))
+        self.assertEqual(results, list(range(50)))
+        self.assertEqual(peak, 3)
+
+    def test_error_is_propagated(self):
+        async def evaluate(item):
+            if item == 2:
+                raise ValueError("bad review")
+            return item
+
+        with self.assertRaises(ValueError):
+            score_reviews([1, 2, 3], evaluate, concurrency=2)
+
+    def test_empty_input(self):
+        async def evaluate(item):
+            return item
+
+        self.assertEqual(score_reviews([], evaluate), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+# file: tests/test_import_time.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import importlib
+from unittest.mock import patch
+
+import pytest
+from benchmarks.import_time import MODULE_TARGETS, measure_import
+from src.utils.lazy import LazyModule, lazy_import
+
+
+@pytest.mark.parametrize("target", MODULE_TARGETS)
+def test_entry_points_do_not_import_heavy_sdks(target):
+    result = measure_import(target)
+    assert result['violations'] == []
+
+
+def test_lazy_module_imports_on_first_use():
+    module = LazyModule("json")
+    assert "not loaded" in repr(module)
+    assert module.dumps([1]) == "[1]"
+    assert "not loaded" not in repr(module)
+
+    # Patches on the real module are seen through the stand-in
+    with patch("json.dumps", return_value="patched"):
+        assert module.dumps([1]) == "patched"
+
+
+def test_lazy_import_returns_loaded_modules():
+    assert lazy_import("json") is importlib.import_module("json")
+    assert isinstance(lazy_import("not_a_real_module_for_tests"), LazyModule)
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("not_a_real_module_for_tests").anything
+
+
+def test_database_package_exports_lazily():
+    import src.database as database
+
+    assert "insert_rows" in dir(database)
+    assert database.insert_rows is importlib.import_module("src.database.operations").insert_rows
+    with pytest.raises(AttributeError):
+        database.not_exported
@@ -0,0 +1,82 @@
+# file: tests/test_incremental_load.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import os
+from unittest.mock import patch
+
+import pytest
+from src.utils.config import config
+from src.database import local_backend
+from src.database.operations import get_data, get_job_config, load_csv_incremental, merge_staging_table
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'LOCAL_DB_PATH', str(tmp_path / 'local.sqlite3'))
+    monkeypatch.setattr(config, 'LOCAL_DATA_DIR', str(tmp_path / 'data'))
+    monkeypatch.setattr(config, 'QUERY_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'PROJECT_ID', 'local-project')
+    monkeypatch.setattr(config, 'DATASET_NAME', 'feedback')
+    monkeypatch.setattr(config, 'FEEDBACK_TABLE_NAME', 'reviews')
+    monkeypatch.setattr(config, 'TEMP_TABLE_NAME', 'reviews_staging')
+    monkeypatch.setattr(config, 'MANIFEST_TABLE_NAME', 'load_manifest')
+    monkeypatch.setattr(local_backend.LocalDatabaseConnection, '_instance', None)
+    (tmp_path / 'data' / 'exports').mkdir(parents=True)
+    yield tmp_path / 'data'
+    local_backend.get_local_connection().close()
+    local_backend.LocalDatabaseConnection._instance = None
+
+
+def write_csv(path, rows, mtime_ns=None):
+    path.write_text("Id,Review,Label\n" + "".join(f"{row_id},review {row_id},positive\n" for row_id in rows))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def feedback_ids():
+    return sorted(row['Id'] for row in get_data(config.FEEDBACK_TABLE_NAME))
+
+
+def test_get_job_config_write_disposition():
+    assert get_job_config().write_disposition == "WRITE_TRUNCATE"
+    job_config = get_job_config(5, "WRITE_APPEND", schema=config.FEEDBACK_SCHEMA)
+    assert job_config.write_disposition == "WRITE_APPEND"
+    assert not job_config.autodetect
+    assert [field.name for field in job_config.schema] == ["Id", "Review", "Label"]
+    assert job_config.max_bad_records == 5
+
+
+def test_merge_staging_table_runs_a_merge_on_id():
+    with patch('src.database.operations.get_bigquery_client') as get_client:
+        get_client.return_value.query.return_value.num_dml_affected_rows = 7
+        assert merge_staging_table('staging', 'feedback') == 7
+
+    query = get_client.return_value.query.call_args[0][0]
+    assert "MERGE" in query and "ON T.Id = S.Id" in query
+    assert "WHEN NOT MATCHED THEN" in query and "WHEN MATCHED" not in query
+
+
+def test_incremental_load_merges_only_new_objects(local_db):
+    write_csv(local_db / 'exports' / 'day1.csv', ['1', '2'], mtime_ns=1_000)
+    write_csv(local_db / 'exports' / 'day2.csv', ['2', '3'], mtime_ns=1_000)
+    write_csv(local_db / 'other.csv', ['99'])
+
+    summary = load_csv_incremental(None, 'exports/', config.FEEDBACK_TABLE_NAME)
+    assert summary == {'objects': 2, 'staged': 4, 'inserted': 3}
+    assert feedback_ids() == ['1', '2', '3']
+
+    # Nothing new: nothing is staged or merged
+    assert load_csv_incremental(None, 'exports/', config.FEEDBACK_TABLE_NAME)['objects'] == 0
+
+    # A new file and a new generation of an old one are loaded; known Ids are skipped
+    write_csv(local_db / 'exports' / 'day3.csv', ['4'])
+    write_csv(local_db / 'exports' / 'day1.csv', ['1', '2', '5'], mtime_ns=2_000)
+    summary = load_csv_incremental(None, 'exports/', config.FEEDBACK_TABLE_NAME)
+    assert summary == {'objects': 2, 'staged': 4, 'inserted': 2}
+    assert feedback_ids() == ['1', '2', '3', '4', '5']
+    assert len(get_data(config.MANIFEST_TABLE_NAME)) == 4
@@ -0,0 +1,120 @@
+# file: tests/test_journal.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from unittest.mock import AsyncMock
+from src.utils.config import config
+from src.database import local_backend
+from src.database.operations import get_data, get_watermark, insert_rows, set_watermark, setup_tables
+from src.sentiment.journal import CheckpointJournal, get_journal
+from src.sentiment.pipeline import WATERMARK_KEY, run_sentiment_pipeline
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'LOCAL_DB_PATH', str(tmp_path / 'local.sqlite3'))
+    monkeypatch.setattr(config, 'LOCAL_DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'QUERY_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'PROJECT_ID', 'local-project')
+    monkeypatch.setattr(config, 'DATASET_NAME', 'feedback')
+    monkeypatch.setattr(config, 'FEEDBACK_TABLE_NAME', 'reviews')
+    monkeypatch.setattr(config, 'SENTIMENT_TABLE_NAME', 'sentiment')
+    monkeypatch.setattr(local_backend.LocalDatabaseConnection, '_instance', None)
+    setup_tables()
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': str(i), 'Review': f"review {i}"} for i in range(1, 7)])
+    yield tmp_path
+    local_backend.get_local_connection().close()
+    local_backend.LocalDatabaseConnection._instance = None
+
+
+def sentiment_of(batch):
+    return {str(review['Id']): {'score': 0.5, 'magnitude': 0.5} for review in batch}
+
+
+def crashing_evaluate_batch(failing_call):
+    calls = []
+
+    async def evaluate_batch(batch):
+        calls.append([review['Id'] for review in batch])
+        if len(calls) == failing_call:
+            raise RuntimeError("process killed")
+        return sentiment_of(batch)
+
+    return evaluate_batch, calls
+
+
+def test_journal_round_trip(tmp_path):
+    journal = CheckpointJournal(tmp_path / 'run.jsonl', fsync=True)
+    journal.append({'1': {'score': 0.1, 'magnitude': 0.2}, 2: None})
+    journal.append({2: {'score': -0.3, 'magnitude': 0.4}})
+    # A line cut short by a crash is skipped
+    with open(journal.path, 'a') as journal_file:
+        journal_file.write('{"Id": "3", "Sco')
+
+    assert journal.read() == {
+        '1': {'Id': '1', 'Score': 0.1, 'Magnitude': 0.2},
+        '2': {'Id': '2', 'Score': -0.3, 'Magnitude': 0.4},
+    }
+    journal.clear()
+    assert journal.read() == {}
+    journal.append({'4': {'score': 0.0, 'magnitude': 0.0}})
+    assert list(journal.read()) == ['4']
+    journal.close()
+
+
+def test_journal_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(config, 'SENTIMENT_JOURNAL_ENABLED', False)
+    assert get_journal(WATERMARK_KEY) is None
+
+
+def test_resume_replays_journal_and_skips_journaled_reviews(local_db):
+    set_watermark(WATERMARK_KEY, '0')
+    evaluate = AsyncMock()
+    evaluate_batch, calls = crashing_evaluate_batch(failing_call=3)
+    with pytest.raises(RuntimeError):
+        run_sentiment_pipeline(evaluate, evaluate_batch, batch_size=2, concurrency=1, page_size=6)
+    # The first two batches were paid for but never reached the sentiment table
+    assert get_data(config.SENTIMENT_TABLE_NAME) == []
+    assert set(get_journal(WATERMARK_KEY).read()) == {'1', '2', '3', '4'}
+
+    evaluate_batch, calls = crashing_evaluate_batch(failing_call=None)
+    summary = run_sentiment_pipeline(evaluate, evaluate_batch, batch_size=2, concurrency=1, page_size=6, resume=True)
+
+    assert calls == [['5', '6']]
+    # The replayed rows are in the sentiment table, so only the rest is fetched
+    assert summary == {'fetched': 2, 'scored': 2, 'inserted': 2, 'resumed': 4}
+    assert sorted(row['Id'] for row in get_data(config.SENTIMENT_TABLE_NAME)) == ['1', '2', '3', '4', '5', '6']
+    assert get_watermark(WATERMARK_KEY) == '6'
+    assert get_journal(WATERMARK_KEY).read() == {}
+    evaluate.assert_not_called()
+
+
+def test_resume_does_not_insert_results_twice(local_db):
+    # The run died after flushing its page but before clearing the journal
+    insert_rows(config.SENTIMENT_TABLE_NAME, [{'Id': '1', 'Score': 0.5, 'Magnitude': 0.5}])
+    set_watermark(WATERMARK_KEY, '0')
+    get_journal(WATERMARK_KEY).append({'1': {'score': 0.5, 'magnitude': 0.5}, '2': {'score': 0.1, 'magnitude': 0.1}})
+
+    evaluate = AsyncMock(return_value={'score': 0.2, 'magnitude': 0.2})
+    summary = run_sentiment_pipeline(evaluate, limit=1, page_size=3, resume=True)
+
+    # Only review 3 is left to score; 1 and 2 come from the journal
+    assert evaluate.await_count == 1
+    assert summary['resumed'] == 2
+    assert sorted(row['Id'] for row in get_data(config.SENTIMENT_TABLE_NAME)) == ['1', '2', '3']
+
+
+def test_fresh_run_discards_the_journal(local_db):
+    get_journal(WATERMARK_KEY).append({'1': {'score': 0.5, 'magnitude': 0.5}})
+
+    evaluate = AsyncMock(return_value={'score': 0.2, 'magnitude': 0.2})
+    summary = run_sentiment_pipeline(evaluate, page_size=3)
+
+    assert evaluate.await_count == 6
+    assert summary == {'fetched': 6, 'scored': 6, 'inserted': 6}
+    assert get_journal(WATERMARK_KEY).read() == {}
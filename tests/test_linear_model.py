@@ -0,0 +1,154 @@
+# file: tests/test_linear_model.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import csv
+import random
+
+import numpy as np
+import pytest
+from src.utils.config import config
+from src.database import local_backend
+from src.database.operations import get_data, get_watermark, insert_rows, setup_tables
+from src.sentiment.cascade import Cascade
+from src.sentiment.linear_model import (
+    LINEAR_WATERMARK_KEY, HashingTfidfVectorizer, LinearSentimentModel, label_scores, main, score_unprocessed,
+    train_model,
+)
+from src.sentiment.pipeline import WATERMARK_KEY
+
+WORDS = {
+    '1': "terrible awful broken waste refund".split(),
+    '3': "okay average decent expected fine".split(),
+    '5': "great excellent love amazing perfect".split(),
+}
+FILLER = "the product arrived box it this was and my".split()
+
+
+def make_reviews(count, seed=0):
+    rng = random.Random(seed)
+    labels = [rng.choice(list(WORDS)) for _ in range(count)]
+    texts = [" ".join(rng.choice(FILLER + WORDS[label]) for _ in range(10)) for label in labels]
+    return texts, labels
+
+
+@pytest.fixture(scope="module")
+def model():
+    texts, labels = make_reviews(3000)
+    trained, _ = train_model(texts, labels, n_features=2 ** 16, epochs=3, test_size=0)
+    return trained
+
+
+def test_label_scores():
+    assert list(label_scores(['1', '2', '3', '4', '5'])) == [-1.0, -0.5, 0.0, 0.5, 1.0]
+    assert list(label_scores(['negative', 'positive'])) == [-1.0, 1.0]
+    with pytest.raises(ValueError):
+        label_scores(['meh'])
+
+
+def test_vectorizer_rows_are_normalized_and_stable():
+    vectorizer = HashingTfidfVectorizer(n_features=2 ** 12)
+    counts = vectorizer.counts(["great great product", "", "bad product"])
+    features = vectorizer.fit(counts).weight(counts)
+
+    norms = np.sqrt(np.asarray(features.multiply(features).sum(axis=1)).ravel())
+    assert np.allclose(norms, [1, 0, 1])
+    assert (vectorizer.counts(["great great product"]) != counts[0]).nnz == 0
+
+
+def test_model_learns_polarity(model):
+    texts, labels = make_reviews(300, seed=1)
+    scores, magnitudes, confidences = model.predict(texts)
+    targets = np.array([{'1': -1, '3': 0, '5': 1}[label] for label in labels])
+
+    assert np.corrcoef(scores, targets)[0, 1] > 0.9
+    assert np.all((scores >= -1) & (scores <= 1))
+    assert np.all(magnitudes >= 0) and np.all((confidences >= 0) & (confidences <= 1))
+
+
+def test_save_and_load_round_trip(model, tmp_path):
+    model.save(tmp_path / "model.npz")
+    loaded = LinearSentimentModel.load(tmp_path / "model.npz")
+    assert loaded.labels == model.labels
+    assert loaded.score("great love it") == model.score("great love it")
+
+
+def test_model_as_cascade_scorer(model):
+    rows, uncertain = Cascade(scorer=model, threshold=0.5).split([
+        {'Id': '1', 'Review': 'love love amazing great perfect'},
+        {'Id': '2', 'Review': 'terrible awful waste refund broken'},
+    ])
+    assert {row['Id']: row['Score'] > 0 for row in rows} == {'1': True, '2': False}
+    assert uncertain == []
+
+    _, uncertain = Cascade(scorer=model, threshold=1.01).split([{'Id': '3', 'Review': 'great'}])
+    assert [review['Id'] for review in uncertain] == ['3']
+
+
+def test_cli_train_and_evaluate(tmp_path):
+    texts, labels = make_reviews(500)
+    path = tmp_path / "reviews.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Id", "Review", "Label"])
+        writer.writerows((i, text, label) for i, (text, label) in enumerate(zip(texts, labels)))
+
+    model_path = str(tmp_path / "model.npz")
+    holdout = main(["train", "--csv", str(path), "--model", model_path, "--n-features", "4096", "--epochs", "3"])
+    assert holdout['reviews'] == 50
+
+    metrics = main(["evaluate", "--csv", str(path), "--model", model_path])
+    assert metrics['reviews'] == 500
+    assert metrics['polarity_accuracy'] > 0.8
+
+
+def test_score_unprocessed_on_local_backend(model, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'LOCAL_DB_PATH', str(tmp_path / 'local.sqlite3'))
+    monkeypatch.setattr(config, 'PROJECT_ID', 'local-project')
+    monkeypatch.setattr(config, 'DATASET_NAME', 'feedback')
+    monkeypatch.setattr(config, 'FEEDBACK_TABLE_NAME', 'reviews')
+    monkeypatch.setattr(config, 'SENTIMENT_TABLE_NAME', 'sentiment')
+    monkeypatch.setattr(local_backend.LocalDatabaseConnection, '_instance', None)
+    try:
+        setup_tables()
+        texts, _ = make_reviews(25)
+        insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': f"{i:03d}", 'Review': text} for i, text in enumerate(texts)])
+
+        summary = score_unprocessed(model, page_size=10)
+        assert summary == {'fetched': 25, 'scored': 25, 'inserted': 25}
+        assert len(get_data(config.SENTIMENT_TABLE_NAME)) == 25
+        assert score_unprocessed(model)['fetched'] == 0
+        # The LLM pipeline's watermark is not moved
+        assert get_watermark(WATERMARK_KEY) is None
+        assert get_watermark(LINEAR_WATERMARK_KEY) == '024'
+
+        # Reviews backfilled past the watermark are not scored again
+        insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': f"{i:03d}", 'Review': texts[0]} for i in range(25, 30)])
+        assert score_unprocessed(model, backfill=True)['inserted'] == 5
+        assert score_unprocessed(model)['fetched'] == 0
+        assert len(get_data(config.SENTIMENT_TABLE_NAME)) == 30
+    finally:
+        local_backend.get_local_connection().close()
+        local_backend.LocalDatabaseConnection._instance = None
+
+
+def test_hash_collisions_that_cancel_out_stay_finite():
+    # 'bnu' and 'daa' hash to the same column at 2 ** 10 features with opposite signs
+    vectorizer = HashingTfidfVectorizer(n_features=2 ** 10, ngram_range=(1, 1))
+    counts = vectorizer.counts(["bnu daa"])
+    assert counts.nnz == 0
+
+    texts = ["bnu daa great", "bnu daa terrible", "great love", "terrible awful"]
+    labels = ['5', '1', '5', '1']
+    trained = LinearSentimentModel(n_features=2 ** 10).fit(vectorizer.counts(texts), labels, epochs=3)
+    probabilities = trained.predict_proba(texts)
+    loss = -np.mean(np.log(probabilities[np.arange(len(labels)), [trained.labels.index(label) for label in labels]]))
+    scores, magnitudes, confidences = trained.predict(texts)
+
+    assert np.all(np.isfinite(trained.weights)) and np.all(np.isfinite(trained.bias))
+    assert np.isfinite(loss)
+    assert np.all(np.isfinite(scores)) and np.all(np.isfinite(magnitudes)) and np.all(np.isfinite(confidences))
@@ -0,0 +1,113 @@
+# file: tests/test_llm_emulator.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import json
+import random
+import threading
+
+import httpx
+import pytest
+from src.utils.config import config
+from src.sentiment import rate_limit
+from src.sentiment.clients import ProviderClientManager
+from src.sentiment.ollama_sentiment_analysis import evaluate_sentiment_ollama
+from src.sentiment.sentiment_analysis import evaluate_sentiment, evaluate_sentiment_batch_async
+from benchmarks.fakes import fake_sentiment
+from benchmarks.llm_emulator import EmulatorSettings, LatencyDistribution, LLMEmulator, malform
+
+
+@pytest.fixture
+def emulator(request):
+    settings = getattr(request, 'param', None) or EmulatorSettings()
+    server = LLMEmulator(settings).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(ProviderClientManager, '_clients', {})
+    monkeypatch.setattr(ProviderClientManager, '_stats', {})
+    monkeypatch.setattr(rate_limit, '_limiters', {})
+    monkeypatch.setattr(config, 'OPENAI_API_KEY', 'test-key')
+    yield
+    ProviderClientManager.close()
+
+
+def test_latency_distributions_have_requested_mean():
+    rng = random.Random(0)
+    for kind in ("constant", "uniform", "lognormal", "exponential"):
+        distribution = LatencyDistribution(kind, 0.2, 0.1)
+        samples = [distribution.sample(rng) for _ in range(4000)]
+        assert sum(samples) / len(samples) == pytest.approx(0.2, rel=0.1)
+    assert LatencyDistribution.parse("uniform:1:0.5", per_token=0.01).sample(rng, 100) >= 1.5
+    with pytest.raises(ValueError):
+        LatencyDistribution("gamma")
+
+
+def test_openai_single_and_batched_prompts(emulator, monkeypatch):
+    monkeypatch.setattr(config, 'OPENAI_BASE_URL', emulator.url + "/v1")
+
+    assert evaluate_sentiment("Great product") == fake_sentiment("Great product")
+
+    reviews = [{'Id': '1', 'Review': 'fine'}, {'Id': '2', 'Review': 'bad'}]
+    results = asyncio.run(evaluate_sentiment_batch_async(reviews))
+    assert results == {'1': fake_sentiment('1'), '2': fake_sentiment('2')}
+
+
+def test_ollama_chat(emulator, monkeypatch):
+    monkeypatch.setattr(config, 'OLLAMA_HOST', emulator.url)
+    assert evaluate_sentiment_ollama("Great product") == fake_sentiment("Great product")
+
+
+@pytest.mark.parametrize("emulator", [EmulatorSettings(requests_per_minute=2)], indirect=True)
+def test_rate_limit_headers_and_429(emulator):
+    url = emulator.url + "/v1/chat/completions"
+    body = {"model": "m", "messages": [{"role": "user", "content": "x"}]}
+    with httpx.Client() as client:
+        first = client.post(url, json=body)
+        client.post(url, json=body)
+        rejected = client.post(url, json=body)
+
+    assert first.status_code == 200
+    assert first.headers['x-ratelimit-limit-requests'] == '2'
+    assert first.headers['x-ratelimit-remaining-requests'] == '1'
+    assert rejected.status_code == 429
+    assert float(rejected.headers['retry-after']) > 0
+    assert emulator.state.stats()['rate_limited'] == 1
+
+
+@pytest.mark.parametrize("emulator", [EmulatorSettings(burst_rate=1.0, burst_duration=0.2)], indirect=True)
+def test_burst_of_429s_is_retried(emulator, monkeypatch):
+    monkeypatch.setattr(config, 'OPENAI_BASE_URL', emulator.url + "/v1")
+    emulator.state.settings.burst_rate = 0.0
+    emulator.state.burst_until = float('inf')
+
+    def end_burst():
+        emulator.state.burst_until = 0.0
+
+    threading.Timer(0.3, end_burst).start()
+    assert evaluate_sentiment("ok") == fake_sentiment("ok")
+    assert emulator.state.stats()['burst_rejected'] >= 1
+    assert rate_limit.get_rate_limiter_stats()['openai']['throttle_events'] >= 1
+
+
+@pytest.mark.parametrize("emulator", [EmulatorSettings(malformed_rate=1.0)], indirect=True)
+def test_malformed_output_is_rejected(emulator, monkeypatch):
+    monkeypatch.setattr(config, 'OPENAI_BASE_URL', emulator.url + "/v1")
+    assert evaluate_sentiment("meh") is None
+    assert emulator.state.stats()['malformed'] == config.SENTIMENT_PARSE_MAX_RETRIES + 1
+
+
+def test_malform_kinds():
+    answer = {"score": 0.5, "magnitude": 1.0}
+    assert "{" not in malform(dict(answer), "prose")
+    with pytest.raises(ValueError):
+        json.loads(malform(dict(answer), "truncated"))
+    assert "magnitude" not in json.loads(malform(dict(answer), "missing_keys"))
+    assert json.loads(malform({"results": [dict(answer, Id="1")]}, "out_of_range"))["results"][0]["score"] > 1
@@ -0,0 +1,108 @@
+# file: tests/test_local_backend.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from unittest.mock import AsyncMock
+from src.utils.config import config
+from src.database import local_backend
+from src.database.operations import (
+    execute_query, get_data, get_watermark, insert_rows, load_csv_to_bigquery,
+    set_watermark, setup_tables, sql_string_literal,
+)
+from src.sentiment.pipeline import run_sentiment_pipeline
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'LOCAL_DB_PATH', str(tmp_path / 'local.sqlite3'))
+    monkeypatch.setattr(config, 'LOCAL_DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'QUERY_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'PROJECT_ID', 'local-project')
+    monkeypatch.setattr(config, 'DATASET_NAME', 'feedback')
+    monkeypatch.setattr(config, 'FEEDBACK_TABLE_NAME', 'reviews')
+    monkeypatch.setattr(config, 'SENTIMENT_TABLE_NAME', 'sentiment')
+    monkeypatch.setattr(local_backend.LocalDatabaseConnection, '_instance', None)
+    yield tmp_path
+    local_backend.get_local_connection().close()
+    local_backend.LocalDatabaseConnection._instance = None
+
+
+def feedback_table():
+    return f"`{config.PROJECT_ID}.{config.DATASET_NAME}.{config.FEEDBACK_TABLE_NAME}`"
+
+
+def test_load_and_query(local_db):
+    (local_db / 'reviews.csv').write_text("Id,Review,Label\n1,good,positive\n2,it's bad,negative\n")
+    load_csv_to_bigquery(None, 'reviews.csv', config.FEEDBACK_TABLE_NAME)
+
+    rows = get_data(config.FEEDBACK_TABLE_NAME, where_clause="Review = " + sql_string_literal("it's bad"))
+    assert rows == [{'Id': '2', 'Review': "it's bad", 'Label': 'negative'}]
+
+    pages = list(execute_query(f"SELECT Id FROM {feedback_table()} ORDER BY Id", result_mode="pages", page_size=1))
+    assert pages == [[{'Id': '1'}], [{'Id': '2'}]]
+    assert execute_query(f"SELECT Id FROM {feedback_table()}", result_mode="arrow").num_rows == 2
+
+
+def test_insert_rows_and_watermark(local_db):
+    setup_tables()
+    assert get_watermark('sentiment') is None
+
+    assert insert_rows(config.SENTIMENT_TABLE_NAME, [{'Id': '1', 'Score': 0.5, 'Magnitude': 0.7}])
+    assert not insert_rows(config.SENTIMENT_TABLE_NAME, [{'Id': '2', 'Score': None, 'Magnitude': 0.1}])
+
+    set_watermark('sentiment', '1')
+    set_watermark('sentiment', '2')
+    assert get_watermark('sentiment') == '2'
+    assert get_data(config.SENTIMENT_TABLE_NAME) == [{'Id': '1', 'Score': 0.5, 'Magnitude': 0.7}]
+
+
+def test_sentiment_pipeline_runs_locally(local_db):
+    setup_tables()
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': str(i), 'Review': f"review {i}"} for i in range(1, 6)])
+    evaluate = AsyncMock(return_value={'score': 0.1, 'magnitude': 0.2})
+
+    summary = run_sentiment_pipeline(evaluate, limit=3, page_size=2)
+    assert summary == {'fetched': 3, 'scored': 3, 'inserted': 3}
+    assert get_watermark('sentiment') == '3'
+
+    summary = run_sentiment_pipeline(evaluate, page_size=2)
+    assert summary == {'fetched': 2, 'scored': 2, 'inserted': 2}
+    assert len(get_data(config.SENTIMENT_TABLE_NAME)) == 5
+
+
+def test_backfill_does_not_cause_rescoring_past_the_watermark(local_db):
+    setup_tables()
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': str(i), 'Review': f"review {i}"} for i in range(1, 4)])
+    evaluate = AsyncMock(return_value={'score': 0.1, 'magnitude': 0.2})
+    run_sentiment_pipeline(evaluate, page_size=2)
+    assert get_watermark('sentiment') == '3'
+
+    # A backfill scores the new rows without moving the watermark
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': str(i), 'Review': f"review {i}"} for i in range(4, 7)])
+    assert run_sentiment_pipeline(evaluate, page_size=2, backfill=True)['inserted'] == 3
+    assert get_watermark('sentiment') == '3'
+
+    summary = run_sentiment_pipeline(evaluate, page_size=2)
+    assert summary == {'fetched': 0, 'scored': 0, 'inserted': 0}
+    ids = [row['Id'] for row in get_data(config.SENTIMENT_TABLE_NAME)]
+    assert sorted(ids) == ['1', '2', '3', '4', '5', '6']
+
+
+def test_watermark_follows_numeric_order_of_ids(local_db):
+    setup_tables()
+    # As strings, '100000' sorts before '99998'
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': str(i), 'Review': f"review {i}"} for i in (99998, 99999, 100000)])
+    evaluate = AsyncMock(return_value={'score': 0.1, 'magnitude': 0.2})
+    run_sentiment_pipeline(evaluate, page_size=2)
+    assert get_watermark('sentiment') == '100000'
+
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': str(i), 'Review': f"review {i}"} for i in (100001, 100002)])
+    summary = run_sentiment_pipeline(evaluate, page_size=2)
+    assert summary == {'fetched': 2, 'scored': 2, 'inserted': 2}
+    assert get_watermark('sentiment') == '100002'
+    assert evaluate.await_count == 5
@@ -0,0 +1,86 @@
+# file: tests/test_logging.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import json
+import logging
+import time
+
+import pytest
+from src.utils.logging import JsonFormatter, Logger, RateLimitedLogger, logger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def captured():
+    test_logger = logging.getLogger("test_logging")
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    handler = ListHandler()
+    test_logger.addHandler(handler)
+    yield test_logger, handler
+    test_logger.removeHandler(handler)
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.LogRecord("Logger", logging.WARNING, __file__, 1, "Scored %d reviews", (3,), None)
+    record.page = 7
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == "Scored 3 reviews"
+    assert entry['level'] == "WARNING"
+    assert entry['page'] == 7
+    assert 'args' not in entry
+
+
+def test_rate_limited_logger_reports_suppressed_records(captured):
+    test_logger, handler = captured
+    limited = RateLimitedLogger(test_logger, limit=2, interval=0.05)
+
+    for attempt in range(5):
+        limited.warning("Attempt %d failed", attempt)
+    limited.warning("Other message")
+    assert [record.getMessage() for record in handler.records] == [
+        "Attempt 0 failed", "Attempt 1 failed", "Other message"]
+
+    time.sleep(0.06)
+    limited.warning("Attempt %d failed", 5)
+    limited.warning("100% done")
+    assert handler.records[-2].getMessage() == "Attempt 5 failed (3 similar messages suppressed)"
+    assert handler.records[-1].getMessage() == "100% done"
+
+
+def test_rate_limiting_can_be_disabled(captured):
+    test_logger, handler = captured
+    limited = RateLimitedLogger(test_logger, limit=0)
+    for _ in range(20):
+        limited.info("Same message")
+    limited.debug("Below the level")
+    assert len(handler.records) == 20
+
+
+def test_records_are_written_by_the_background_listener():
+    listener = Logger()._listener
+    if listener is None:
+        pytest.skip("LOG_ASYNC is disabled")
+    handler = ListHandler()
+    listener.handlers = listener.handlers + (handler,)
+    try:
+        logger.info("Queued %s", "record")
+        Logger().flush()
+    finally:
+        listener.handlers = listener.handlers[:-1]
+
+    assert [record.getMessage() for record in handler.records] == ["Queued record"]
+    # The message was not formatted by the caller
+    assert handler.records[0].args == ("record",)
@@ -0,0 +1,130 @@
+# file: tests/test_metrics.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+
+import pytest
+from src.utils import metrics
+from src.utils.config import config
+from src.database import local_backend
+from src.database.operations import execute_query, execute_query_pages, insert_rows, load_csv_to_bigquery
+from src.sentiment import rate_limit
+from src.sentiment.batching import evaluate_batch_with_retries
+from src.sentiment.clients import ProviderClientManager
+from src.sentiment.parsing import request_sentiment
+from src.sentiment.sentiment_analysis import MODEL, evaluate_sentiment
+from benchmarks.llm_emulator import EmulatorSettings, LLMEmulator
+
+
+def sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'LOCAL_DB_PATH', str(tmp_path / 'local.sqlite3'))
+    monkeypatch.setattr(config, 'LOCAL_DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'QUERY_CACHE_ENABLED', False)
+    monkeypatch.setattr(local_backend.LocalDatabaseConnection, '_instance', None)
+    yield tmp_path
+    local_backend.get_local_connection().close()
+    local_backend.LocalDatabaseConnection._instance = None
+
+
+def test_database_operations_are_measured(local_db):
+    (local_db / 'metrics.csv').write_text("Id,Review\n1,good\n2,bad\n")
+    loaded = sample('feedback_rows_loaded_total', table='metrics')
+    loads = sample('feedback_load_seconds_count', table='metrics')
+    load_csv_to_bigquery(None, 'metrics.csv', 'metrics')
+    assert sample('feedback_rows_loaded_total', table='metrics') == loaded + 2
+    assert sample('feedback_load_seconds_count', table='metrics') == loads + 1
+
+    inserted = sample('feedback_rows_inserted_total', table='metrics')
+    assert insert_rows('metrics', [{'Id': '3', 'Review': 'fine'}])
+    assert sample('feedback_rows_inserted_total', table='metrics') == inserted + 1
+
+    table = f"`{config.PROJECT_ID}.{config.DATASET_NAME}.metrics`"
+    fetched = sample('feedback_rows_fetched_total', mode='dicts')
+    queries = sample('feedback_query_seconds_count', mode='dicts')
+    assert len(execute_query(f"SELECT * FROM {table}")) == 3
+    assert sample('feedback_rows_fetched_total', mode='dicts') == fetched + 3
+    assert sample('feedback_query_seconds_count', mode='dicts') == queries + 1
+
+    fetched = sample('feedback_rows_fetched_total', mode='pages')
+    assert sum(len(page) for page in execute_query_pages(f"SELECT * FROM {table}", page_size=2)) == 3
+    assert sample('feedback_rows_fetched_total', mode='pages') == fetched + 3
+
+
+def test_llm_latency_and_tokens_are_measured(monkeypatch):
+    server = LLMEmulator(EmulatorSettings()).start()
+    monkeypatch.setattr(ProviderClientManager, '_clients', {})
+    monkeypatch.setattr(ProviderClientManager, '_stats', {})
+    monkeypatch.setattr(rate_limit, '_limiters', {})
+    monkeypatch.setattr(config, 'OPENAI_API_KEY', 'test-key')
+    monkeypatch.setattr(config, 'OPENAI_BASE_URL', server.url + "/v1")
+    labels = {'provider': 'openai', 'model': MODEL}
+    requests = sample('feedback_llm_requests_total', outcome='ok', **labels)
+    prompt_tokens = sample('feedback_llm_prompt_tokens_total', **labels)
+    try:
+        assert evaluate_sentiment("Great product") is not None
+    finally:
+        ProviderClientManager.close()
+        server.stop()
+
+    assert sample('feedback_llm_requests_total', outcome='ok', **labels) == requests + 1
+    assert sample('feedback_llm_prompt_tokens_total', **labels) > prompt_tokens
+    assert sample('feedback_llm_completion_tokens_total', **labels) > 0
+    assert sample('feedback_llm_request_seconds_count', **labels) > 0
+
+
+def test_failed_requests_are_counted():
+    def fail():
+        with metrics.llm_request("test", "model"):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        fail()
+    assert sample('feedback_llm_requests_total', provider='test', model='model', outcome='error') == 1
+
+
+def test_parse_failures_are_counted():
+    single = sample('feedback_parse_failures_total', mode='single')
+    assert request_sentiment(lambda: "no json here", max_retries=1) is None
+    assert sample('feedback_parse_failures_total', mode='single') == single + 2
+
+    batch = sample('feedback_parse_failures_total', mode='batch')
+
+    async def complete(messages):
+        return '{"results": [{"Id": "1", "score": 0.5, "magnitude": 1}]}'
+
+    reviews = [{'Id': '1', 'Review': 'a'}, {'Id': '2', 'Review': 'b'}]
+    assert set(asyncio.run(evaluate_batch_with_retries(reviews, complete, max_retries=1))) == {'1'}
+    assert sample('feedback_parse_failures_total', mode='batch') == batch + 2
+
+
+def test_exposition_and_textfile(tmp_path, monkeypatch):
+    metrics.PIPELINE_ROWS_PER_SECOND.set(12.5)
+    assert b"feedback_pipeline_rows_per_second 12.5" in metrics.render_metrics()
+    assert metrics.render_metrics(openmetrics_format=True).endswith(b"# EOF\n")
+
+    path = tmp_path / "feedback.prom"
+    assert metrics.write_metrics_textfile(str(path))
+    assert "feedback_pipeline_rows_per_second 12.5" in path.read_text()
+    monkeypatch.setattr(config, 'METRICS_TEXTFILE', None)
+    assert not metrics.write_metrics_textfile()
+
+
+def test_spans_only_when_tracing_is_enabled(monkeypatch):
+    with metrics.span("test") as current:
+        assert current is None
+    metrics.set_span_attribute(None, "rows", 1)
+
+    monkeypatch.setattr(config, 'TRACING_ENABLED', True)
+    with metrics.timed(metrics.QUERY_SECONDS, "test", mode="test") as current:
+        assert current is not None
+        metrics.set_span_attribute(current, "rows", 1)
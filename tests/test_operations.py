@@ -0,0 +1,61 @@
+# file: tests/test_operations.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from unittest.mock import MagicMock, patch
+from src.database.operations import execute_query, get_joined_feedback_sentiment_data
+
+
+@pytest.fixture
+def mock_results():
+    with patch('src.database.operations.get_bigquery_client') as mock_get_client, \
+         patch('src.database.operations.get_bigquery_storage_client') as mock_get_storage_client:
+        results = mock_get_client.return_value.query.return_value.result.return_value
+        results.storage_client = mock_get_storage_client.return_value
+        yield results
+
+
+def test_execute_query_dicts(mock_results):
+    mock_results.__iter__.return_value = iter([{'Id': '1'}, {'Id': '2'}])
+    assert execute_query("SELECT 1") == [{'Id': '1'}, {'Id': '2'}]
+
+
+def test_execute_query_rows_is_lazy(mock_results):
+    batch = MagicMock()
+    batch.to_pylist.return_value = [{'Id': '1'}, {'Id': '2'}]
+    mock_results.to_arrow_iterable.return_value = iter([batch, batch])
+
+    rows = execute_query("SELECT 1", result_mode="rows")
+    mock_results.to_arrow_iterable.assert_not_called()
+
+    assert list(rows) == [{'Id': '1'}, {'Id': '2'}, {'Id': '1'}, {'Id': '2'}]
+    mock_results.to_arrow_iterable.assert_called_once_with(bqstorage_client=mock_results.storage_client)
+
+
+def test_execute_query_pages(mock_results):
+    mock_results.pages = iter([[{'Id': '1'}], [{'Id': '2'}]])
+    assert list(execute_query("SELECT 1", result_mode="pages", page_size=1)) == [[{'Id': '1'}], [{'Id': '2'}]]
+
+
+@pytest.mark.parametrize("result_mode, method", [("arrow", "to_arrow"), ("dataframe", "to_dataframe")])
+def test_execute_query_columnar_modes_use_storage_api(mock_results, result_mode, method):
+    result = execute_query("SELECT 1", result_mode=result_mode)
+    assert result == getattr(mock_results, method).return_value
+    getattr(mock_results, method).assert_called_once_with(bqstorage_client=mock_results.storage_client)
+
+
+def test_execute_query_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        execute_query("SELECT 1", result_mode="csv")
+
+
+def test_get_joined_feedback_sentiment_data_passes_result_mode():
+    with patch('src.database.operations.execute_query') as mock_execute_query:
+        get_joined_feedback_sentiment_data(limit=5, result_mode="dataframe")
+        query, result_mode = mock_execute_query.call_args.args
+        assert "LEFT JOIN" in query and "LIMIT 5" in query
+        assert result_mode == "dataframe"
@@ -0,0 +1,72 @@
+# file: tests/test_parsing.py
+import asyncio
+import unittest
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.sentiment.parsing import (
+    SentimentParseError,
+    extract_json,
+    parse_sentiment,
+    request_sentiment,
+    request_sentiment_async,
+    validate_sentiment,
+)
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_parse_plain_json(self):
+        self.assertEqual(parse_sentiment('{"score": 0.4, "magnitude": 1.2}'), {'score': 0.4, 'magnitude': 1.2})
+
+    def test_parse_fenced_json_with_prose(self):
+        content = 'Sure! Here is the result:\n```json\n{"score": -0.7, "magnitude": 0.8}\n```\nLet me know.'
+        self.assertEqual(parse_sentiment(content), {'score': -0.7, 'magnitude': 0.8})
+
+    def test_parse_json_embedded_in_prose(self):
+        content = 'The sentiment is {"Score": "0.1", "Magnitude": 0.2} overall.'
+        self.assertEqual(parse_sentiment(content), {'score': 0.1, 'magnitude': 0.2})
+
+    def test_parse_python_dict_literal(self):
+        self.assertEqual(parse_sentiment("{'score': 0.8, 'magnitude': 0.9}"), {'score': 0.8, 'magnitude': 0.9})
+
+    def test_parse_wrapped_result(self):
+        self.assertEqual(parse_sentiment('{"sentiment": {"score": 0.3, "magnitude": 0.3}}'),
+                         {'score': 0.3, 'magnitude': 0.3})
+
+    def test_parse_rejects_out_of_range_and_missing_values(self):
+        for content in ('{"score": 1.5, "magnitude": 0.1}', '{"score": 0.5, "magnitude": -1}',
+                        '{"score": 0.5}', 'no json here', '__import__("os").getcwd()'):
+            with self.assertRaises(SentimentParseError):
+                parse_sentiment(content)
+
+    def test_parse_rejects_non_finite_magnitude(self):
+        # Infinity cannot be written to the sentiment table (it is not valid JSON)
+        for content in ('{"score": 0.5, "magnitude": Infinity}', '{"score": 0.5, "magnitude": NaN}'):
+            with self.assertRaises(SentimentParseError):
+                parse_sentiment(content)
+        self.assertIsNone(validate_sentiment({'score': 0.5, 'magnitude': float('inf')}))
+
+    def test_extract_json_array(self):
+        self.assertEqual(extract_json('Result: [{"Id": "1"}] done', types=(list,)), [{'Id': '1'}])
+
+    def test_request_sentiment_rerequests_malformed_answers(self):
+        answers = iter(['oops', '{"score": 0.2, "magnitude": 0.4}'])
+        self.assertEqual(request_sentiment(lambda: next(answers), max_retries=2), {'score': 0.2, 'magnitude': 0.4})
+
+    def test_request_sentiment_async_gives_up(self):
+        calls = []
+
+        async def complete():
+            calls.append(1)
+            return 'still not json'
+
+        self.assertIsNone(asyncio.run(request_sentiment_async(complete, max_retries=1)))
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
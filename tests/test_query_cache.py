@@ -0,0 +1,101 @@
+# file: tests/test_query_cache.py
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pyarrow as pa
+from unittest.mock import MagicMock, patch
+from src.utils.config import config
+from src.database.operations import execute_query, run_query
+from src.database.query_cache import QueryResultCache, normalize_sql, referenced_tables
+
+QUERY = "SELECT *\n  FROM `proj.ds.feedback` f\n  JOIN `proj.ds.sentiment` s ON f.Id = s.Id;"
+
+
+def make_client(modified):
+    client = MagicMock()
+    table = client.get_table.return_value
+    table.modified = modified
+    table.num_rows = 2
+    table.streaming_buffer = None
+    return client
+
+
+def test_normalize_sql():
+    assert normalize_sql(QUERY) == "SELECT * FROM `proj.ds.feedback` f JOIN `proj.ds.sentiment` s ON f.Id = s.Id"
+
+
+def test_referenced_tables():
+    assert referenced_tables(QUERY) == ["proj.ds.feedback", "proj.ds.sentiment"]
+    assert referenced_tables("SELECT 1") == []
+
+
+def test_key_changes_when_table_is_modified(tmp_path):
+    cache = QueryResultCache(tmp_path, max_bytes=10 ** 6)
+    before = make_client(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    after = make_client(datetime(2024, 1, 2, tzinfo=timezone.utc))
+
+    assert cache.make_key(before, QUERY) == cache.make_key(before, " ".join(QUERY.split()))
+    assert cache.make_key(before, QUERY) != cache.make_key(after, QUERY)
+    assert cache.make_key(before, "SELECT 1") is None
+
+
+def test_get_put_round_trip(tmp_path):
+    cache = QueryResultCache(tmp_path, max_bytes=10 ** 6)
+    table = pa.table({'Id': ['1', '2'], 'Score': [0.5, -0.5]})
+
+    assert cache.get("k") is None
+    cache.put("k", table)
+    assert cache.get("k").equals(table)
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    table = pa.table({'Review': ['x' * 1000] * 50})
+    cache = QueryResultCache(tmp_path, max_bytes=10 ** 9)
+    cache.put("probe", table)
+    entry_size = cache.stats()['bytes']
+
+    cache = QueryResultCache(tmp_path / "capped", max_bytes=int(entry_size * 2.5))
+    for key in ["a", "b", "c"]:
+        cache.put(key, table)
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()['entries'] == 2
+
+
+def test_execute_query_uses_cache(tmp_path):
+    client = make_client(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    client.query.return_value.result.return_value.to_arrow.return_value = pa.table({'Id': ['1']})
+
+    with patch('src.database.operations.get_bigquery_client', return_value=client), \
+         patch('src.database.operations.get_bigquery_storage_client'), \
+         patch('src.database.operations.get_query_cache', return_value=QueryResultCache(tmp_path, 10 ** 6)):
+        first = execute_query(QUERY, use_cache=True)
+        second = execute_query(QUERY, result_mode="dataframe", use_cache=True)
+
+    assert first == [{'Id': '1'}]
+    assert list(second['Id']) == ['1']
+    client.query.assert_called_once()
+
+
+def test_run_query_can_skip_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'QUERY_CACHE_ENABLED', True)
+    client = make_client(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    client.query.return_value.result.return_value.to_arrow.return_value = pa.table({'Id': ['1']})
+    cache = MagicMock(wraps=QueryResultCache(tmp_path, 10 ** 6))
+
+    with patch('src.database.operations.get_bigquery_client', return_value=client), \
+         patch('src.database.operations.get_bigquery_storage_client'), \
+         patch('src.database.operations.get_query_cache', return_value=cache):
+        run_query(QUERY, use_cache=False)
+        run_query(QUERY, use_cache=False)
+
+    assert client.query.call_count == 2
+    cache.get.assert_not_called()
+    cache.put.assert_not_called()
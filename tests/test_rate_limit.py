@@ -0,0 +1,110 @@
+# file: tests/test_rate_limit.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+from src.sentiment.clients import PoolStats
+from src.sentiment.rate_limit import AdaptiveRateLimiter, parse_duration
+
+
+def rate_limit_error(retry_after="0"):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={'retry-after': retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_parse_duration():
+    assert parse_duration("2") == 2.0
+    assert parse_duration("1m30s") == 90.0
+    assert parse_duration("250ms") == 0.25
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+def test_concurrency_grows_with_headroom_and_shrinks_without():
+    limiter = AdaptiveRateLimiter("test", initial_concurrency=2, max_concurrency=8, headroom=0.1, decrease_factor=0.5)
+
+    async def call():
+        limiter.observe(200, {'x-ratelimit-limit-requests': '1000', 'x-ratelimit-remaining-requests': '900'})
+        return "ok"
+
+    async def run_many():
+        return await asyncio.gather(*(limiter.run(call, tokens=10) for _ in range(20)))
+
+    assert asyncio.run(run_many()) == ["ok"] * 20
+    grown = limiter.stats()
+    assert grown['concurrency'] > 2
+    assert grown['requests_per_minute'] == 20 and grown['tokens_per_minute'] == 200
+    assert grown['in_flight'] == 0
+
+    limiter.observe(200, {'x-ratelimit-limit-tokens': '10000', 'x-ratelimit-remaining-tokens': '500'})
+    assert limiter.stats()['concurrency'] == grown['concurrency'] // 2
+    assert limiter.stats()['remaining_tokens'] == 500
+
+
+def test_in_flight_never_exceeds_limit():
+    limiter = AdaptiveRateLimiter("test", initial_concurrency=3, max_concurrency=3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0.01)
+
+    async def run_many():
+        await asyncio.gather(*(limiter.run(call) for _ in range(12)))
+
+    asyncio.run(run_many())
+    assert peak == 3
+
+
+def test_429_pauses_and_retries():
+    limiter = AdaptiveRateLimiter("test", initial_concurrency=4, max_retries=2)
+    attempts = []
+
+    async def call():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise rate_limit_error(retry_after="0.2")
+        return "ok"
+
+    assert asyncio.run(limiter.run(call)) == "ok"
+    assert attempts[1] - attempts[0] >= 0.19
+    stats = limiter.stats()
+    assert stats['throttle_events'] == 1
+    assert stats['decreases'] == 1 and stats['concurrency'] == 2
+
+
+def test_429_seen_by_pool_hook_is_counted_once():
+    limiter = AdaptiveRateLimiter("test", max_retries=1)
+    stats = PoolStats()
+    stats.response_hooks.append(limiter.observe_response)
+
+    async def call():
+        if limiter.throttle_events == 0:
+            stats.observe(httpx.Response(429, headers={'retry-after': '0'}))
+            raise rate_limit_error()
+        return "ok"
+
+    assert asyncio.run(limiter.run(call)) == "ok"
+    assert limiter.stats()['throttle_events'] == 1
+
+
+def test_gives_up_after_max_retries():
+    limiter = AdaptiveRateLimiter("test", max_retries=1)
+
+    def call():
+        raise rate_limit_error()
+
+    with pytest.raises(openai.RateLimitError):
+        limiter.run_sync(call)
+    assert limiter.stats()['throttle_events'] == 2
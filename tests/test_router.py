@@ -0,0 +1,96 @@
+# file: tests/test_router.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+
+import pytest
+from src.utils.config import config
+from src.sentiment.engine import score_reviews
+from src.sentiment.router import Backend, BackendRouter, build_default_router
+
+
+def fake_backend(name, delay, fail=False, max_in_flight=2):
+    calls = []
+
+    async def evaluate(review):
+        calls.append(review)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ConnectionError(f"{name} is down")
+        return {'score': 0.5, 'magnitude': 0.5, 'backend': name}
+
+    backend = Backend(name, evaluate, max_in_flight=max_in_flight)
+    backend.calls = calls
+    return backend
+
+
+def test_router_prefers_faster_backend():
+    fast = fake_backend("fast", 0.001)
+    slow = fake_backend("slow", 0.05)
+    router = BackendRouter([fast, slow])
+
+    results = score_reviews([f"review {i}" for i in range(40)], router.evaluate, concurrency=4)
+
+    assert len(results) == 40
+    assert len(fast.calls) > len(slow.calls)
+    assert fast.in_flight == 0 and slow.in_flight == 0
+
+
+def test_router_never_exceeds_backend_in_flight_limit():
+    peak = {'value': 0}
+    backend = None
+
+    async def evaluate(review):
+        peak['value'] = max(peak['value'], backend.in_flight)
+        await asyncio.sleep(0.001)
+        return {'score': 0.0, 'magnitude': 0.0}
+
+    backend = Backend("only", evaluate, max_in_flight=2)
+    score_reviews(list(range(10)), BackendRouter([backend]).evaluate, concurrency=8)
+    assert peak['value'] == 2
+
+
+def test_router_falls_back_and_cools_down_failed_backend():
+    broken = fake_backend("broken", 0, fail=True)
+    healthy = fake_backend("healthy", 0.01)
+    broken.latency = 0.0  # make the broken backend look best
+    router = BackendRouter([broken, healthy])
+
+    results = score_reviews(["a", "b", "c"], router.evaluate, concurrency=1)
+
+    assert all(result['backend'] == "healthy" for result in results)
+    assert len(broken.calls) == 1
+    assert router.stats()["broken"]['cooling_down']
+
+
+def test_router_treats_slow_requests_as_failures(monkeypatch):
+    monkeypatch.setattr(config, 'ROUTER_MIN_TIMEOUT', 0.01)
+    stalled = fake_backend("stalled", 1.0)
+    stalled.latency = 0.001
+    healthy = fake_backend("healthy", 0.02)
+    healthy.latency = 0.02
+    router = BackendRouter([stalled, healthy])
+
+    result = asyncio.run(router.evaluate("review"))
+
+    assert result['backend'] == "healthy"
+    assert stalled.failures == 1
+
+
+def test_router_raises_last_error_when_all_backends_fail():
+    router = BackendRouter([fake_backend("a", 0, fail=True), fake_backend("b", 0, fail=True)])
+    with pytest.raises(ConnectionError):
+        asyncio.run(router.evaluate("review"))
+
+
+def test_build_default_router(monkeypatch):
+    monkeypatch.setattr(config, 'OPENAI_API_KEY', 'test-key')
+    router = build_default_router(ollama_hosts=["http://a:11434", "http://b:11434"])
+    assert [backend.name for backend in router.backends] == ["ollama:http://a:11434", "ollama:http://b:11434", "openai"]
+
+    with pytest.raises(ValueError):
+        build_default_router(ollama_hosts=[], use_openai=False)
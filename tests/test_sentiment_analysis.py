@@ -1,7 +1,7 @@
 # file: tests/test_sentiment_analysis.py
 from src.utils.config import config
 from src.sentiment.sentiment_analysis import evaluate_sentiment, perform_sentiment_analysis
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import unittest
 import os
 import sys
@@ -13,7 +13,20 @@ sys.path.insert(0, str(project_root))
 
 class TestSentimentAnalysis(unittest.TestCase):
 
-    @patch('src.sentiment.sentiment_analysis.OpenAI')
+    def setUp(self):
+        # Keep the processing state table out of the pipeline tests
+        patchers = {
+            name: patch(f'src.sentiment.pipeline.{name}')
+            for name in ('setup_state_table', 'get_watermark', 'set_watermark')
+        }
+        mocks = {name: patcher.start() for name, patcher in patchers.items()}
+        for patcher in patchers.values():
+            self.addCleanup(patcher.stop)
+        self.mock_get_watermark = mocks['get_watermark']
+        self.mock_set_watermark = mocks['set_watermark']
+        self.mock_get_watermark.return_value = None
+
+    @patch('src.sentiment.sentiment_analysis.get_openai_client')
     def test_evaluate_sentiment(self, mock_openai):
         # Mock the OpenAI client and its response
         mock_client = MagicMock()
@@ -32,15 +45,16 @@ class TestSentimentAnalysis(unittest.TestCase):
         self.assertIn("This is a great product!",
                       call_args['messages'][1]['content'])
 
-    @patch('src.sentiment.sentiment_analysis.get_data')
-    @patch('src.sentiment.sentiment_analysis.insert_rows')
-    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment')
-    def test_perform_sentiment_analysis(self, mock_evaluate_sentiment, mock_insert_rows, mock_get_data):
+    @patch('src.sentiment.sentiment_analysis.get_async_openai_client')
+    @patch('src.sentiment.pipeline.get_data_pages')
+    @patch('src.sentiment.pipeline.insert_rows')
+    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment_async', new_callable=AsyncMock)
+    def test_perform_sentiment_analysis(self, mock_evaluate_sentiment, mock_insert_rows, mock_get_data, mock_async_openai):
         # Mock the database operations
-        mock_get_data.return_value = [
+        mock_get_data.return_value = iter([[
             {'Id': '1', 'Review': 'Great product'},
             {'Id': '2', 'Review': 'Bad experience'}
-        ]
+        ]])
         mock_insert_rows.return_value = True
 
         # Mock the sentiment evaluation
@@ -52,7 +66,7 @@ class TestSentimentAnalysis(unittest.TestCase):
         # Run the function
         perform_sentiment_analysis(limit=2)
 
-        # Verify that get_data was called with the correct parameters
+        # Verify that get_data_pages was called with the correct parameters
         mock_get_data.assert_called_once()
         args, kwargs = mock_get_data.call_args
         self.assertEqual(args[0], config.FEEDBACK_TABLE_NAME)
@@ -72,6 +86,100 @@ class TestSentimentAnalysis(unittest.TestCase):
         self.assertEqual(args[1][1]['Id'], '2')
         self.assertEqual(args[1][1]['Score'], -0.6)
 
+    @patch('src.sentiment.sentiment_analysis.get_async_openai_client')
+    @patch('src.sentiment.pipeline.get_data_pages')
+    @patch('src.sentiment.pipeline.insert_rows')
+    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment_batch_async', new_callable=AsyncMock)
+    def test_perform_sentiment_analysis_batched(self, mock_evaluate_batch, mock_insert_rows, mock_get_data, mock_async_openai):
+        mock_get_data.return_value = iter([[
+            {'Id': '1', 'Review': 'Great product'},
+            {'Id': '2', 'Review': 'Bad experience'},
+            {'Id': '3', 'Review': 'Unparseable'}
+        ]])
+        mock_insert_rows.return_value = True
+
+        # Review 3 is never returned by the model and must not be inserted
+        mock_evaluate_batch.side_effect = [
+            {'1': {'score': 0.8, 'magnitude': 0.9}, '2': {'score': -0.6, 'magnitude': 0.7}},
+            {}
+        ]
+
+        perform_sentiment_analysis(limit=3, batch_size=2)
+
+        self.assertEqual(mock_evaluate_batch.call_count, 2)
+        args, kwargs = mock_insert_rows.call_args
+        self.assertEqual([row['Id'] for row in args[1]], ['1', '2'])
+        self.assertEqual(args[1][1]['Magnitude'], 0.7)
+
+    @patch('src.sentiment.sentiment_analysis.get_async_openai_client')
+    @patch('src.sentiment.pipeline.get_data_pages')
+    @patch('src.sentiment.pipeline.insert_rows')
+    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment_async', new_callable=AsyncMock)
+    def test_perform_sentiment_analysis_flushes_every_page(self, mock_evaluate_sentiment, mock_insert_rows, mock_get_data, mock_async_openai):
+        pages = [[{'Id': str(i), 'Review': f'Review {i}'} for i in range(start, start + 2)] for start in (0, 2, 4)]
+        mock_get_data.return_value = iter(pages)
+        mock_insert_rows.return_value = True
+        mock_evaluate_sentiment.return_value = {'score': 0.1, 'magnitude': 0.2}
+
+        summary = perform_sentiment_analysis()
+
+        self.assertEqual(mock_insert_rows.call_count, 3)
+        self.assertEqual([[row['Id'] for row in call.args[1]] for call in mock_insert_rows.call_args_list],
+                         [['0', '1'], ['2', '3'], ['4', '5']])
+        self.assertEqual(summary, {'fetched': 6, 'scored': 6, 'inserted': 6})
+        self.assertEqual([call.args for call in self.mock_set_watermark.call_args_list],
+                         [('sentiment', '1'), ('sentiment', '3'), ('sentiment', '5')])
+
+    @patch('src.sentiment.sentiment_analysis.get_async_openai_client')
+    @patch('src.sentiment.pipeline.get_data_pages')
+    @patch('src.sentiment.pipeline.insert_rows')
+    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment_async', new_callable=AsyncMock)
+    def test_perform_sentiment_analysis_uses_watermark(self, mock_evaluate_sentiment, mock_insert_rows, mock_get_data, mock_async_openai):
+        self.mock_get_watermark.return_value = "41"
+        mock_get_data.return_value = iter([[{'Id': '42', 'Review': 'Great product'}]])
+        mock_insert_rows.return_value = True
+        mock_evaluate_sentiment.return_value = {'score': 0.8, 'magnitude': 0.9}
+
+        perform_sentiment_analysis(limit=10)
+
+        args, kwargs = mock_get_data.call_args
+        # Rows past the watermark that a backfill already scored are left out
+        after_watermark = "(LENGTH(Id) > 2 OR (LENGTH(Id) = 2 AND Id > '41'))"
+        self.assertTrue(kwargs['where_clause'].startswith(f"{after_watermark} AND Id NOT IN (SELECT Id FROM "))
+        self.assertTrue(kwargs['where_clause'].endswith(f" WHERE {after_watermark})"))
+        self.assertEqual(kwargs['order_by'], "LENGTH(Id), Id")
+        self.mock_set_watermark.assert_called_once_with('sentiment', '42')
+
+    @patch('src.sentiment.sentiment_analysis.get_async_openai_client')
+    @patch('src.sentiment.pipeline.get_data_pages')
+    @patch('src.sentiment.pipeline.insert_rows')
+    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment_async', new_callable=AsyncMock)
+    def test_perform_sentiment_analysis_backfill(self, mock_evaluate_sentiment, mock_insert_rows, mock_get_data, mock_async_openai):
+        mock_get_data.return_value = iter([[{'Id': '7', 'Review': 'Great product'}]])
+        mock_insert_rows.return_value = True
+        mock_evaluate_sentiment.return_value = {'score': 0.8, 'magnitude': 0.9}
+
+        perform_sentiment_analysis(backfill=True)
+
+        args, kwargs = mock_get_data.call_args
+        self.assertIn("Id NOT IN", kwargs['where_clause'])
+        self.assertIsNone(kwargs['order_by'])
+        self.mock_get_watermark.assert_not_called()
+        self.mock_set_watermark.assert_not_called()
+
+    @patch('src.sentiment.sentiment_analysis.get_async_openai_client')
+    @patch('src.sentiment.pipeline.get_data_pages')
+    @patch('src.sentiment.pipeline.insert_rows')
+    @patch('src.sentiment.sentiment_analysis.evaluate_sentiment_async', new_callable=AsyncMock)
+    def test_failed_insert_stops_watermark(self, mock_evaluate_sentiment, mock_insert_rows, mock_get_data, mock_async_openai):
+        mock_get_data.return_value = iter([[{'Id': '1', 'Review': 'Great product'}]])
+        mock_insert_rows.return_value = False
+        mock_evaluate_sentiment.return_value = {'score': 0.8, 'magnitude': 0.9}
+
+        with self.assertRaises(RuntimeError):
+            perform_sentiment_analysis()
+        self.mock_set_watermark.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
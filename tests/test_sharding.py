@@ -0,0 +1,105 @@
+# file: tests/test_sharding.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from unittest.mock import AsyncMock
+from src.utils.config import config
+from src.database import local_backend
+from src.database.operations import get_data, get_watermark, insert_rows, setup_tables
+from src.sentiment.pipeline import (
+    count_unprocessed_by_shard, iter_unprocessed_pages, merge_shard_summaries, run_sentiment_pipeline,
+    shard_watermark_key, shard_where_clause, verify_sentiment_results,
+)
+
+NUM_REVIEWS = 40
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'LOCAL_DB_PATH', str(tmp_path / 'local.sqlite3'))
+    monkeypatch.setattr(config, 'LOCAL_DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'QUERY_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'PROJECT_ID', 'local-project')
+    monkeypatch.setattr(config, 'DATASET_NAME', 'feedback')
+    monkeypatch.setattr(config, 'FEEDBACK_TABLE_NAME', 'reviews')
+    monkeypatch.setattr(config, 'SENTIMENT_TABLE_NAME', 'sentiment')
+    monkeypatch.setattr(local_backend.LocalDatabaseConnection, '_instance', None)
+    setup_tables()
+    insert_rows(config.FEEDBACK_TABLE_NAME, [{'Id': f"{i:03d}", 'Review': f"review {i}"} for i in range(NUM_REVIEWS)])
+    yield tmp_path
+    local_backend.get_local_connection().close()
+    local_backend.LocalDatabaseConnection._instance = None
+
+
+def test_shard_where_clause_validates_shard():
+    assert shard_where_clause(1, 4) == "ABS(MOD(FARM_FINGERPRINT(Id), 4)) = 1"
+    assert shard_watermark_key(1, 4) == "sentiment_shard_1_of_4"
+    with pytest.raises(ValueError):
+        shard_where_clause(4, 4)
+
+
+def test_shards_partition_the_backlog(local_db):
+    shard_ids = [{row['Id'] for page in iter_unprocessed_pages(shard=shard, num_shards=4) for row in page}
+                 for shard in range(4)]
+
+    assert sum(len(ids) for ids in shard_ids) == NUM_REVIEWS
+    assert set().union(*shard_ids) == {f"{i:03d}" for i in range(NUM_REVIEWS)}
+    assert count_unprocessed_by_shard(4) == {shard: len(ids) for shard, ids in enumerate(shard_ids) if ids}
+
+
+def test_sharded_runs_score_the_backlog_once(local_db):
+    evaluate = AsyncMock(return_value={'score': 0.1, 'magnitude': 0.2})
+    summaries = [run_sentiment_pipeline(evaluate, page_size=5, shard=shard, num_shards=3) for shard in range(3)]
+
+    assert sum(summary['inserted'] for summary in summaries) == NUM_REVIEWS
+    assert evaluate.await_count == NUM_REVIEWS
+    assert {get_watermark(shard_watermark_key(shard, 3)) for shard in range(3)} <= {
+        row['Id'] for row in get_data(config.SENTIMENT_TABLE_NAME)}
+    assert count_unprocessed_by_shard(3) == {}
+    assert verify_sentiment_results() == {'rows': NUM_REVIEWS, 'duplicates': 0, 'unscored': 0}
+
+    # The shards' watermarks are kept apart, so a rerun finds nothing new
+    assert run_sentiment_pipeline(evaluate, shard=0, num_shards=3)['fetched'] == 0
+
+
+def test_shard_requires_num_shards(local_db):
+    with pytest.raises(ValueError):
+        run_sentiment_pipeline(AsyncMock(), shard=0)
+
+
+def run_dag(evaluate, num_shards):
+    """Run the steps of dags/feedback_dag.py: count_backlog, score_shard per shard, merge_and_verify."""
+    shards = [{'shard': shard, 'num_shards': num_shards} for shard in sorted(count_unprocessed_by_shard(num_shards))]
+    summaries = [run_sentiment_pipeline(evaluate, page_size=5, resume=True, **kwargs) for kwargs in shards]
+    return merge_shard_summaries(summaries)
+
+
+def test_dag_after_backfilling_one_shard(local_db):
+    evaluate = AsyncMock(return_value={'score': 0.1, 'magnitude': 0.2})
+    first = run_dag(evaluate, 2)
+    assert first['inserted'] == NUM_REVIEWS
+
+    # New reviews arrive and shard 0 is backfilled by hand, which leaves its watermark behind
+    insert_rows(config.FEEDBACK_TABLE_NAME,
+                [{'Id': f"{i:03d}", 'Review': f"review {i}"} for i in range(NUM_REVIEWS, NUM_REVIEWS + 20)])
+    watermark = get_watermark(shard_watermark_key(0, 2))
+    backfilled = run_sentiment_pipeline(evaluate, backfill=True, shard=0, num_shards=2)['inserted']
+    assert backfilled > 0
+    assert get_watermark(shard_watermark_key(0, 2)) == watermark
+
+    report = run_dag(evaluate, 2)
+    assert report['inserted'] == 20 - backfilled
+    assert report['scored'] == 20 - backfilled
+    assert report == {**report, 'rows': NUM_REVIEWS + 20, 'duplicates': 0, 'unscored': 0}
+    assert evaluate.await_count == NUM_REVIEWS + 20
+
+
+def test_merge_shard_summaries_fails_on_duplicates(local_db):
+    insert_rows(config.SENTIMENT_TABLE_NAME, [{'Id': '001', 'Score': 0.1, 'Magnitude': 0.1}] * 2)
+    with pytest.raises(ValueError):
+        merge_shard_summaries([{'fetched': 1, 'scored': 1, 'inserted': 1}])
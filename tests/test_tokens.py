@@ -0,0 +1,118 @@
+# file: tests/test_tokens.py
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from src.sentiment.batching import build_batch_messages
+from src.sentiment.planner import count_requests, estimate_run, format_plan, plan_sentiment_run
+from src.sentiment.sentiment_analysis import _build_messages
+from src.sentiment.tokens import (
+    TokenCounter, TokenRateLimiter, get_token_limiter, max_output_tokens, pack_batches, pack_token_counts,
+)
+
+
+class WordCounter(TokenCounter):
+    """Counts one token per word so the tests do not depend on tiktoken."""
+
+    def __init__(self):
+        self.model = "test"
+        self.encoding = None
+
+    def count(self, text):
+        return len(text.split())
+
+
+def test_max_output_tokens():
+    assert max_output_tokens(1) == 60
+    assert max_output_tokens(10) == 420
+
+
+def test_pack_token_counts_respects_item_and_token_budgets():
+    assert pack_token_counts([1, 1, 1, 1, 1], max_items=2, max_tokens=100) == [(0, 2), (2, 4), (4, 5)]
+    assert pack_token_counts([4, 4, 4, 9, 1], max_items=10, max_tokens=10, base_tokens=1) == [(0, 2), (2, 3), (3, 4), (4, 5)]
+    assert pack_token_counts([], max_items=5, max_tokens=10) == []
+
+
+def test_pack_batches_keeps_long_reviews_apart():
+    reviews = [{'Id': str(i), 'Review': "word " * length} for i, length in enumerate([5, 5, 200, 5, 5])]
+    batches = pack_batches(reviews, max_items=10, max_tokens=150, counter=WordCounter())
+
+    assert [[review['Id'] for review in batch] for batch in batches] == [['0', '1'], ['2'], ['3', '4']]
+
+
+def test_token_counter_estimates_without_encoding():
+    counter = WordCounter()
+    assert counter.count_many(["a b", "c"]) == [2, 1]
+    assert counter.count_messages([{'role': 'user', 'content': 'a b c'}]) == 3 + 3 + 1 + 3
+
+
+def test_rate_limiter_spaces_out_requests():
+    limiter = TokenRateLimiter(tokens_per_minute=6000)
+    assert limiter.reserve(6000) == 0.0
+    assert limiter.reserve(100) == pytest.approx(1.0, abs=0.05)
+
+    start = time.monotonic()
+    asyncio.run(limiter.acquire_async(10))
+    assert time.monotonic() - start >= 0.9
+    assert limiter.stats()['requests'] == 3
+
+
+def test_get_token_limiter():
+    assert get_token_limiter("test", 0) is None
+    assert get_token_limiter("test", 1000) is get_token_limiter("test", 1000)
+
+
+def test_plan_counts_requests_and_estimates_cost():
+    pages = [[{'Id': str(i), 'Review': "good product"} for i in range(10)]]
+    totals = count_requests(pages, batch_size=4, max_prompt_tokens=1000, counter=WordCounter())
+    assert totals['reviews'] == 10
+    assert totals['requests'] == 3
+    assert totals['output_tokens'] == 10 * 40 + 3 * 20
+
+    plan = estimate_run(totals, model="gpt-4", concurrency=3, tokens_per_minute=0, latency=1.0,
+                        output_tokens_per_second=100)
+    assert plan['cost'] == pytest.approx((totals['input_tokens'] * 0.03 + totals['output_tokens'] * 0.06) / 1000)
+    assert plan['seconds'] == pytest.approx((3 * 1.0 + 460 / 100) / 3)
+    assert plan['bound_by'] == 'concurrency'
+
+    limited = estimate_run(totals, model="llama3", tokens_per_minute=100, latency=1.0)
+    assert limited['bound_by'] == 'tpm'
+    assert limited['cost'] is None
+    assert "unknown pricing" in format_plan(limited)
+
+
+def test_plan_matches_the_prompts_the_pipeline_sends():
+    counter = WordCounter()
+    reviews = [{'Id': str(i), 'Review': "good product " * (i % 4 + 1)} for i in range(9)]
+
+    single = count_requests([reviews], batch_size=1, counter=counter)
+    assert single['requests'] == 9
+    assert single['input_tokens'] == sum(counter.count_messages(_build_messages(review['Review'])) for review in reviews)
+    assert single['output_tokens'] == 9 * 100
+
+    batched = count_requests([reviews], batch_size=4, max_prompt_tokens=1000, counter=counter)
+    batches = pack_batches(reviews, max_items=4, max_tokens=1000, counter=counter)
+    input_tokens = sum(counter.count_messages(build_batch_messages(batch)) for batch in batches)
+    assert batched['requests'] == len(batches)
+    # The per-review counts include a separator, so the plan may overshoot by a token per request
+    assert input_tokens <= batched['input_tokens'] <= input_tokens + len(batches)
+    assert batched['output_tokens'] == sum(max_output_tokens(len(batch)) for batch in batches)
+
+
+def test_plan_sentiment_run_reads_backlog_from_watermark():
+    pages = [[{'Id': '1', 'Review': 'fine'}, {'Id': '2', 'Review': 'bad'}]]
+    with patch('src.sentiment.planner.setup_state_table'), \
+         patch('src.sentiment.planner.get_watermark', return_value='0'), \
+         patch('src.sentiment.planner.iter_unprocessed_pages', return_value=iter(pages)) as mock_pages:
+        plan = plan_sentiment_run(model="gpt-3.5-turbo", batch_size=2)
+
+    assert mock_pages.call_args[1]['watermark'] == '0'
+    assert plan['reviews'] == 2 and plan['requests'] == 1
+    assert plan['cost'] > 0